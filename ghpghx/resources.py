@@ -33,8 +33,6 @@ import sys
 import traceback
 import logging
 import copy
-import os
-import requests
 import numpy as np
 from tastypie.authorization import ReadOnlyAuthorization
 from tastypie.bundle import Bundle
@@ -45,7 +43,8 @@ from tastypie.validation import Validation
 from django.core.exceptions import ValidationError
 from ghpghx.models import GHPGHXInputs, GHPGHXOutputs
 from django.forms.models import model_to_dict
-from reo.src.pvwatts import PVWatts
+from reo.src.pvwatts_local import get_pvwatts
+from reo.src.julia_client import get_julia_client
 log = logging.getLogger(__name__)
 
 api_version = "version 1.0.0"
@@ -128,7 +127,7 @@ class GHPGHXJob(ModelResource):
             # Call PVWatts for hourly dry-bulb outdoor air temperature
             if ghpghxInputsM.ambient_temperature_f in [None, []]:
                 try:
-                    pvwatts_inst = PVWatts(tilt=45, latitude=ghpghxInputsM.latitude, longitude=ghpghxInputsM.longitude)
+                    pvwatts_inst = get_pvwatts(tilt=45, latitude=ghpghxInputsM.latitude, longitude=ghpghxInputsM.longitude)
                     amb_temp_c = pvwatts_inst.response["outputs"]["tamb"]
                     ghpghxInputsM.ambient_temperature_f = list(np.array(amb_temp_c) * 1.8 + 32.0)
                 except Exception:
@@ -169,8 +168,7 @@ class GHPGHXJob(ModelResource):
         data["status"] = 'Solving for GHX Size...'
 
         try:
-            julia_host = os.environ.get('JULIA_HOST', "julia")
-            response = requests.post("http://" + julia_host + ":8081/ghpghx/", json=data["inputs"])
+            response = get_julia_client().post("ghpghx", json=data["inputs"])
             results = response.json()
         except Exception as e:
             exc_type, exc_value, exc_traceback = sys.exc_info()
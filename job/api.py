@@ -41,6 +41,9 @@ from tastypie.validation import Validation
 from job.validators import InputValidator
 # from reo.src.profiler import Profiler  # TODO use Profiler?
 from job.src.run_jump_model import run_jump_model
+from reo.src.job_routing import job_features, route_job, estimated_seconds
+from job.src.result_cache import job_input_hash, find_cached_job, clone_job
+from reo.src.result_cache import use_result_cache, save_input_hash
 from reo.exceptions import UnexpectedError, REoptError
 from job.models import APIMeta
 log = logging.getLogger(__name__)
@@ -164,9 +167,26 @@ class Job(ModelResource):
                                                      content_type='application/json',
                                                      status=500))  # internal server error
 
+        try:
+            input_hash = job_input_hash(input_validator.validated_input_dict)
+            cached_run_uuid = find_cached_job(input_hash) if use_result_cache(bundle.request) else None
+            if cached_run_uuid is not None:
+                clone_job(cached_run_uuid, run_uuid)
+            save_input_hash(run_uuid, input_hash, api_version=3)
+        except Exception as e:  # fall back to running the optimization
+            cached_run_uuid = None
+            log.warning("Could not use the result cache for run_uuid {}: {}".format(run_uuid, e))
+
+        if cached_run_uuid is not None:
+            log.info("Returning with HTTP 201, results copied from run_uuid {}".format(cached_run_uuid))
+            raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid}),
+                                                     content_type='application/json', status=201))
+
+        # send long jobs to the slow queue so that they do not hold up short jobs
+        queue, predicted_seconds, _ = route_job(job_features, input_validator.validated_input_dict, use_history=False)
         APIMeta.objects.filter(run_uuid=run_uuid).update(status='Optimizing...')
         try:
-            run_jump_model.s(run_uuid).apply_async()
+            run_jump_model.s(run_uuid).apply_async(queue=queue)
         except Exception as e:
             if isinstance(e, REoptError):
                 pass  # handled in each task
@@ -184,7 +204,8 @@ class Job(ModelResource):
                                             content_type='application/json',
                                             status=500))  # internal server error
 
-        raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid}),
+        raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid,
+                                                             'estimated_solve_seconds': estimated_seconds(predicted_seconds)}),
                                     content_type='application/json', status=201))
 
 
@@ -0,0 +1,96 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Content-addressed result cache for the v3 job endpoint (see reo/src/result_cache.py for the settings).
+"""
+import logging
+from django.db import transaction
+from job.models import APIMeta, Message, FinancialInputs, ElectricUtilityInputs, CHPInputs
+from reo.src.result_cache import input_hash, find_cached_run
+log = logging.getLogger(__name__)
+
+API_VERSION = 3
+
+# Inputs that have defaults set in the REopt Julia package (see process_results.update_inputs_in_database)
+inputs_updated_in_julia = [FinancialInputs, ElectricUtilityInputs, CHPInputs]
+
+
+def job_input_hash(validated_input_dict):
+    """
+    Hash of the v3 validated inputs, excluding the APIMeta (except reopt_version), user provided Meta, and
+    Settings.timeout_seconds
+    :param validated_input_dict: dict, InputValidator.validated_input_dict
+    :return: str, hex digest
+    """
+    inputs = {k: v for k, v in validated_input_dict.items() if k not in ["APIMeta", "Meta"]}
+    inputs["reopt_version"] = validated_input_dict.get("APIMeta", {}).get("reopt_version")
+    if "Settings" in inputs:
+        inputs["Settings"] = {k: v for k, v in inputs["Settings"].items() if k != "timeout_seconds"}
+    return input_hash(inputs, API_VERSION)
+
+
+def meta_is_optimal(run_uuid):
+    return APIMeta.objects.filter(run_uuid=run_uuid, status="optimal").exists()
+
+
+def find_cached_job(input_hash):
+    """
+    :param input_hash: str
+    :return: str, run_uuid of an optimal v3 run with the same input hash, or None
+    """
+    return find_cached_run(input_hash, API_VERSION, meta_is_optimal)
+
+
+def clone_job(source_run_uuid: str, run_uuid: str) -> None:
+    """
+    Copy the outputs (and the inputs that have defaults set in Julia) of source_run_uuid to run_uuid, whose inputs
+    have already been saved by InputValidator.save
+    """
+    with transaction.atomic():
+        source_meta = APIMeta.objects.get(run_uuid=source_run_uuid)
+        meta = APIMeta.objects.get(run_uuid=run_uuid)
+
+        for model in inputs_updated_in_julia:
+            source = model.objects.filter(meta=source_meta).first()
+            if source is not None:
+                model.objects.filter(meta=meta).update(**source.dict)
+
+        for relation in APIMeta._meta.related_objects:
+            if not relation.related_model.__name__.endswith("Outputs"):
+                continue
+            for obj in relation.related_model.objects.filter(meta=source_meta):
+                relation.related_model.create(meta=meta, **obj.dict).save()
+
+        Message.create(meta=meta, message_type="cached_results",
+                       message="Results copied from run_uuid {}, which has identical inputs.".format(
+                           source_run_uuid)).save()
+        meta.status = source_meta.status
+        meta.save(update_fields=["status"])
+    log.info("Copied results of run_uuid {} to run_uuid {}".format(source_run_uuid, run_uuid))
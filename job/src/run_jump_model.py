@@ -29,13 +29,13 @@
 # *********************************************************************************
 import sys
 import traceback
-import os
 import time
 import requests
 from celery import shared_task, Task
 from reo.exceptions import REoptError, OptimizationTimeout, UnexpectedError, NotOptimal, REoptFailedToStartError
 from job.models import APIMeta, Message, get_input_dict_from_run_uuid
 from reo.src.profiler import Profiler
+from reo.src.julia_client import get_julia_client
 from job.src.process_results import process_results, update_inputs_in_database
 from celery.utils.log import get_task_logger
 logger = get_task_logger(__name__)
@@ -91,8 +91,7 @@ def run_jump_model(run_uuid):
     logger.info("Running JuMP model ...")
     try:
         t_start = time.time()
-        julia_host = os.environ.get('JULIA_HOST', "julia")
-        response = requests.post("http://" + julia_host + ":8081/reopt/", json=data)
+        response = get_julia_client().post("reopt", json=data)
         response_json = response.json()
         if response.status_code == 500:
             raise REoptFailedToStartError(task=name, message=response_json["error"], run_uuid=run_uuid, user_uuid=user_uuid)
@@ -28,7 +28,7 @@
 # OF THE POSSIBILITY OF SUCH DAMAGE.
 # *********************************************************************************
 import logging
-import pandas as pd
+from reo.src import time_series
 from job.models import MAX_BIG_NUMBER, APIMeta, ExistingBoilerInputs, UserProvidedMeta, SiteInputs, Settings, ElectricLoadInputs, ElectricTariffInputs, \
     FinancialInputs, BaseModel, Message, ElectricUtilityInputs, PVInputs, ElectricStorageInputs, GeneratorInputs, WindInputs, SpaceHeatingLoadInputs, \
     DomesticHotWaterLoadInputs, CHPInputs, CoolingLoadInputs, ExistingChillerInputs, HotThermalStorageInputs, ColdThermalStorageInputs
@@ -613,28 +613,24 @@ def validate_time_series(series: list, time_steps_per_hour: int) -> Tuple[list,
     TODO: add resampling messages to messages returned to user
     TODO: does the resampling here match what is done in each of the time-series objects in v1?
     """
-    n = len(series)
-    length_list = [8760, 17520, 35040]
-    if n not in length_list:
+    time_steps_per_hour_in_series = time_series.time_steps_per_hour_of(series)
+    if time_steps_per_hour_in_series is None:
         return (series, "",
             (f"Invalid length. Samples must be hourly (8,760 samples), 30 minute (17,520 samples), "
              "or 15 minute (35,040 samples)"))
+
+    array = time_series.to_array(series)
+    if array is not None and time_series.has_non_finite(array):
+        return series, "", "Contains at least one NaN or infinite value."
     
-    time_steps_per_hour_in_series = n / 8760
     if time_steps_per_hour_in_series == time_steps_per_hour:
         return series, "", ""
 
     if time_steps_per_hour < time_steps_per_hour_in_series:
         resampling_msg = f"Downsampled to match time_steps_per_hour via average."
-        index = pd.date_range('1/1/2000', periods=n, freq=f'{int(60/time_steps_per_hour_in_series)}T')
-        s = pd.Series(series, index=index)
-        s = s.resample(f'{int(60/time_steps_per_hour)}T').mean()
-        return s.tolist(), resampling_msg, ""
-    
-    # time_steps_per_hour > time_steps_per_hour_in_series
-    resampling_msg = f"Upsampled to match time_steps_per_hour via forward-fill."
-    resampled_val = [x for x in series for _ in range(int(time_steps_per_hour/time_steps_per_hour_in_series))]
-    return resampled_val, resampling_msg, ""
+    else:
+        resampling_msg = f"Upsampled to match time_steps_per_hour via forward-fill."
+    return time_series.resample(series, time_steps_per_hour_in_series, time_steps_per_hour), resampling_msg, ""
 
 
 def lat_lon_in_windtoolkit(lat, lon):
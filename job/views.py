@@ -34,6 +34,7 @@ import traceback as tb
 import re
 from django.http import JsonResponse
 from reo.exceptions import UnexpectedError
+from reo.src.julia_client import get_julia_client
 from job.models import Settings, PVInputs, ElectricStorageInputs, WindInputs, GeneratorInputs, ElectricLoadInputs,\
     ElectricTariffInputs, ElectricUtilityInputs, SpaceHeatingLoadInputs, PVOutputs, ElectricStorageOutputs,\
     WindOutputs, ExistingBoilerInputs, GeneratorOutputs, ElectricTariffOutputs, ElectricUtilityOutputs, \
@@ -41,8 +42,6 @@ from job.models import Settings, PVInputs, ElectricStorageInputs, WindInputs, Ge
     UserProvidedMeta, CHPInputs, CHPOutputs, CoolingLoadInputs, ExistingChillerInputs, ExistingChillerOutputs,\
     CoolingLoadOutputs, HeatingLoadOutputs, REoptjlMessageOutputs, HotThermalStorageInputs, HotThermalStorageOutputs,\
     ColdThermalStorageInputs, ColdThermalStorageOutputs
-import os
-import requests
 import numpy as np
 import json
 import logging
@@ -385,8 +384,7 @@ def chp_defaults(request):
     if (request.GET.get("size_class")):
         inputs["size_class"] = int(request.GET.get("size_class"))
     try:
-        julia_host = os.environ.get('JULIA_HOST', "julia")
-        http_jl_response = requests.get("http://" + julia_host + ":8081/chp_defaults/", json=inputs)
+        http_jl_response = get_julia_client().get("chp_defaults", json=inputs)
         response = JsonResponse(
             http_jl_response.json()
         )
@@ -470,8 +468,7 @@ def simulated_load(request):
                         else:
                             inputs[key] = float(value)
 
-        julia_host = os.environ.get('JULIA_HOST', "julia")
-        http_jl_response = requests.get("http://" + julia_host + ":8081/simulated_load/", json=inputs)
+        http_jl_response = get_julia_client().get("simulated_load", json=inputs)
         response = JsonResponse(
             http_jl_response.json()
         )
@@ -497,14 +494,7 @@ def emissions_profile(request):
             "latitude": request.GET['latitude'], # need to do float() to convert unicode?
             "longitude": request.GET['longitude']
         }
-        julia_host = os.environ.get(
-            'JULIA_HOST', 
-            "julia"
-        )
-        http_jl_response = requests.get(
-            "http://" + julia_host + ":8081/emissions_profile/", 
-            json=inputs
-        )
+        http_jl_response = get_julia_client().get("emissions_profile", json=inputs)
         response = JsonResponse(
             http_jl_response.json()
         )
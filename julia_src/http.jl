@@ -293,4 +293,4 @@ HTTP.@register(ROUTER, "GET", "/chp_defaults", chp_defaults)
 HTTP.@register(ROUTER, "GET", "/emissions_profile", emissions_profile)
 HTTP.@register(ROUTER, "GET", "/simulated_load", simulated_load)
 HTTP.@register(ROUTER, "GET", "/health", health)
-HTTP.serve(ROUTER, "0.0.0.0", 8081, reuseaddr=true)
+HTTP.serve(ROUTER, "0.0.0.0", parse(Int, get(ENV, "JULIA_PORT", "8081")), reuseaddr=true)
@@ -1,13 +1,21 @@
 #!/bin/bash
+# usage: run_julia_servers.sh N [BASE_PORT]
+# Without BASE_PORT all N servers share port 8081. With BASE_PORT server i listens on BASE_PORT + i - 1, so that
+# the API can send each request to the least loaded server (set JULIA_HOSTS, see reo/src/julia_client.py).
 
 START=1
 END=$1
+BASE_PORT=$2
 echo "starting $1 julia servers ..."
 
 for (( c=$START; c<=$END; c++ ))
 do
-	julia --project=/opt/julia_src http.jl &
+	if [ -n "$BASE_PORT" ]; then
+		JULIA_PORT=$(( BASE_PORT + c - 1 )) julia --project=/opt/julia_src http.jl &
+	else
+		julia --project=/opt/julia_src http.jl &
+	fi
 done
 
 wait
-echo "julia servers stopped"
\ No newline at end of file
+echo "julia servers stopped"
@@ -40,10 +40,14 @@ from tastypie.resources import ModelResource
 from tastypie.validation import Validation
 from reo.validators import ValidateNestedInput
 from reo.scenario import setup_scenario
-from reo.models import ModelManager, BadPost
+from reo.models import ModelManager, BadPost, SolveFeaturesModel
 from reo.src.profiler import Profiler
 from reo.process_results import process_results
 from reo.src.run_jump_model import run_jump_model
+from reo.src.job_routing import scenario_features, route_job, estimated_seconds
+from reo.src.solve_time import post_features
+from reo.src.result_cache import scenario_input_hash, use_result_cache, find_cached_scenario, clone_scenario, \
+    save_input_hash
 from reo.exceptions import REoptError, UnexpectedError
 from ghpghx.models import GHPGHXInputs
 from django.core.exceptions import ValidationError
@@ -162,6 +166,8 @@ class Job(ModelResource):
                                                      status=400))
         log.info('Entering ModelManager')
         model_manager = ModelManager()
+        input_hash = scenario_input_hash(data["inputs"], api_version=1)
+        cached_run_uuid = None
         profiler.profileEnd()
 
         if saveToDb:
@@ -177,8 +183,17 @@ class Job(ModelResource):
             test_case = bundle.request.META.get('HTTP_USER_AGENT') or ''
             if test_case.startswith('check_http/'):
                 data['outputs']['Scenario']['job_type'] = 'Monitoring'
+            if use_result_cache(bundle.request):
+                try:
+                    cached_run_uuid = find_cached_scenario(input_hash, api_version=1)
+                    if cached_run_uuid is not None:
+                        clone_scenario(cached_run_uuid, data)
+                except Exception as e:  # fall back to running the optimization
+                    cached_run_uuid = None
+                    log.warning("Could not use the result cache for run_uuid {}: {}".format(run_uuid, e))
             try:
-                model_manager.create_and_save(data)
+                if cached_run_uuid is None:
+                    model_manager.create_and_save(data)
             except Exception as e:
                 log.error("Could not create and save run_uuid: {}\n Data: {}".format(run_uuid,data))
                 exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -191,11 +206,24 @@ class Job(ModelResource):
                 raise ImmediateHttpResponse(HttpResponse(json.dumps(data),
                                                          content_type='application/json',
                                                          status=500))  # internal server error
-        setup = setup_scenario.s(run_uuid=run_uuid, data=data, api_version=1)
-        call_back = process_results.s(data=data, meta={'run_uuid': run_uuid, 'api_version': api_version})
+            save_input_hash(run_uuid, input_hash, api_version=1)
+        if cached_run_uuid is not None:
+            log.info("Returning with HTTP 201, results copied from run_uuid {}".format(cached_run_uuid))
+            raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid}),
+                                                     content_type='application/json', status=201))
+
+        # send long jobs to the slow queue so that they do not hold up short jobs
+        queue, predicted_seconds, features = route_job(scenario_features, data["inputs"])
+        if saveToDb and features is not None:  # for training the solve time estimates
+            try:
+                SolveFeaturesModel.create(run_uuid=run_uuid, post_features=post_features(features))
+            except Exception as e:
+                log.warning("Could not save the solve features of run_uuid {}: {}".format(run_uuid, e))
+        setup = setup_scenario.s(run_uuid=run_uuid, data=data, api_version=1).set(queue=queue)
+        call_back = process_results.s(data=data, meta={'run_uuid': run_uuid, 'api_version': api_version}).set(queue=queue)
         # (use .si for immutable signature, if no outputs were passed from reopt_jobs)
-        rjm = run_jump_model.s(data=data)
-        rjm_bau = run_jump_model.s(data=data, bau=True)
+        rjm = run_jump_model.s(data=data).set(queue=queue)
+        rjm_bau = run_jump_model.s(data=data, bau=True).set(queue=queue)
 
         log.info("Starting celery chain")
         try:
@@ -217,7 +245,8 @@ class Job(ModelResource):
                                                          status=500))  # internal server error
 
         log.info("Returning with HTTP 201")
-        raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid}),
+        raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid,
+                                                             'estimated_solve_seconds': estimated_seconds(predicted_seconds)}),
                                                  content_type='application/json', status=201))
 
 """
@@ -333,6 +362,8 @@ class Job2(ModelResource):
                                                      status=400))
         log.info('Entering ModelManager')
         model_manager = ModelManager()
+        input_hash = scenario_input_hash(data["inputs"], api_version=2)
+        cached_run_uuid = None
         profiler.profileEnd()
 
         if saveToDb:
@@ -348,8 +379,17 @@ class Job2(ModelResource):
             test_case = bundle.request.META.get('HTTP_USER_AGENT') or ''
             if test_case.startswith('check_http/'):
                 data['outputs']['Scenario']['job_type'] = 'Monitoring'
+            if use_result_cache(bundle.request):
+                try:
+                    cached_run_uuid = find_cached_scenario(input_hash, api_version=2)
+                    if cached_run_uuid is not None:
+                        clone_scenario(cached_run_uuid, data)
+                except Exception as e:  # fall back to running the optimization
+                    cached_run_uuid = None
+                    log.warning("Could not use the result cache for run_uuid {}: {}".format(run_uuid, e))
             try:
-                model_manager.create_and_save(data)
+                if cached_run_uuid is None:
+                    model_manager.create_and_save(data)
             except Exception as e:
                 log.error("Could not create and save run_uuid: {}\n Data: {}".format(run_uuid,data))
                 exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -362,11 +402,24 @@ class Job2(ModelResource):
                 raise ImmediateHttpResponse(HttpResponse(json.dumps(data),
                                                          content_type='application/json',
                                                          status=500))  # internal server error
-        setup = setup_scenario.s(run_uuid=run_uuid, data=data, api_version=2)
-        call_back = process_results.s(data=data, meta={'run_uuid': run_uuid, 'api_version': api_version})
+            save_input_hash(run_uuid, input_hash, api_version=2)
+        if cached_run_uuid is not None:
+            log.info("Returning with HTTP 201, results copied from run_uuid {}".format(cached_run_uuid))
+            raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid}),
+                                                     content_type='application/json', status=201))
+
+        # send long jobs to the slow queue so that they do not hold up short jobs
+        queue, predicted_seconds, features = route_job(scenario_features, data["inputs"])
+        if saveToDb and features is not None:  # for training the solve time estimates
+            try:
+                SolveFeaturesModel.create(run_uuid=run_uuid, post_features=post_features(features))
+            except Exception as e:
+                log.warning("Could not save the solve features of run_uuid {}: {}".format(run_uuid, e))
+        setup = setup_scenario.s(run_uuid=run_uuid, data=data, api_version=2).set(queue=queue)
+        call_back = process_results.s(data=data, meta={'run_uuid': run_uuid, 'api_version': api_version}).set(queue=queue)
         # (use .si for immutable signature, if no outputs were passed from reopt_jobs)
-        rjm = run_jump_model.s(data=data)
-        rjm_bau = run_jump_model.s(data=data, bau=True)
+        rjm = run_jump_model.s(data=data).set(queue=queue)
+        rjm_bau = run_jump_model.s(data=data, bau=True).set(queue=queue)
 
         log.info("Starting celery chain")
         try:
@@ -388,5 +441,6 @@ class Job2(ModelResource):
                                                          status=500))  # internal server error
 
         log.info("Returning with HTTP 201")
-        raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid}),
+        raise ImmediateHttpResponse(HttpResponse(json.dumps({'run_uuid': run_uuid,
+                                                             'estimated_solve_seconds': estimated_seconds(predicted_seconds)}),
                                                  content_type='application/json', status=201))
\ No newline at end of file
@@ -0,0 +1,52 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import os
+from django.core.management.base import BaseCommand
+from reo.src import pvwatts_local
+
+
+class Command(BaseCommand):
+    help = "Copy SAM CSV or TMY3 CSV weather files to WEATHER_FILES_PATH and index their locations for the local " \
+           "PVWatts engine (PV_ENGINE=local)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="weather files, or directories of weather files")
+
+    def handle(self, *args, **options):
+        filenames = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                filenames.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                                 if name.lower().endswith('.csv'))
+            else:
+                filenames.append(path)
+        stations = pvwatts_local.import_weather_files(filenames)
+        self.stdout.write(self.style.SUCCESS("Imported {} weather files, {} stations indexed in {}".format(
+            len(filenames), len(stations), pvwatts_local.WEATHER_FILES_PATH)))
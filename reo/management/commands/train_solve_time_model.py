@@ -0,0 +1,45 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+from django.core.management.base import BaseCommand
+from reo.src.solve_time import train, SOLVE_TIME_MODEL_PATH
+
+
+class Command(BaseCommand):
+    help = "Train the solve time estimates (reo/src/solve_time.py) from the solve times of recent runs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-runs', type=int, default=5000, help="Number of most recent runs to use")
+        parser.add_argument('--min-runs', type=int, default=50, help="Minimum number of runs to train a regression")
+
+    def handle(self, *args, **options):
+        model = train(max_runs=options['max_runs'], min_runs=options['min_runs'])
+        for feature_set, regression in model.items():
+            self.stdout.write("{}: {} runs, r2 = {}".format(feature_set, regression['runs'], regression['r2']))
+        self.stdout.write(self.style.SUCCESS("Saved solve time model to {}".format(SOLVE_TIME_MODEL_PATH)))
@@ -0,0 +1,87 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from reo.exceptions import PVWattsDownloadError
+from reo.src import pvwatts_cache
+from reo.src.pvwatts import PVWatts
+from reo.src.techs import PV
+
+
+def site_query(row):
+    """
+    PVWatts inputs of a site with the same defaults as the PV inputs of a scenario
+    :param row: dict with latitude and longitude, and optionally tilt, azimuth, array_type, module_type, losses,
+        radius, and dataset
+    :return: dict of PVWatts kwargs
+    """
+    latitude, longitude = float(row['latitude']), float(row['longitude'])
+    array_type = int(row.get('array_type') or 1)
+    azimuth = float(row.get('azimuth') or (180 if latitude >= 0 else 0))
+    if row.get('tilt'):
+        tilt = float(row['tilt'])
+    elif array_type == 0:
+        tilt = abs(latitude)
+    else:
+        tilt = PV.array_type_to_tilt_angle[array_type]
+    query = dict(latitude=latitude, longitude=longitude, tilt=tilt, azimuth=azimuth, array_type=array_type,
+                 module_type=int(row.get('module_type') or 0), losses=float(row.get('losses') or 0.14))
+    if row.get('radius'):
+        query['radius'] = float(row['radius'])
+    if row.get('dataset'):
+        query['dataset'] = row['dataset']
+    return query
+
+
+class Command(BaseCommand):
+    help = "Query PVWatts for the sites in a CSV file (with columns latitude, longitude, and optionally tilt, " \
+           "azimuth, array_type, module_type, losses, radius, and dataset) to fill the PVWatts cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file of sites")
+        parser.add_argument('--workers', type=int, default=4, help="number of concurrent PVWatts queries")
+
+    def handle(self, *args, **options):
+        with open(options['path'], 'r') as f:
+            queries = [site_query(row) for row in csv.DictReader(f)]
+
+        n_failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(PVWatts, **query): query for query in queries}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except (PVWattsDownloadError, KeyError, ValueError) as e:
+                    n_failed += 1
+                    self.stderr.write("Could not query PVWatts for {}: {}".format(futures[future], e))
+        pvwatts_cache.evict()
+        self.stdout.write(self.style.SUCCESS("Queried PVWatts for {} of {} sites, cached in {}".format(
+            len(queries) - n_failed, len(queries), pvwatts_cache.PVWATTS_CACHE_PATH)))
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reo', '0153_merge_20230329_1652'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultCacheModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_uuid', models.UUIDField(unique=True)),
+                ('input_hash', models.TextField(db_index=True)),
+                ('api_version', models.IntegerField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
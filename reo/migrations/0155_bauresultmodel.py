@@ -0,0 +1,28 @@
+# Generated by Django 4.0.7 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import picklefield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reo', '0154_resultcachemodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BAUResultModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.TextField()),
+                ('tolerance', models.FloatField()),
+                ('run_uuid', models.UUIDField()),
+                ('results', picklefield.fields.PickledObjectField(editable=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('fingerprint', 'tolerance')},
+            },
+        ),
+    ]
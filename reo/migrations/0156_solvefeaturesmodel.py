@@ -0,0 +1,23 @@
+# Generated by Django 4.0.7 on 2026-10-18 13:00
+
+from django.db import migrations, models
+import picklefield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reo', '0155_bauresultmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolveFeaturesModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_uuid', models.UUIDField(unique=True)),
+                ('post_features', picklefield.fields.PickledObjectField(editable=True, null=True)),
+                ('reopt_inputs_features', picklefield.fields.PickledObjectField(editable=True, null=True)),
+            ],
+        ),
+    ]
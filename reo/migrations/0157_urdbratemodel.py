@@ -0,0 +1,30 @@
+# Generated by Django 4.0.7 on 2026-10-18 14:00
+
+from django.db import migrations, models
+import picklefield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reo', '0156_solvefeaturesmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='URDBRateModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.TextField(unique=True)),
+                ('utility', models.TextField(blank=True, null=True)),
+                ('name', models.TextField(blank=True, null=True)),
+                ('startdate', models.BigIntegerField(blank=True, null=True)),
+                ('rate', picklefield.fields.PickledObjectField(editable=True, null=True)),
+                ('source', models.TextField(blank=True, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'index_together': {('utility', 'name')},
+            },
+        ),
+    ]
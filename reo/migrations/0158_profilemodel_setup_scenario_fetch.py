@@ -0,0 +1,24 @@
+# Generated by Django 4.0.7 on 2026-10-18 16:00
+
+from django.db import migrations, models
+import picklefield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reo', '0157_urdbratemodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilemodel',
+            name='setup_scenario_fetch_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profilemodel',
+            name='setup_scenario_fetch_timings',
+            field=picklefield.fields.PickledObjectField(editable=True, null=True),
+        ),
+    ]
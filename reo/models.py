@@ -59,10 +59,29 @@ class URDBError(models.Model):
             log.debug(message)
 
 
+class URDBRateModel(models.Model):
+    """
+    Local copy of URDB rates, imported from a URDB JSON dump or saved when a rate is downloaded, so that rates that
+    have been seen before are not downloaded again (see reo/src/urdb_store.py)
+    """
+    class Meta():
+        index_together = [['utility', 'name']]
+
+    label = models.TextField(unique=True)
+    utility = models.TextField(null=True, blank=True)
+    name = models.TextField(null=True, blank=True)
+    startdate = models.BigIntegerField(null=True, blank=True)
+    rate = PickledObjectField(null=True, editable=True)
+    source = models.TextField(null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True)
+
+
 class ProfileModel(models.Model):
     run_uuid = models.UUIDField(unique=True)
     pre_setup_scenario_seconds = models.FloatField(null=True, blank=True)
     setup_scenario_seconds = models.FloatField(null=True, blank=True)
+    setup_scenario_fetch_seconds = models.FloatField(null=True, blank=True)
+    setup_scenario_fetch_timings = PickledObjectField(null=True, editable=True)
     reopt_seconds = models.FloatField(null=True, blank=True)
     reopt_bau_seconds = models.FloatField(null=True, blank=True)
     parse_run_outputs_seconds = models.FloatField(null=True, blank=True)
@@ -102,6 +121,60 @@ class ProfileModel(models.Model):
         return obj
 
 
+class ResultCacheModel(models.Model):
+    """
+    Hash of the validated inputs of each job, used to find completed runs with identical inputs
+    (see reo/src/result_cache.py)
+    """
+    run_uuid = models.UUIDField(unique=True)
+    input_hash = models.TextField(db_index=True)
+    api_version = models.IntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def create(cls, **kwargs):
+        obj = cls(**kwargs)
+        obj.save()
+        return obj
+
+
+class BAUResultModel(models.Model):
+    """
+    Business-as-usual optimization results keyed by the fingerprint of the BAU REopt inputs and the optimality
+    tolerance, used to skip the BAU solve for scenarios that share BAU-relevant inputs (see reo/src/result_cache.py)
+    """
+    class Meta():
+        unique_together = [['fingerprint', 'tolerance']]
+
+    fingerprint = models.TextField()
+    tolerance = models.FloatField()
+    run_uuid = models.UUIDField()
+    results = PickledObjectField(null=True, editable=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def create(cls, **kwargs):
+        obj = cls(**kwargs)
+        obj.save()
+        return obj
+
+
+class SolveFeaturesModel(models.Model):
+    """
+    Features of each run that are used to estimate solve times (see reo/src/solve_time.py): post_features are known
+    when the job is POST'ed and reopt_inputs_features are built from the DataManager.reopt_inputs
+    """
+    run_uuid = models.UUIDField(unique=True)
+    post_features = PickledObjectField(null=True, editable=True)
+    reopt_inputs_features = PickledObjectField(null=True, editable=True)
+
+    @classmethod
+    def create(cls, **kwargs):
+        obj = cls(**kwargs)
+        obj.save()
+        return obj
+
+
 class ScenarioModel(models.Model):
     # Inputs
     # user = models.ForeignKey(User, null=True, blank=True)
@@ -1351,6 +1424,8 @@ class ModelManager(object):
         GHPModel.objects.filter(run_uuid=run_uuid).delete()
         MessageModel.objects.filter(run_uuid=run_uuid).delete()
         ErrorModel.objects.filter(run_uuid=run_uuid).delete()
+        ResultCacheModel.objects.filter(run_uuid=run_uuid).delete()
+        SolveFeaturesModel.objects.filter(run_uuid=run_uuid).delete()
 
     @staticmethod
     def update(data, run_uuid):
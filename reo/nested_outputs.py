@@ -72,6 +72,16 @@ nested_output_definitions = {
                   "description": "Time spent setting up scenario",
                   "units": "seconds"
                 },
+                "setup_scenario_fetch_seconds": {
+                  "type": "float",
+                  "description": "Wall time of the concurrent PVWatts and Wind data fetches while setting up scenario",
+                  "units": "seconds"
+                },
+                "setup_scenario_fetch_timings": {
+                  "type": "dict",
+                  "description": "Time spent on each PVWatts and Wind data fetch while setting up scenario, keyed by pv1, pv2, ..., wind",
+                  "units": "seconds"
+                },
                 "reopt_seconds":{
                   "type": "float",
                   "description": "Time spent solving scenario",
@@ -37,6 +37,7 @@ from celery import shared_task, Task
 from reo.exceptions import REoptError, UnexpectedError
 from reo.models import ModelManager, PVModel, FinancialModel, WindModel, AbsorptionChillerModel
 from reo.src.profiler import Profiler
+from reo.src import dfm_store
 from reo.src.emissions_calculator import EmissionsCalculator
 from reo.utilities import annuity, TONHOUR_TO_KWHT, MMBTU_TO_KWH, GAL_DIESEL_TO_KWH
 from reo.nested_inputs import macrs_five_year, macrs_seven_year
@@ -69,6 +70,7 @@ class ProcessResultsTask(Task):
         self.data["messages"]["error"] = exc.message
         self.data["outputs"]["Scenario"]["status"] = "An error occurred. See messages for more."
         ModelManager.update_scenario_and_messages(self.data, run_uuid=self.run_uuid)
+        dfm_store.remove(self.run_uuid)
 
         self.request.chain = None  # stop the chain?
         self.request.callback = None
@@ -1129,6 +1131,8 @@ def process_results(self, dfm_list, data, meta, saveToDB=True):
     self.user_uuid = data['outputs']['Scenario'].get('user_uuid')
 
     try:
+        # load the DataManager payloads that were passed by handle (see reo/src/dfm_store.py)
+        dfm_list = [dfm_store.load(dfm) if dfm_store.is_handle(dfm) else dfm for dfm in dfm_list]
         results_object = Results(results_dict=dfm_list[0]['results'], results_dict_bau=dfm_list[1]['results_bau'],
                                  dm=dfm_list[0], inputs=data['inputs']['Scenario']['Site'])
         results = results_object.get_output()
@@ -1197,6 +1201,7 @@ def process_results(self, dfm_list, data, meta, saveToDB=True):
 
         if saveToDB:
             ModelManager.update(data, run_uuid=self.run_uuid)
+        dfm_store.remove(self.run_uuid)
 
     except Exception:
         exc_type, exc_value, exc_traceback = sys.exc_info()
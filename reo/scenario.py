@@ -43,10 +43,12 @@ from reo.src.fuel_tariff import FuelTariff
 from reo.src.load_profile_boiler_fuel import LoadProfileBoilerFuel
 from reo.src.load_profile_chiller_thermal import LoadProfileChillerThermal
 from reo.src.profiler import Profiler
+from reo.src.solve_time import reopt_inputs_features
 from reo.src.site import Site
 from reo.src.storage import Storage, HotTES, ColdTES
 from reo.src.techs import PV, Util, Wind, Generator, CHP, Boiler, ElectricChiller, AbsorptionChiller, NewBoiler, SteamTurbine
-from reo.src import ghp
+from reo.src import ghp, dfm_store
+from reo.src.prefetch import Prefetch
 from celery import shared_task, Task
 from reo.models import ModelManager
 from reo.exceptions import REoptError, UnexpectedError, LoadProfileError, WindDownloadError, PVWattsDownloadError, RequestError, GHXMaxIterationsError
@@ -107,6 +109,8 @@ def setup_scenario(self, run_uuid, data, api_version=1):
     try:
         inputs_dict = data['inputs']['Scenario']
         dfm = DataManager(run_id=run_uuid, user_id=inputs_dict.get('user_uuid'), n_timesteps=int(inputs_dict['time_steps_per_hour'] * 8760))
+        # start the PVWatts and Wind fetches, which are handed to the PV and Wind objects below
+        prefetch = Prefetch(inputs_dict, inputs_path, run_uuid=run_uuid)
 
         # storage is always made, even if max size is zero (due to REopt's expected inputs)
         storage = Storage(dfm=dfm, **inputs_dict["Site"]["Storage"])
@@ -129,7 +133,7 @@ def setup_scenario(self, run_uuid, data, api_version=1):
             pv = None
             if pv_dict["max_kw"] > 0 or pv_dict["existing_kw"] > 0:
                 pv = PV(dfm=dfm, latitude=latitude, longitude=longitude, time_steps_per_hour=time_steps_per_hour,
-                        **pv_dict)
+                        pvwatts=prefetch.result('pv{}'.format(pv_dict["pv_number"])), **pv_dict)
                 station = pv.station_location
                 # update data inputs to reflect the pvwatts station data locations
                 # must propagate array_type_to_tilt default assignment back to database
@@ -316,6 +320,7 @@ def setup_scenario(self, run_uuid, data, api_version=1):
                         time_steps_per_hour=inputs_dict.get('time_steps_per_hour'),
                         run_uuid=run_uuid, 
                         api_version=api_version,
+                        sam_prod_factor=prefetch.result('wind'),
                         **inputs_dict["Site"]["Wind"])
 
             # must propogate these changes back to database for proforma
@@ -502,6 +507,11 @@ def setup_scenario(self, run_uuid, data, api_version=1):
         dfm.include_health_in_objective = inputs_dict['include_health_in_objective']
 
         dfm.finalize()
+        try:  # for training the solve time estimates
+            ModelManager.updateModel('SolveFeaturesModel',
+                                     {'reopt_inputs_features': reopt_inputs_features(dfm.reopt_inputs)}, run_uuid)
+        except Exception as e:
+            log.warning("Could not save the solve time features: {}".format(e))
         dfm_dict = vars(dfm)  # serialize for celery
 
         # delete python objects, which are not serializable
@@ -516,9 +526,13 @@ def setup_scenario(self, run_uuid, data, api_version=1):
         profiler.profileEnd()
         tmp = dict()
         tmp['setup_scenario_seconds'] = profiler.getDuration()
+        tmp['setup_scenario_fetch_seconds'] = prefetch.seconds
+        tmp['setup_scenario_fetch_timings'] = prefetch.timings
         ModelManager.updateModel('ProfileModel', tmp, run_uuid)
         # TODO: remove the need for this db call by passing these values to process_results.py via reopt.jl
 
+        if dfm_store.DFM_STORE_ENABLED:  # pass a handle to the arrays instead of the arrays
+            return dfm_store.dump(dfm_dict, run_uuid)
         return vars(dfm)  # --> gets passed to REopt runs (BAU and with tech)
 
     except Exception as e:
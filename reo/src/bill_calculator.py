@@ -0,0 +1,308 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Year one electricity bills of load profiles under a tariff, without running REopt.
+
+The tariff is parsed with UrdbParse (so parsed rates are shared with the tariff cache), and the charges are calculated
+from the REoptArgs as in the tariff constraints of julia_src/reopt_model.jl with the grid purchases fixed to the loads:
+    - energy charges: monthly energy is allocated to the energy tiers in order and each tier is charged pro rata
+      across the time steps of the month at that tier's rate in each time step,
+    - monthly (flat) demand charges on the monthly peaks, raised to the lookback percentage of the lookback peak,
+    - TOU demand charges on the peak of each ratchet (TOU period in a month), with demand tiers,
+    - coincident peak charges on the peak in the active time steps of each coincident peak period,
+    - fixed monthly charges, and the minimum charge adder that brings the bill up to the annual/monthly minimum.
+Every step is vectorized over a batch of loads, so that many load profiles can be billed in one call.
+
+Example usage:
+
+calculator = BillCalculator.from_urdb_response(urdb_response, year=2017)
+bills = calculator.calculate([load_kw_1, load_kw_2])  # list of dicts of year one costs
+"""
+import types
+import numpy as np
+from reo.src.data_manager import big_number
+from reo.src.urdb_parse import UrdbParse
+from reo.src.urdb_rate import Rate
+
+bill_components = ['year_one_energy_cost_us_dollars', 'year_one_demand_cost_us_dollars',
+                   'year_one_coincident_peak_cost_us_dollars', 'year_one_fixed_cost_us_dollars',
+                   'year_one_min_charge_adder_us_dollars', 'year_one_bill_us_dollars']
+
+
+def tier_widths(max_in_tiers, n_tiers):
+    """
+    Size of each tier as used in REopt (the URDB tier maxes are the widths of the tiers). The last tier is unbounded.
+    :param max_in_tiers: list of float
+    :param n_tiers: int
+    :return: numpy array of length n_tiers
+    """
+    widths = np.full(n_tiers, np.inf)
+    widths[:n_tiers - 1] = (list(max_in_tiers[:n_tiers - 1]) + (n_tiers - 1) * [big_number])[:n_tiers - 1]
+    return widths
+
+
+def allocate_to_tiers(quantity, widths):
+    """
+    Fill the tiers in order
+    :param quantity: numpy array of any shape
+    :param widths: numpy array of length n_tiers
+    :return: numpy array of shape quantity.shape + (n_tiers,), the amount in each tier
+    """
+    start = np.concatenate([[0.0], np.cumsum(widths)[:-1]])
+    return np.clip(quantity[..., np.newaxis] - start, 0.0, widths)
+
+
+def get_urdb_response(tariff, offline=False):
+    """
+    URDB rate of an ElectricTariff-like dict, looked up in the URDB rate store (or URDB) for labels and names
+    :param tariff: dict with urdb_response, urdb_label, or urdb_utility_name and urdb_rate_name
+    :param offline: bool, only look in the URDB rate store
+    :return: URDB rate dict, or None if offline and the rate is not in the store
+    """
+    if tariff.get('urdb_response') is not None:
+        return tariff['urdb_response']
+    if tariff.get('urdb_label'):
+        rate = Rate(rate=tariff['urdb_label'], offline=offline)
+        name = tariff['urdb_label']
+    elif tariff.get('urdb_utility_name') and tariff.get('urdb_rate_name'):
+        rate = Rate(util=tariff['urdb_utility_name'], rate=tariff['urdb_rate_name'], offline=offline)
+        name = tariff['urdb_rate_name']
+    else:
+        raise ValueError("Each tariff requires urdb_response, urdb_label, or urdb_utility_name and urdb_rate_name.")
+    if rate.urdb_dict is None and not offline:
+        raise ValueError("Unable to download {} from URDB.".format(name))
+    return rate.urdb_dict
+
+
+def get_urdb_responses(tariffs, max_downloads):
+    """
+    URDB rates of several tariffs, downloading at most max_downloads of the rates that are not in the URDB rate store
+    so that a request with many tariffs cannot make many slow calls to URDB
+    :param tariffs: list of dicts, see get_urdb_response
+    :param max_downloads: int
+    :return: list of URDB rate dicts
+    """
+    responses = [get_urdb_response(tariff, offline=True) for tariff in tariffs]
+    missing = [i for i, response in enumerate(responses) if response is None]
+    if len(missing) > max_downloads:
+        raise ValueError("At most {} of the tariffs can be downloaded from URDB in one request, {} are not in the URDB "
+                         "rate store. Include their urdb_response instead.".format(max_downloads, len(missing)))
+    for i in missing:
+        responses[i] = get_urdb_response(tariffs[i])
+    return responses
+
+
+class BillCalculator(object):
+
+    def __init__(self, reopt_args, time_steps_per_hour=1, coincident_peak_load_active_timesteps=None,
+                 coincident_peak_load_charge_us_dollars_per_kw=None):
+        """
+        :param reopt_args: REoptArgs, from UrdbParse.parse_rate
+        :param time_steps_per_hour: int
+        :param coincident_peak_load_active_timesteps: list of int (one period) or list of lists of int, time steps
+            (indexed on 1) of each coincident peak period
+        :param coincident_peak_load_charge_us_dollars_per_kw: float (one period) or list of float
+        """
+        self.time_steps_per_hour = time_steps_per_hour
+        self.n_steps = 8760 * time_steps_per_hour
+
+        # first time step of each month (demand_ratchets_monthly holds the hours of each month)
+        hours_in_month = [len(hours) for hours in reopt_args.demand_ratchets_monthly]
+        self.month_starts = np.concatenate([[0], np.cumsum(hours_in_month)[:-1]]) * time_steps_per_hour
+
+        n_tiers = reopt_args.energy_tiers_num
+        self.energy_rates = np.asarray(reopt_args.energy_costs, dtype=float).reshape(n_tiers, self.n_steps)
+        self.energy_tier_widths = tier_widths(reopt_args.energy_max_in_tiers, n_tiers)
+
+        n_tiers = reopt_args.demand_month_tiers_num
+        if len(reopt_args.demand_rates_monthly) > 0:
+            self.demand_rates_monthly = np.asarray(reopt_args.demand_rates_monthly, dtype=float).reshape(12, n_tiers)
+        else:
+            self.demand_rates_monthly = np.zeros((12, n_tiers))
+        self.demand_month_tier_widths = tier_widths(reopt_args.demand_month_max_in_tiers, n_tiers)
+        self.lookback_months = [m - 1 for m in reopt_args.demand_lookback_months]
+        self.lookback_percent = reopt_args.demand_lookback_percent
+        self.lookback_range = reopt_args.demand_lookback_range
+
+        # the time steps of all ratchets end to end, so that the ratchet peaks are one maximum.reduceat
+        n_tiers = reopt_args.demand_tiers_num
+        self.ratchet_steps, self.ratchet_starts = self.concatenate_steps(reopt_args.demand_ratchets_tou)
+        self.demand_rates_tou = np.asarray(reopt_args.demand_rates_tou, dtype=float).reshape(-1, n_tiers)
+        self.demand_tier_widths = tier_widths(reopt_args.demand_max_in_tiers, n_tiers)
+
+        cp_steps, cp_rates = self.coincident_peak_periods(coincident_peak_load_active_timesteps,
+                                                          coincident_peak_load_charge_us_dollars_per_kw)
+        cp_periods = [([ts for ts in steps if ts is not None], rate) for steps, rate in zip(cp_steps, cp_rates)]
+        cp_periods = [(steps, rate) for steps, rate in cp_periods if len(steps) > 0]
+        self.cp_steps, self.cp_starts = self.concatenate_steps([steps for steps, rate in cp_periods])
+        self.cp_rates = np.array([rate for steps, rate in cp_periods], dtype=float)
+
+        self.fixed_cost = 12 * float(reopt_args.fixed_monthly_charge or 0)
+        self.min_charge = max(float(reopt_args.annual_min_charge or 0), 12 * float(reopt_args.min_monthly_charge or 0))
+
+    @staticmethod
+    def coincident_peak_periods(active_timesteps, charges):
+        """
+        Normalize the coincident peak inputs as the ElectricTariff validation does: one time step or a list of time
+        steps is one period, and one charge is a list of one charge
+        :param active_timesteps: int, list of int, or list of lists of int
+        :param charges: float or list of float
+        :return: (list of lists of int, list of float) of the same length
+        """
+        if charges is None or active_timesteps in (None, []):
+            return [], []
+        if not isinstance(active_timesteps, list):
+            active_timesteps = [active_timesteps]
+        if not all(isinstance(steps, list) for steps in active_timesteps):
+            active_timesteps = [active_timesteps]
+        if not isinstance(charges, list):
+            charges = [charges]
+        if len(active_timesteps) != len(charges):
+            raise ValueError("The number of rates in coincident_peak_load_charge_us_dollars_per_kw must match the number "
+                             "of timestep sets in coincident_peak_load_active_timesteps")
+        return active_timesteps, charges
+
+    @classmethod
+    def from_urdb_response(cls, urdb_response, year, time_steps_per_hour=1, tou_energy_rates_us_dollars_per_kwh=None,
+                           add_tou_energy_rates_to_urdb_rate=False, **kwargs):
+        """
+        Parse a URDB rate and make its BillCalculator
+        :param urdb_response: dict, URDB rate
+        :param year: int, year of the loads, which sets the days of the week
+        :param time_steps_per_hour: int
+        :param tou_energy_rates_us_dollars_per_kwh: list of float, replaces the URDB energy rates unless
+            add_tou_energy_rates_to_urdb_rate
+        :param add_tou_energy_rates_to_urdb_rate: bool
+        :param kwargs: coincident peak inputs, see __init__
+        :return: BillCalculator
+        """
+        elec_tariff = types.SimpleNamespace(
+            urdb_response=urdb_response, load_year=year, time_steps_per_hour=time_steps_per_hour,
+            wholesale_rate=[0.0], wholesale_rate_above_site_load=[0.0],
+            chp_standby_rate_us_dollars_per_kw_per_month=0, chp_does_not_reduce_demand_charges=0,
+            tou_energy_rates=tou_energy_rates_us_dollars_per_kwh,
+            add_tou_energy_rates_to_urdb_rate=bool(add_tou_energy_rates_to_urdb_rate),
+            override_urdb_rate_with_tou_energy_rates=tou_energy_rates_us_dollars_per_kwh is not None
+                                                     and not add_tou_energy_rates_to_urdb_rate)
+        parser = UrdbParse(big_number=big_number, elec_tariff=elec_tariff, techs=[], bau_techs=[])
+        reopt_args = parser.parse_rate(str(urdb_response.get('utility')), str(urdb_response.get('name')))
+        return cls(reopt_args, time_steps_per_hour=time_steps_per_hour, **kwargs)
+
+    @classmethod
+    def from_tariff(cls, tariff, year, time_steps_per_hour=1):
+        """
+        :param tariff: dict of ElectricTariff inputs: the URDB rate (see get_urdb_response), and optionally
+            tou_energy_rates_us_dollars_per_kwh, add_tou_energy_rates_to_urdb_rate,
+            coincident_peak_load_active_timesteps, and coincident_peak_load_charge_us_dollars_per_kw
+        :param year: int
+        :param time_steps_per_hour: int
+        :return: BillCalculator
+        """
+        return cls.from_urdb_response(
+            get_urdb_response(tariff), year, time_steps_per_hour=time_steps_per_hour,
+            tou_energy_rates_us_dollars_per_kwh=tariff.get('tou_energy_rates_us_dollars_per_kwh'),
+            add_tou_energy_rates_to_urdb_rate=tariff.get('add_tou_energy_rates_to_urdb_rate', False),
+            coincident_peak_load_active_timesteps=tariff.get('coincident_peak_load_active_timesteps'),
+            coincident_peak_load_charge_us_dollars_per_kw=tariff.get('coincident_peak_load_charge_us_dollars_per_kw'))
+
+    @staticmethod
+    def concatenate_steps(steps_by_group):
+        """
+        :param steps_by_group: list of non-empty lists of time steps (indexed on 1)
+        :return: (zero-indexed time steps of all groups end to end, index of the first time step of each group)
+        """
+        if len(steps_by_group) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        lengths = [len(steps) for steps in steps_by_group]
+        return np.concatenate(steps_by_group).astype(int) - 1, np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(int)
+
+    def lookback_peaks(self, monthly_peaks):
+        """
+        :param monthly_peaks: numpy array (n_loads, 12)
+        :return: numpy array (n_loads, 12), the peak that the lookback percentage applies to in each month
+        """
+        if self.lookback_range != 0:
+            previous = [np.roll(monthly_peaks, lm, axis=1) for lm in range(1, self.lookback_range + 1)]
+            return np.max(previous, axis=0)
+        if len(self.lookback_months) > 0:
+            return np.repeat(monthly_peaks[:, self.lookback_months].max(axis=1, keepdims=True), 12, axis=1)
+        return np.zeros_like(monthly_peaks)
+
+    def calculate_arrays(self, loads_kw):
+        """
+        :param loads_kw: array-like (n_loads, n_steps) or (n_steps,), grid purchases in each time step. Negative
+            values (exports) are not billed.
+        :return: dict of numpy arrays of length n_loads, keyed by bill_components
+        """
+        loads = np.clip(np.atleast_2d(np.asarray(loads_kw, dtype=float)), 0.0, None)
+        if loads.shape[1] != self.n_steps:
+            raise ValueError("Loads must have {} values (8760 * time_steps_per_hour), not {}."
+                             .format(self.n_steps, loads.shape[1]))
+        n_loads = loads.shape[0]
+        step_hours = 1.0 / self.time_steps_per_hour
+
+        monthly_kwh = np.add.reduceat(loads, self.month_starts, axis=1) * step_hours
+        in_tier = allocate_to_tiers(monthly_kwh, self.energy_tier_widths)  # (n_loads, 12, n_tiers)
+        fraction_in_tier = np.divide(in_tier, monthly_kwh[..., np.newaxis], out=np.zeros_like(in_tier),
+                                     where=monthly_kwh[..., np.newaxis] > 0)
+        tier_cost_by_month = np.add.reduceat(loads[:, np.newaxis, :] * self.energy_rates, self.month_starts,
+                                             axis=2) * step_hours  # (n_loads, n_tiers, 12), as if all in the tier
+        energy_cost = np.einsum('lmu,lum->l', fraction_in_tier, tier_cost_by_month)
+
+        monthly_peaks = np.maximum.reduceat(loads, self.month_starts, axis=1)
+        if self.lookback_percent > 0:
+            monthly_peaks = np.maximum(monthly_peaks, self.lookback_percent * self.lookback_peaks(monthly_peaks))
+        demand_cost = np.einsum('lmn,mn->l', allocate_to_tiers(monthly_peaks, self.demand_month_tier_widths),
+                                self.demand_rates_monthly)
+
+        if len(self.ratchet_starts) > 0:
+            ratchet_peaks = np.maximum.reduceat(loads[:, self.ratchet_steps], self.ratchet_starts, axis=1)
+            demand_cost += np.einsum('lre,re->l', allocate_to_tiers(ratchet_peaks, self.demand_tier_widths),
+                                     self.demand_rates_tou)
+
+        cp_cost = np.zeros(n_loads)
+        if len(self.cp_starts) > 0:
+            cp_cost = np.maximum.reduceat(loads[:, self.cp_steps], self.cp_starts, axis=1) @ self.cp_rates
+
+        fixed_cost = np.full(n_loads, self.fixed_cost)
+        min_charge_adder = np.clip(self.min_charge - (energy_cost + demand_cost + cp_cost + fixed_cost), 0.0, None)
+        return dict(zip(bill_components, [
+            energy_cost, demand_cost, cp_cost, fixed_cost, min_charge_adder,
+            energy_cost + demand_cost + cp_cost + fixed_cost + min_charge_adder
+        ]))
+
+    def calculate(self, loads_kw):
+        """
+        :param loads_kw: array-like (n_loads, n_steps) or (n_steps,)
+        :return: list of dicts of year one costs rounded to cents, one per load
+        """
+        arrays = self.calculate_arrays(loads_kw)
+        return [{k: round(float(arrays[k][i]), 2) for k in bill_components}
+                for i in range(len(arrays['year_one_bill_us_dollars']))]
@@ -0,0 +1,130 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Climate zone and nearest built-in profile city lookup.
+
+The climate zone shapefile (reo/src/data/climate_cities.shp) is read once per process into an STRtree of prepared
+polygons. The geometric fallback (nearest city by lat/lng distance) uses a KD-tree for each set of cities searched.
+"""
+import os
+from functools import lru_cache
+import geopandas as gpd
+import numpy as np
+from scipy.spatial import cKDTree
+from shapely.geometry import Point
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+CLIMATE_CITIES_PATH = os.path.join('reo', 'src', 'data', 'climate_cities.shp')
+
+_index = None
+
+
+class ClimateZoneIndex(object):
+
+    def __init__(self, path=CLIMATE_CITIES_PATH):
+        """
+        :param path: str, path to a shapefile of climate zone polygons with a "city" column
+        """
+        gdf = gpd.read_file(path)
+        self.cities = [city.replace(' ', '') for city in gdf.city.values]
+        self.geometries = list(gdf.geometry.values)
+        self.prepared = [prep(geom) for geom in self.geometries]
+        self.tree = STRtree(self.geometries)
+        # Shapely < 2 STRtree.query returns the geometries instead of their indices
+        self.index_by_id = {id(geom): i for i, geom in enumerate(self.geometries)}
+        self.city_trees = dict()
+
+    def shapefile_city(self, latitude, longitude):
+        """
+        :return: str, the city of the first polygon in the shapefile that intersects the point, or None
+        """
+        point = Point(longitude, latitude)
+        candidates = sorted(self.index_by_id[id(hit)] if not isinstance(hit, (int, np.integer)) else int(hit)
+                            for hit in self.tree.query(point))
+        for i in candidates:
+            if self.prepared[i].intersects(point):
+                return self.cities[i]
+        return None
+
+    def geometric_nearest_city(self, latitude, longitude, cities):
+        """
+        :param cities: tuple of BuiltInProfile.Default_city
+        :return: str, name of the city nearest to latitude, longitude in degrees
+        """
+        if cities not in self.city_trees:
+            self.city_trees[cities] = cKDTree(np.array([[c.lat, c.lng] for c in cities]))
+        _, i = self.city_trees[cities].query([latitude, longitude])
+        return cities[i].name
+
+
+def get_index():
+    """
+    :return: ClimateZoneIndex, loaded once per process
+    """
+    global _index
+    if _index is None:
+        _index = ClimateZoneIndex()
+    return _index
+
+
+@lru_cache(maxsize=1024)
+def _lookup(latitude, longitude, default_cities):
+    index = get_index()
+    geometric_flag = False
+    nearest_city = index.shapefile_city(latitude, longitude)
+    if nearest_city is None:
+        cities_to_search = default_cities
+    else:
+        climate_zone = [c for c in default_cities if c.name == nearest_city][0].zoneid
+        cities_to_search = tuple(c for c in default_cities if c.zoneid == climate_zone)
+    if len(cities_to_search) > 1:
+        # else use old geometric approach, never fails...but isn't necessarily correct
+        geometric_flag = True
+        nearest_city = index.geometric_nearest_city(latitude, longitude, cities_to_search)
+
+    climate_zone = [c for c in default_cities if c.name == nearest_city][0].zoneid
+
+    return climate_zone, nearest_city, geometric_flag
+
+
+def lookup(latitude, longitude, default_cities=None):
+    """
+    Climate zone and nearest built-in profile city for a site
+    :param latitude: float
+    :param longitude: float
+    :param default_cities: list of BuiltInProfile.Default_city, defaults to BuiltInProfile.default_cities
+    :return: (climate zone id, city name, geometric_flag) where geometric_flag is True if the city was chosen by
+        distance among more than one candidate city
+    """
+    if default_cities is None:
+        from reo.src.load_profile import BuiltInProfile
+        default_cities = BuiltInProfile.default_cities
+    return _lookup(float(latitude), float(longitude), tuple(default_cities))
@@ -31,6 +31,7 @@
 import copy
 from reo.src.urdb_parse import UrdbParse
 from reo.src.fuel_params import FuelParams
+from reo.src.result_cache import bau_fingerprint
 from reo.utilities import annuity, annuity_two_escalation_rates, degradation_factor, slope, intercept, insert_p_after_u_bp, insert_p_bp, \
     insert_u_after_p_bp, insert_u_bp, setup_capital_cost_incentive, setup_capital_cost_offgrid, annuity_escalation, MMBTU_TO_KWH, GAL_DIESEL_TO_KWH, TONHOUR_TO_KWHT
 import numpy as np
@@ -78,6 +79,7 @@ class DataManager:
         self.cooling_load = None
         self.reopt_inputs = None
         self.reopt_inputs_bau = None
+        self.bau_fingerprint = None  # used to reuse BAU results across scenarios, see reo/src/result_cache.py
         self.add_soc_incentive = None
         self.newboiler = None
         self.steamturbine = None
@@ -2085,3 +2087,4 @@ class DataManager:
             'Include_health_in_objective': self.include_health_in_objective,
             'Lbs_per_tonne': 2204.62
         }
+        self.bau_fingerprint = bau_fingerprint(self.reopt_inputs_bau)
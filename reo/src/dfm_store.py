@@ -0,0 +1,216 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Claim-check transport for the DataManager payload passed between the celery tasks of a v1/v2 job.
+
+setup_scenario writes the serialized DataManager (vars(dfm)) to DFM_STORE_PATH/<run_uuid>/ in three parts:
+"reopt_inputs", "reopt_inputs_bau", and "dfm" (everything else), and only passes a small handle through the celery
+chain. Each run_jump_model task loads the inputs that it needs and writes its results as another part, and
+process_results loads the parts listed in the handles that it receives and then removes the run's directory. The
+error handlers of run_jump_model and process_results also remove the run's directory, and dump removes the directories
+of runs that were revoked or lost (not modified for DFM_STORE_MAX_AGE_SECONDS).
+
+Each part is a compressed NumPy .npz file: numeric lists (eg. 8760 to 35040 long time series) are saved as arrays and
+the remaining structure is saved as JSON with placeholders for the arrays. Only lists in which every value is a
+float, or every value is an int, are saved as arrays so that the loaded values are identical to the saved values.
+
+The store is off unless DFM_STORE_PATH is set to a directory shared by all celery workers.
+
+Settings: DFM_STORE_ENABLED, DFM_STORE_PATH, and DFM_STORE_MAX_AGE_SECONDS (see reopt_api/performance_settings.py)
+"""
+import json
+import logging
+import os
+import shutil
+import time
+import numpy as np
+from django.conf import settings
+from reo.src import file_cache
+log = logging.getLogger(__name__)
+
+DFM_STORE_ENABLED = settings.DFM_STORE_ENABLED
+DFM_STORE_PATH = settings.DFM_STORE_PATH
+DFM_STORE_MAX_AGE_SECONDS = settings.DFM_STORE_MAX_AGE_SECONDS
+DFM_STORE_SWEEP_SECONDS = 3600  # how often each process looks for expired runs
+DFM_STORE_MIN_ARRAY_LENGTH = 24  # shorter lists are left in the JSON
+
+HANDLE_KEY = 'dfm_store'
+ARRAY_KEY = '__dfm_store_array__'
+SKELETON_KEY = '__skeleton__'
+input_parts = ['reopt_inputs', 'reopt_inputs_bau']
+_last_sweep = 0.0
+
+
+def is_handle(obj):
+    return isinstance(obj, dict) and HANDLE_KEY in obj
+
+
+def _part_path(run_uuid, part):
+    return os.path.join(DFM_STORE_PATH, str(run_uuid), part + '.npz')
+
+
+def _is_array_like(value):
+    if not isinstance(value, list) or len(value) < DFM_STORE_MIN_ARRAY_LENGTH:
+        return False
+    if all(type(v) is float for v in value):
+        return True
+    return all(type(v) is int for v in value)
+
+
+def _pack(obj, arrays):
+    """
+    Replace numeric lists in obj with placeholders
+    :param obj: JSON serializable object
+    :param arrays: dict, filled with the numpy arrays to save, keyed by placeholder
+    :return: JSON serializable object with placeholders
+    """
+    if isinstance(obj, dict):
+        return {k: _pack(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, list):
+        if _is_array_like(obj):
+            key = 'a{}'.format(len(arrays))
+            arrays[key] = np.array(obj)
+            return {ARRAY_KEY: key}
+        return [_pack(v, arrays) for v in obj]
+    return obj
+
+
+def _unpack(obj, arrays):
+    if isinstance(obj, dict):
+        if ARRAY_KEY in obj:
+            return arrays[obj[ARRAY_KEY]].tolist()
+        return {k: _unpack(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_unpack(v, arrays) for v in obj]
+    return obj
+
+
+def save_part(run_uuid, part, obj):
+    """
+    :param run_uuid: str
+    :param part: str, name of the part, eg. "reopt_inputs"
+    :param obj: JSON serializable object
+    :return: None
+    """
+    arrays = dict()
+    skeleton = _pack(obj, arrays)
+    arrays[SKELETON_KEY] = np.array(json.dumps(skeleton))
+    file_cache.write_atomic(_part_path(run_uuid, part), lambda f: np.savez_compressed(f, **arrays))
+
+
+def load_part(run_uuid, part):
+    """
+    :param run_uuid: str
+    :param part: str, name of the part, eg. "reopt_inputs"
+    :return: the object saved with save_part
+    """
+    with np.load(_part_path(run_uuid, part), allow_pickle=False) as npz:
+        arrays = {k: npz[k] for k in npz.files}
+    return _unpack(json.loads(str(arrays.pop(SKELETON_KEY))), arrays)
+
+
+def remove_part(run_uuid, part):
+    try:
+        os.remove(_part_path(run_uuid, part))
+    except FileNotFoundError:
+        pass
+
+
+def remove(run_uuid):
+    """
+    Remove all parts of run_uuid
+    """
+    if not DFM_STORE_PATH:  # the store is not used
+        return
+    shutil.rmtree(os.path.join(DFM_STORE_PATH, str(run_uuid)), ignore_errors=True)
+
+
+def remove_expired(max_age_seconds=None):
+    """
+    Remove the parts of runs that were not modified for max_age_seconds, which are left behind by revoked tasks and
+    lost workers
+    :param max_age_seconds: float, defaults to DFM_STORE_MAX_AGE_SECONDS
+    :return: int, number of runs removed
+    """
+    cutoff = time.time() - (max_age_seconds if max_age_seconds is not None else DFM_STORE_MAX_AGE_SECONDS)
+    if not DFM_STORE_PATH:
+        return 0
+    try:
+        entries = list(os.scandir(DFM_STORE_PATH))
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for entry in entries:
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except OSError:  # removed by another process
+            pass
+    if removed:
+        log.info("Removed the DataManager parts of {} expired runs".format(removed))
+    return removed
+
+
+def dump(dfm_dict, run_uuid):
+    """
+    Save the serialized DataManager and return the handle that is passed through the celery chain. Top level values
+    that are not lists or dicts (eg. bau_fingerprint) are kept in the handle.
+    :param dfm_dict: dict, vars(DataManager) after finalize
+    :param run_uuid: str
+    :return: dict, handle
+    """
+    global _last_sweep
+    if time.time() - _last_sweep > DFM_STORE_SWEEP_SECONDS:
+        _last_sweep = time.time()
+        remove_expired()
+    handle = {k: v for k, v in dfm_dict.items() if not isinstance(v, (list, dict))}
+    for part in input_parts:
+        save_part(run_uuid, part, dfm_dict.get(part))
+    save_part(run_uuid, 'dfm', {k: v for k, v in dfm_dict.items() if k not in input_parts and k not in handle})
+    handle[HANDLE_KEY] = {'run_uuid': str(run_uuid), 'parts': ['dfm'] + input_parts}
+    return handle
+
+
+def load(handle, parts=None):
+    """
+    Rebuild the (partial) serialized DataManager from a handle
+    :param handle: dict, from dump (or updated by run_jump_model)
+    :param parts: list of part names to load, defaults to all parts in the handle
+    :return: dict
+    """
+    store = handle[HANDLE_KEY]
+    dfm = {k: v for k, v in handle.items() if k != HANDLE_KEY}
+    for part in parts if parts is not None else store['parts']:
+        if part == 'dfm':
+            dfm.update(load_part(store['run_uuid'], part))
+        else:
+            dfm[part] = load_part(store['run_uuid'], part)
+    return dfm
@@ -1,16 +1,168 @@
 import os
 import json
 import logging
+from functools import lru_cache
 log = logging.getLogger(__name__)
 import geopandas as gpd
 import pandas as pd
 import numpy as np
-from functools import partial
 import pyproj
+from django.conf import settings
+from reo.src import file_cache
 from reo.src.pyeasiur import *
 
 from shapely import geometry as g
-from shapely.ops import transform
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+AVERT_EMISSIONS_CACHE_PATH = settings.AVERT_EMISSIONS_CACHE_PATH
+
+
+class AvertStore:
+    """
+    AVERT emissions regions and hourly emissions factors, loaded once per process (use AvertStore.get()).
+
+    Both region shapefiles are held in STRtrees (the EPSG:4326 polygons prepared for point-in-polygon tests), and the
+    hourly emissions factors of all pollutants are cached as one float64 array of shape (pollutants, regions, 8760)
+    in AVERT_EMISSIONS_CACHE_PATH (.npy, with a .json index), which is memory-mapped and rebuilt from the
+    AVERT_hourly_emissions_{pollutant}.csv files when any of them is newer. Region lookups are kept in a bounded LRU
+    cache.
+    """
+    library_path = os.path.join('reo', 'src', 'data')
+    pollutants = ['CO2', 'NOx', 'SO2', 'PM25']
+    max_meters_to_region = 8046  # 5 miles
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        gdf = gpd.read_file(os.path.join(self.library_path, 'avert_4326.shp'))
+        self.regions_4326 = list(gdf.AVERT.values)
+        self.geometries_4326 = list(gdf.geometry.values)
+        self.prepared_4326 = [prep(geom) for geom in self.geometries_4326]
+        self.tree_4326 = STRtree(self.geometries_4326)
+
+        gdf = gpd.read_file(os.path.join(self.library_path, 'avert_102008.shp'))
+        self.regions_102008 = list(gdf.AVERT.values)
+        self.geometries_102008 = list(gdf.geometry.values)
+        self.tree_102008 = STRtree(self.geometries_102008)
+
+        # Shapely < 2 STRtree.query returns the geometries instead of their indices
+        self.index_by_id = {id(geom): i for geoms in [self.geometries_4326, self.geometries_102008]
+                            for i, geom in enumerate(geoms)}
+        proj102008 = pyproj.Proj("+proj=aea +lat_1=20 +lat_2=60 +lat_0=40 +lon_0=-96 +x_0=0 +y_0=0 +datum=NAD83 +units=m +no_defs")
+        self.transformer_4326_to_102008 = pyproj.Transformer.from_proj(pyproj.Proj("epsg:4326"), proj102008)
+        self._emissions = None
+
+    def query(self, tree, geom):
+        """
+        :return: sorted indices of the geometries in tree whose envelopes intersect geom
+        """
+        return sorted(int(hit) if isinstance(hit, (int, np.integer)) else self.index_by_id[id(hit)]
+                      for hit in tree.query(geom))
+
+    @lru_cache(maxsize=4096)
+    def region(self, latitude, longitude):
+        """
+        :param latitude: float
+        :param longitude: float
+        :return: (AVERT region abbreviation, meters to the region) where the region is the first one containing the
+            site, or else the nearest one (which may be more than max_meters_to_region away)
+        """
+        point = g.Point(longitude, latitude)
+        for i in self.query(self.tree_4326, point):
+            if self.prepared_4326[i].intersects(point):
+                return self.regions_4326[i], 0
+
+        x, y = self.transformer_4326_to_102008.transform(latitude, longitude)  # epsg:4326 is (lat, long)
+        if not (np.isfinite(x) and np.isfinite(y)):
+            raise AttributeError("Could not look up AVERT emissions region from point ({},{}). Location is\
+                likely invalid or well outside continental US, AK and HI".format(longitude, latitude))
+        lookup = g.Point(x, y)
+        candidates = self.query(self.tree_102008, lookup.buffer(self.max_meters_to_region + 1)) or \
+            range(len(self.geometries_102008))
+        distances_meter = [self.geometries_102008[i].distance(lookup) for i in candidates]
+        nearest = int(np.argmin(distances_meter))
+        return self.regions_102008[candidates[nearest]], int(round(distances_meter[nearest]))
+
+    def csv_path(self, pollutant):
+        return os.path.join(self.library_path, 'AVERT_hourly_emissions_{}.csv'.format(pollutant))
+
+    def build_emissions(self):
+        """
+        Parse the hourly emissions CSVs into one array of shape (pollutants, regions, 8760), rounded to 6 decimals
+        :return: (numpy array, dict of {"pollutants": [names], "regions": [names]})
+        """
+        dfs = {pollutant: pd.read_csv(self.csv_path(pollutant), dtype='float64', float_precision='high')
+               for pollutant in self.pollutants}
+        regions = [col for col in dfs[self.pollutants[0]].columns if col not in ['Month', 'Timestamp']]
+        for df in dfs.values():
+            regions += [col for col in df.columns if col not in regions + ['Month', 'Timestamp']]
+        n_hours = max(len(df) for df in dfs.values())
+        array = np.full((len(self.pollutants), len(regions), n_hours), np.nan)
+        for i, pollutant in enumerate(self.pollutants):
+            for j, region in enumerate(regions):
+                if region in dfs[pollutant].columns:
+                    array[i, j, :len(dfs[pollutant])] = dfs[pollutant][region].round(6).values
+        return array, {"pollutants": self.pollutants, "regions": regions}
+
+    def save_emissions(self, index_path):
+        """
+        Build the emissions table and save the array to AVERT_EMISSIONS_CACHE_PATH, then its index to index_path
+        """
+        array, index = self.build_emissions()
+        file_cache.write_atomic(AVERT_EMISSIONS_CACHE_PATH, lambda f: np.save(f, array))
+        file_cache.write_atomic(index_path, lambda f: json.dump(dict(index, shape=array.shape), f), mode='w')
+
+    def emissions_table(self):
+        """
+        Memory-map the emissions cache, (re)building it when missing or older than any of the CSVs. The array is
+        replaced before the index, which records the shape of its array so that an index that does not match the array
+        yet is detected. If the cache cannot be saved or read the table is kept in memory for this process.
+        :return: (numpy array, {pollutant: i}, {region: j})
+        """
+        if self._emissions is None:
+            index_path = os.path.splitext(AVERT_EMISSIONS_CACHE_PATH)[0] + '.json'
+            try:
+                csv_mtime = max(os.path.getmtime(self.csv_path(pollutant)) for pollutant in self.pollutants)
+                if not (os.path.isfile(AVERT_EMISSIONS_CACHE_PATH) and os.path.isfile(index_path)) or \
+                        os.path.getmtime(AVERT_EMISSIONS_CACHE_PATH) < csv_mtime:
+                    self.save_emissions(index_path)
+                with open(index_path, 'r') as f:
+                    index = json.load(f)
+                if "shape" not in index:  # saved by an earlier version
+                    self.save_emissions(index_path)
+                    with open(index_path, 'r') as f:
+                        index = json.load(f)
+                array = np.load(AVERT_EMISSIONS_CACHE_PATH, mmap_mode='r')
+                if tuple(index.pop("shape")) != array.shape:
+                    raise ValueError("the index does not match the array")
+            except (OSError, ValueError) as e:
+                log.warning("Could not load the AVERT emissions cache from {} ({}); keeping it in memory.".format(
+                    AVERT_EMISSIONS_CACHE_PATH, e))
+                array, index = self.build_emissions()
+                array.flags.writeable = False
+            self._emissions = (array, {name: i for i, name in enumerate(index["pollutants"])},
+                               {name: j for j, name in enumerate(index["regions"])})
+        return self._emissions
+
+    def emissions(self, pollutant, region_abbr):
+        """
+        :return: read-only numpy array (view) of the hourly emissions factors, or None if there are none for the
+            pollutant and region
+        """
+        array, pollutant_index, region_index = self.emissions_table()
+        if pollutant not in pollutant_index or region_abbr not in region_index:
+            return None
+        series = np.asarray(array[pollutant_index[pollutant], region_index[region_abbr]])
+        if np.isnan(series).all():
+            return None
+        return series
+
 
 class EmissionsCalculator:
 
@@ -30,8 +182,6 @@ class EmissionsCalculator:
         self._transmission_and_distribution_losses = None
         self.meters_to_region = None
         self.time_steps_per_hour = kwargs.get('time_steps_per_hour') or 1
-        proj102008 = pyproj.Proj("+proj=aea +lat_1=20 +lat_2=60 +lat_0=40 +lon_0=-96 +x_0=0 +y_0=0 +datum=NAD83 +units=m +no_defs")
-        self.project4326_to_102008 = partial(pyproj.transform,pyproj.Proj("epsg:4326"),proj102008) 
     
     @property
     def region(self):
@@ -56,37 +206,18 @@ class EmissionsCalculator:
     @property
     def region_abbr(self):
         if self._region_abbr is None:
-            gdf = gpd.read_file(os.path.join(self.library_path,'avert_4326.shp'))
-
-            gdf_query = gdf[gdf.geometry.intersects(g.Point(self.longitude, self.latitude))]
-            if not gdf_query.empty:
-                self.meters_to_region = 0
-                self._region_abbr = gdf_query.AVERT.values[0]
-                
-            if self._region_abbr is None:
-                gdf = gpd.read_file(os.path.join(self.library_path,'avert_102008.shp'))
-                try:
-                    lookup = transform(self.project4326_to_102008, g.Point(self.latitude, self.longitude)) # switched lat and long here
-                except:
-                    raise AttributeError("Could not look up AVERT emissions region from point ({},{}). Location is\
-                        likely invalid or well outside continental US, AK and HI".format(self.longitude, self.latitude))
-                distances_meter = gdf.geometry.apply(lambda x : x.distance(lookup)).values
-                min_idx = list(distances_meter).index(min(distances_meter))
-                self._region_abbr = gdf.loc[min_idx,'AVERT']
-                self.meters_to_region = int(round(min(distances_meter)))
-                if self.meters_to_region > 8046:
-                    raise AttributeError('Your site location ({},{}) is more than 5 miles from the '
-                        'nearest emission region. Cannot calculate emissions.'.format(self.longitude, self.latitude))
+            self._region_abbr, self.meters_to_region = AvertStore.get().region(self.latitude, self.longitude)
+            if self.meters_to_region > AvertStore.max_meters_to_region:
+                raise AttributeError('Your site location ({},{}) is more than 5 miles from the '
+                    'nearest emission region. Cannot calculate emissions.'.format(self.longitude, self.latitude))
         return self._region_abbr
     
     @property
     def emissions_series(self):
         if self._emmissions_profile is None:
-            df = pd.read_csv(os.path.join(self.library_path,'AVERT_hourly_emissions_{}.csv'.format(self.pollutant)), dtype='float64', float_precision='high')
-            if self.region_abbr in df.columns:
-                self._emmissions_profile = list(df[self.region_abbr].round(6).values)
-                if self.time_steps_per_hour > 1:
-                    self._emmissions_profile = list(np.concatenate([[i] * self.time_steps_per_hour for i in self._emmissions_profile]))
+            series = AvertStore.get().emissions(self.pollutant, self.region_abbr)
+            if series is not None:
+                self._emmissions_profile = np.repeat(series, self.time_steps_per_hour).tolist()
             else:
                 raise AttributeError("Emissions error. Cannnot find hourly emmissions for region {} ({},{}) \
                     ".format(self.region, self.latitude,self.longitude)) 
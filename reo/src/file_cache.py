@@ -0,0 +1,93 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Reading and writing the files of the on-disk caches and stores (PVWatts responses, wind resource data, parsed tariffs,
+DataManager payloads, packed load profiles and emissions factors, ...), which are shared by all gunicorn and celery
+workers.
+
+Files are written under a temporary name in the same directory and then renamed, so that other processes never read a
+partially written file, and a file that cannot be read is treated as missing (a cache miss).
+"""
+import logging
+import os
+import threading
+log = logging.getLogger(__name__)
+
+
+def write_atomic(path, write, mode='wb'):
+    """
+    Write path through a temporary file that is renamed to path when it is complete
+    :param path: str
+    :param write: function of the open file, eg. lambda f: np.save(f, array)
+    :param mode: str, "wb" or "w"
+    :return: None
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+    try:
+        with open(tmp_path, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save(path, write, description, mode='wb'):
+    """
+    write_atomic that logs a warning instead of raising when the file cannot be written
+    :param description: str, eg. "PVWatts response abc123", for the log
+    :return: bool, True if the file was saved
+    """
+    try:
+        write_atomic(path, write, mode=mode)
+        return True
+    except OSError as e:
+        log.warning("Could not save {}: {}".format(description, e))
+        return False
+
+
+def load(path, read, description):
+    """
+    :param path: str
+    :param read: function of path that returns the contents, eg. lambda p: np.load(p)
+    :param description: str, for the log
+    :return: read(path), or None if the file does not exist or cannot be read
+    """
+    try:
+        return read(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:  # a corrupt or incompatible file is a miss
+        log.warning("Could not read {}: {}".format(description, e))
+        return None
@@ -0,0 +1,256 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Routes optimization jobs to a "fast" or a "slow" celery queue based on the predicted solve time, so that short jobs
+do not wait behind long MILPs (eg. CHP, GHP, or tiered tariffs with many time steps).
+
+The predicted solve time is estimated from the features of the validated inputs (enabled techs, time_steps_per_hour,
+tariff complexity, outages, off-grid) with the regression trained by `python manage.py train_solve_time_model` (see
+reo/src/solve_time.py), or with the JOB_ROUTING_WEIGHTS until a regression is trained, and for v1/v2 jobs is raised
+to the median of the
+recent REopt solve times (ProfileModel.reopt_seconds + reopt_bau_seconds) of runs with the same URDB rate. Rates in
+reo/hard_problems.csv are always sent to the slow queue.
+
+Settings: SLOW_QUEUE_NAME (routing is off and all jobs use the default queue if it is not set), FAST_QUEUE_NAME,
+JOB_ROUTING_SLOW_SECONDS, JOB_ROUTING_HISTORY_RUNS, and JOB_ROUTING_WEIGHTS (see reopt_api/performance_settings.py)
+"""
+import csv
+import json
+import logging
+import os
+import statistics
+from django.conf import settings
+from reo.models import ProfileModel, ElectricTariffModel
+from reo.src.solve_time import estimate_solve_seconds, post_features, POST
+log = logging.getLogger(__name__)
+
+SLOW_QUEUE_NAME = settings.SLOW_QUEUE_NAME
+FAST_QUEUE_NAME = settings.FAST_QUEUE_NAME
+JOB_ROUTING_SLOW_SECONDS = settings.JOB_ROUTING_SLOW_SECONDS
+JOB_ROUTING_HISTORY_RUNS = settings.JOB_ROUTING_HISTORY_RUNS
+JOB_ROUTING_MIN_HISTORY_RUNS = 3
+
+hard_problems_csv = os.path.join('reo', 'hard_problems.csv')
+hard_problem_labels = set(i[0] for i in csv.reader(open(hard_problems_csv, 'r')))
+
+# seconds added to the predicted solve time of an hourly scenario (time_steps_per_hour = 1)
+default_weights = {
+    "base": 5.0,
+    "techs": {
+        "pv": 2.0,
+        "wind": 3.0,
+        "storage": 15.0,
+        "generator": 10.0,
+        "chp": 60.0,
+        "boiler": 10.0,
+        "absorption_chiller": 30.0,
+        "hot_tes": 20.0,
+        "cold_tes": 20.0,
+        "ghp": 60.0,
+        "steam_turbine": 40.0,
+    },
+    "tariff_period": 0.5,  # per energy and demand rate period and tier
+    "outage": 30.0,
+    "off_grid": 20.0,
+}
+
+
+def routing_weights():
+    weights = json.loads(json.dumps(default_weights))
+    for k, v in settings.JOB_ROUTING_WEIGHTS.items():
+        if isinstance(v, dict):
+            weights[k].update(v)
+        else:
+            weights[k] = v
+    return weights
+
+
+def urdb_periods(urdb_response):
+    """
+    :param urdb_response: dict, URDB rate
+    :return: int, number of energy and demand rate periods and tiers
+    """
+    if not urdb_response:
+        return 0
+    n = 0
+    for key in ['energyratestructure', 'demandratestructure', 'flatdemandstructure']:
+        for period in urdb_response.get(key) or []:
+            n += len(period) if isinstance(period, list) else 1
+    return n
+
+
+def scenario_features(input_dict):
+    """
+    Features of a v1/v2 scenario that are used to predict the solve time
+    :param input_dict: dict, ValidateNestedInput.input_dict
+    :return: dict
+    """
+    scenario = input_dict['Scenario']
+    site = scenario['Site']
+    pvs = site['PV'] if isinstance(site['PV'], list) else [site['PV']]
+    techs = ['pv'] * sum(1 for pv in pvs if pv.get('max_kw', 0) > 0 or pv.get('existing_kw', 0) > 0)
+    if site['Wind'].get('max_kw', 0) > 0:
+        techs.append('wind')
+    if site['Storage'].get('max_kw', 0) > 0 and site['Storage'].get('max_kwh', 0) > 0:
+        techs.append('storage')
+    outage = site['LoadProfile'].get('outage_start_time_step') is not None
+    generator = site['Generator']
+    if (generator.get('max_kw', 0) > 0 or generator.get('existing_kw', 0) > 0) and \
+            (outage or not generator.get('generator_only_runs_during_grid_outage', True)):
+        techs.append('generator')
+    if site['CHP'].get('prime_mover') is not None or (site['CHP'].get('max_kw') or 0) > 0:
+        techs.append('chp')
+    if (site['NewBoiler'].get('max_mmbtu_per_hr') or 0) > 0:
+        techs.append('boiler')
+    if (site['AbsorptionChiller'].get('max_ton') or 0) > 0:
+        techs.append('absorption_chiller')
+    if (site['HotTES'].get('max_gal') or 0) > 0:
+        techs.append('hot_tes')
+    if (site['ColdTES'].get('max_gal') or 0) > 0:
+        techs.append('cold_tes')
+    if site['GHP'].get('building_sqft'):
+        techs.append('ghp')
+    if (site['SteamTurbine'].get('max_kw') or 0) > 0:
+        techs.append('steam_turbine')
+    tariff = site['ElectricTariff']
+    return {
+        "time_steps_per_hour": scenario.get('time_steps_per_hour') or 1,
+        "techs": techs,
+        "urdb_label": tariff.get('urdb_label') or '',
+        "tariff_periods": urdb_periods(tariff.get('urdb_response')) or
+                          (24 if tariff.get('tou_energy_rates_us_dollars_per_kwh') else 0),
+        "outage": outage,
+        "off_grid": bool(scenario.get('off_grid_flag')),
+    }
+
+
+def job_features(validated_input_dict):
+    """
+    Features of a v3 job that are used to predict the solve time
+    :param validated_input_dict: dict, job InputValidator.validated_input_dict
+    :return: dict
+    """
+    d = validated_input_dict
+    v3_techs = {"Wind": "wind", "ElectricStorage": "storage", "Generator": "generator", "CHP": "chp",
+                "HotThermalStorage": "hot_tes", "ColdThermalStorage": "cold_tes"}
+    pvs = d.get("PV", [])
+    techs = ['pv'] * (len(pvs) if isinstance(pvs, list) else 1)
+    techs += [name for key, name in v3_techs.items() if key in d and d[key].get("max_kw", 1) != 0]
+    tariff = d.get("ElectricTariff", {})
+    utility = d.get("ElectricUtility", {})
+    return {
+        "time_steps_per_hour": d.get("Settings", {}).get("time_steps_per_hour") or 1,
+        "techs": techs,
+        "urdb_label": tariff.get("urdb_label") or '',
+        "tariff_periods": urdb_periods(tariff.get("urdb_response")) or
+                          (24 if tariff.get("tou_energy_rates_per_kwh") else 0),
+        "outage": bool(utility.get("outage_start_time_step") or utility.get("outage_start_time_steps")),
+        "off_grid": bool(d.get("Settings", {}).get("off_grid_flag")),
+    }
+
+
+def heuristic_solve_seconds(features):
+    """
+    Predicted seconds to solve the BAU and optimal cases of a scenario using the JOB_ROUTING_WEIGHTS
+    :param features: dict, from scenario_features or job_features
+    :return: float
+    """
+    weights = routing_weights()
+    seconds = weights["base"]
+    seconds += sum(weights["techs"].get(tech, 0) for tech in features["techs"])
+    seconds += weights["tariff_period"] * features["tariff_periods"]
+    seconds += weights["outage"] * features["outage"]
+    seconds += weights["off_grid"] * features["off_grid"]
+    return seconds * features["time_steps_per_hour"]
+
+
+def historical_solve_seconds(urdb_label):
+    """
+    Median REopt solve time (BAU and optimal) of the recent v1/v2 runs with urdb_label
+    :param urdb_label: str
+    :return: float or None if there are fewer than JOB_ROUTING_MIN_HISTORY_RUNS runs
+    """
+    if not urdb_label:
+        return None
+    run_uuids = ElectricTariffModel.objects.filter(urdb_label=urdb_label).order_by('-id').values_list(
+        'run_uuid', flat=True)[:JOB_ROUTING_HISTORY_RUNS]
+    timings = [(p or 0) + (b or 0) for p, b in ProfileModel.objects.filter(
+        run_uuid__in=list(run_uuids), reopt_seconds__isnull=False).values_list('reopt_seconds', 'reopt_bau_seconds')]
+    if len(timings) < JOB_ROUTING_MIN_HISTORY_RUNS:
+        return None
+    return statistics.median(timings)
+
+
+def choose_queue(features, use_history=True):
+    """
+    :param features: dict, from scenario_features or job_features
+    :param use_history: bool, use the ProfileModel timings of runs with the same URDB rate (only for v1/v2)
+    :return: (str, float) celery queue name, predicted solve seconds
+    """
+    predicted_seconds = estimate_solve_seconds(post_features(features), POST)
+    if predicted_seconds is None:
+        predicted_seconds = heuristic_solve_seconds(features)
+    if use_history:
+        try:
+            history = historical_solve_seconds(features["urdb_label"])
+            if history is not None:
+                predicted_seconds = max(predicted_seconds, history)
+        except Exception as e:
+            log.warning("Could not get historical solve times: {}".format(e))
+    slow = features["urdb_label"] in hard_problem_labels or predicted_seconds > JOB_ROUTING_SLOW_SECONDS
+    queue = SLOW_QUEUE_NAME if slow and SLOW_QUEUE_NAME else FAST_QUEUE_NAME
+    log.info("Predicted solve time {:.0f} seconds, sending job to queue {}".format(predicted_seconds, queue))
+    return queue, predicted_seconds
+
+
+def route_job(features_function, inputs, use_history=True):
+    """
+    choose_queue for a job that is already saved: if the features or the solve time can not be computed the job is
+    sent to FAST_QUEUE_NAME rather than failing the request.
+    :param features_function: scenario_features or job_features
+    :param inputs: dict, argument of features_function
+    :param use_history: bool, passed to choose_queue
+    :return: (str, float or None, dict or None) celery queue name, predicted solve seconds, features
+    """
+    try:
+        features = features_function(inputs)
+        queue, predicted_seconds = choose_queue(features, use_history=use_history)
+    except Exception as e:
+        log.warning("Could not route the job, sending it to queue {}: {}".format(FAST_QUEUE_NAME, e))
+        return FAST_QUEUE_NAME, None, None
+    return queue, predicted_seconds, features
+
+
+def estimated_seconds(predicted_seconds):
+    """
+    :param predicted_seconds: float or None, from route_job
+    :return: int or None, the estimated_solve_seconds of the POST response
+    """
+    return round(predicted_seconds) if predicted_seconds is not None else None
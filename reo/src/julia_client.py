@@ -0,0 +1,237 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Shared client for the Julia HTTP API (julia_src/http.jl).
+
+Keeps a keep-alive requests.Session per Julia server and sends each request to the server with the fewest
+outstanding requests, preferring servers that answered /health. A Julia server that is solving does not answer
+/health until the solve is done, so a /health timeout marks the server as busy (and it is only used when all servers
+are busy) while a refused connection marks it as down. With more than one server, a background thread checks /health
+every JULIA_HEALTH_CHECK_SECONDS so that requests never wait on the checks.
+
+The outstanding request counts are per process: each gunicorn and celery worker process balances only its own
+requests, and the /health status is what steers a process away from servers that are busy with the requests of other
+processes.
+
+Settings: JULIA_HOSTS, JULIA_CONNECT_TIMEOUT, JULIA_TIMEOUTS, JULIA_HEALTH_CHECK_SECONDS, and JULIA_HEALTH_TIMEOUT (see
+reopt_api/performance_settings.py)
+"""
+import logging
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+log = logging.getLogger(__name__)
+
+JULIA_CONNECT_TIMEOUT = settings.JULIA_CONNECT_TIMEOUT
+JULIA_HEALTH_CHECK_SECONDS = settings.JULIA_HEALTH_CHECK_SECONDS
+JULIA_HEALTH_TIMEOUT = settings.JULIA_HEALTH_TIMEOUT
+
+# default seconds to wait for a response, by endpoint (optimizations are limited to 420 seconds plus model building)
+default_read_timeouts = {
+    'job': 1200,
+    'reopt': 1200,
+    'erp': 1200,
+    'ghpghx': 900,
+    'chp_defaults': 60,
+    'emissions_profile': 60,
+    'simulated_load': 120,
+}
+
+HEALTHY = 'healthy'
+BUSY = 'busy'
+DOWN = 'down'
+status_rank = {HEALTHY: 0, BUSY: 1, DOWN: 2}
+
+
+def julia_hosts():
+    """
+    :return: list of "host:port" from JULIA_HOSTS (JULIA_HOST:8081 by default)
+    """
+    return list(settings.JULIA_HOSTS)
+
+
+def read_timeout(endpoint):
+    """
+    :param endpoint: str, eg. "reopt"
+    :return: float, seconds to wait for the response of endpoint
+    """
+    if endpoint in settings.JULIA_TIMEOUTS:
+        return settings.JULIA_TIMEOUTS[endpoint]
+    return default_read_timeouts.get(endpoint, 60)
+
+
+class JuliaServer:
+    """
+    One Julia server with a keep-alive session and request metrics
+    """
+    def __init__(self, host):
+        self.host = host
+        self.base_url = "http://" + host
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=32))
+        self.status = HEALTHY
+        self.last_health_check = 0.0
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.seconds = 0.0
+
+    def check_health(self):
+        try:
+            response = self.session.get(self.base_url + "/health", timeout=(JULIA_CONNECT_TIMEOUT, JULIA_HEALTH_TIMEOUT))
+            self.status = HEALTHY if response.status_code == 200 else DOWN
+        except requests.exceptions.Timeout:
+            self.status = BUSY
+        except requests.exceptions.RequestException:
+            self.status = DOWN
+        self.last_health_check = time.time()
+
+    def metrics(self):
+        return {
+            "host": self.host,
+            "status": self.status,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "average_seconds": self.seconds / self.requests if self.requests else None,
+        }
+
+
+class JuliaClient:
+    """
+    Routes requests to the least loaded of several Julia servers
+    """
+    def __init__(self, hosts=None):
+        self.servers = [JuliaServer(h) for h in (hosts or julia_hosts())]
+        self.lock = threading.Lock()
+        self._closed = threading.Event()
+        if len(self.servers) > 1:
+            threading.Thread(target=self._health_loop, name="julia-health", daemon=True).start()
+
+    def _refresh_health(self):
+        """
+        Check /health of servers that have not been checked in JULIA_HEALTH_CHECK_SECONDS. Servers with outstanding
+        requests from this process are not checked since they are known to be up (and are likely busy).
+        """
+        now = time.time()
+        for server in self.servers:
+            if server.outstanding == 0 and now - server.last_health_check > JULIA_HEALTH_CHECK_SECONDS:
+                server.check_health()
+
+    def _health_loop(self):
+        while not self._closed.is_set():
+            try:
+                self._refresh_health()
+            except Exception as e:
+                log.warning("Could not check the health of the Julia servers: {}".format(e))
+            self._closed.wait(JULIA_HEALTH_CHECK_SECONDS)
+
+    def close(self):
+        """
+        Stop the health checks
+        """
+        self._closed.set()
+
+    def _choose(self, exclude=()):
+        candidates = [s for s in self.servers if s not in exclude] or self.servers
+        with self.lock:
+            server = min(candidates, key=lambda s: (status_rank[s.status], s.outstanding, s.requests))
+            server.outstanding += 1
+        return server
+
+    def request(self, method, endpoint, json=None, timeout=None):
+        """
+        Send a request to a Julia server. A request that cannot connect is retried once on another server.
+        :param method: str, "GET" or "POST"
+        :param endpoint: str, eg. "reopt"
+        :param json: JSON serializable request body
+        :param timeout: float, seconds to wait for the response, defaults to read_timeout(endpoint)
+        :return: requests.Response
+        """
+        read = timeout if timeout is not None else read_timeout(endpoint)
+        tried = []
+        while True:
+            server = self._choose(exclude=tried)
+            tried.append(server)
+            t_start = time.time()
+            try:
+                response = server.session.request(method, server.base_url + "/" + endpoint + "/", json=json,
+                                                  timeout=(JULIA_CONNECT_TIMEOUT, read))
+                server.status = HEALTHY
+                return response
+            except requests.exceptions.ConnectionError as e:
+                server.failures += 1
+                server.status = DOWN
+                server.last_health_check = time.time()
+                # only retry if the request was not sent, eg. not after the server disconnected during a solve
+                not_sent = isinstance(e, requests.exceptions.ConnectTimeout) or \
+                    "Failed to establish a new connection" in str(e)
+                if not not_sent or len(tried) >= min(2, len(self.servers)):
+                    raise
+                log.warning("Could not connect to Julia server {}, retrying on another server.".format(server.host))
+            except Exception:
+                server.failures += 1
+                raise
+            finally:
+                with self.lock:
+                    server.outstanding -= 1
+                    server.requests += 1
+                    server.seconds += time.time() - t_start
+
+    def get(self, endpoint, json=None, timeout=None):
+        return self.request("GET", endpoint, json=json, timeout=timeout)
+
+    def post(self, endpoint, json=None, timeout=None):
+        return self.request("POST", endpoint, json=json, timeout=timeout)
+
+    def metrics(self):
+        """
+        :return: list of dicts with the status and request counts of each server (for this process)
+        """
+        return [s.metrics() for s in self.servers]
+
+
+_client = None
+_client_pid = None
+
+
+def get_julia_client():
+    """
+    :return: JuliaClient shared by this process (a new one is created after a fork, eg. in celery workers, since
+        sessions cannot be shared between processes)
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = JuliaClient()  # the health check thread of the parent process is not copied by fork
+        _client_pid = os.getpid()
+    return _client
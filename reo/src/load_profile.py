@@ -32,19 +32,15 @@ import copy
 import math
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import namedtuple
+from functools import lru_cache
 from reo.utilities import degradation_factor, get_climate_zone_and_nearest_city
 import logging
 from reo.exceptions import LoadProfileError
+from reo.src import load_profile_library
+from reo.src.load_profile_library import library_path_base, load_type_file_map
 log = logging.getLogger(__name__)
-import json
-
-library_path_base = os.path.join('input_files', 'LoadProfiles')
-load_type_file_map = {"Electric": "Load8760_norm_",
-                        "SpaceHeating": "SpaceHeating8760_norm_",
-                        "DHW": "DHW8760_norm_",
-                        "Cooling": "Cooling8760_norm_"}
 
 default_annual_electric_loads = {
       "Albuquerque": {
@@ -402,6 +398,26 @@ def bau_outage_check(critical_loads_kw, existing_pv_kw_list, gen_existing_kw, ge
     return True, len(critical_loads_kw), generator_fuel_use_gal
 
 
+@lru_cache(maxsize=None)
+def hourly_series(year):
+    """
+    :param year: int
+    :return: pandas DatetimeIndex of the first 8760 hours of year (the last day is clipped in a leap year)
+    """
+    return pd.date_range(start=datetime(year, 1, 1, 0), periods=8760, freq='h')
+
+
+@lru_cache(maxsize=None)
+def month_index(year):
+    """
+    :param year: int
+    :return: read-only numpy array of the month (0 to 11) of each of the first 8760 hours of year
+    """
+    months = np.asarray(hourly_series(year).month, dtype=int) - 1
+    months.flags.writeable = False
+    return months
+
+
 class BuiltInProfile(object):
 
     Default_city = namedtuple("Default_city", "name lat lng tmyid zoneid")
@@ -477,12 +493,16 @@ class BuiltInProfile(object):
 
     @property
     def built_in_profile(self):
+        return self.built_in_profile_array.tolist()
+
+    @property
+    def built_in_profile_array(self):
         if self.monthly_energy in [None, []]:
             if self.doe_reference_name in ['FlatLoad'] + self.flatload_alternate_options:
-                return [ld * self.annual_energy * self.heating_fraction[0] for ld in self.custom_normalized_flatload]            
+                return self.custom_normalized_flatload * self.annual_energy * self.heating_fraction[0]
             else:
-                return [ld * self.annual_energy for ld in self.normalized_profile]
-        return self.monthly_scaled_profile
+                return self.normalized_profile * self.annual_energy
+        return self.monthly_scaled_profile_array
 
     @property
     def city(self):
@@ -513,90 +533,50 @@ class BuiltInProfile(object):
     @property
     def custom_normalized_flatload(self):
         # built in profiles are assumed to be hourly
-        periods = 8760
-        # get datetimes of all hours 
-        series = pd.date_range(start=datetime(self.year, 1, 1, 0), end=datetime(self.year, 12, 31, 23), freq='h')
+        series = hourly_series(self.year)
 
-        # clip last day if a leap year
-        series = series[:periods]
-        
         # create boolean masks for weekday and hour of day filters
+        on = np.ones(len(series), dtype=bool)
         if self.doe_reference_name in ['FlatLoad_24_5','FlatLoad_16_5','FlatLoad_8_5']:
-            weekends = [5,6]
-            weekday_mask = [i.weekday() not in weekends for i in series]
-        else:
-            weekday_mask = [True for i in series]
+            on &= series.weekday < 5
         if self.doe_reference_name in ['FlatLoad_16_5','FlatLoad_16_7']:
-            hour_range = range(6,22)
-            hour_mask = [i.hour in hour_range for i in series]
+            on &= (series.hour >= 6) & (series.hour < 22)
         elif self.doe_reference_name in ['FlatLoad_8_5','FlatLoad_8_7']:
-            hour_range = range(9,17)
-            hour_mask = [i.hour in hour_range for i in series]
-        else:
-            hour_mask = [True for i in series]
-        # combine masks to a series where 1 is on and 0 is off
-        series_binary = [int(i) for i in (np.array(weekday_mask) & np.array(hour_mask))]
-        # convert combined masks to a normalized profile
-        sum_series_binary = sum(series_binary)
-        normalized_profile = [i/sum_series_binary for i in series_binary]
-        return normalized_profile
+            on &= (series.hour >= 9) & (series.hour < 17)
+        # convert the mask to a normalized profile
+        return on / on.sum()
 
     @property
     def monthly_scaled_profile(self):
+        return self.monthly_scaled_profile_array.tolist()
 
-        load_profile = []
-
-        datetime_current = datetime(self.year, 1, 1, 0)
-        month_total = 0
-        month_scale_factor = []
-
+    @property
+    def monthly_scaled_profile_array(self):
         if self.doe_reference_name in ['FlatLoad'] + self.flatload_alternate_options:
             normalized_profile = self.custom_normalized_flatload
         else:
             normalized_profile = self.normalized_profile
-        
-        for load in normalized_profile:
-            month = datetime_current.month
-            # Monthly total based on annual_energy (sum of monthly_energy) and the normalized profile, later used to scale actual monthly energy
-            month_total += self.annual_energy * load
-
-            # add an hour
-            datetime_current = datetime_current + timedelta(0, 0, 0, 0, 0, 1, 0)
-
-            if month != datetime_current.month:
-                if month_total == 0:
-                    month_scale_factor.append(0)
-                else:
-                    month_scale_factor.append(float(self.monthly_energy[month - 1] / month_total * self.heating_fraction[month - 1]))
-                month_total = 0
+        months = month_index(self.year)
 
-        datetime_current = datetime(self.year, 1, 1, 0)
+        # Monthly totals based on annual_energy (sum of monthly_energy) and the normalized profile, used to scale
+        # to the actual monthly energy
+        load = self.annual_energy * normalized_profile
+        month_totals = np.bincount(months, weights=load, minlength=12)
+        month_scale_factor = np.zeros(12)
+        nonzero = month_totals != 0
+        month_scale_factor[nonzero] = np.asarray(self.monthly_energy, dtype=float)[nonzero] / month_totals[nonzero] \
+                                      * np.asarray(self.heating_fraction, dtype=float)[nonzero]
 
-        for load in normalized_profile:
-            month = datetime_current.month
-
-            load_profile.append(self.annual_energy * load * month_scale_factor[month - 1])
-
-            # add an hour
-            datetime_current = datetime_current + timedelta(0, 0, 0, 0, 0, 1, 0)
-
-        return load_profile
+        return load * month_scale_factor[months]
 
     @property
     def normalized_profile(self):
-        profile_path = os.path.join(self.library_path,
-                                    self.builtin_profile_prefix + self.city + "_" + self.building_type + ".dat")
-        normalized_profile = list()
-        f = open(profile_path, 'r')
-        for line in f:
-            normalized_profile.append(float(line.strip('\n')))
-
-        return normalized_profile
+        return load_profile_library.normalized_profile(self.load_type, self.city, self.building_type)
 
     @property
     def heating_fraction(self):
         if self.load_type == "SpaceHeating":
-            space_heating_fraction_flat_load = json.load(open(os.path.join(library_path_base, 'space_heating_fraction_flat_load.json'), 'rb'))
+            space_heating_fraction_flat_load = load_profile_library.json_table('space_heating_fraction_flat_load.json')
             if self.user_entered_space_heating_fraction in [None, []]:
                 heating_fraction = [space_heating_fraction_flat_load[self.city] for _ in range(12)]
             elif len(self.user_entered_space_heating_fraction) == 1:
@@ -604,7 +584,7 @@ class BuiltInProfile(object):
             else:
                 heating_fraction = self.user_entered_space_heating_fraction
         elif self.load_type == "DHW":
-            space_heating_fraction_flat_load = json.load(open(os.path.join(library_path_base, 'space_heating_fraction_flat_load.json'), 'rb'))
+            space_heating_fraction_flat_load = load_profile_library.json_table('space_heating_fraction_flat_load.json')
             if self.user_entered_space_heating_fraction in [None, []]:
                 heating_fraction = [1.0 - space_heating_fraction_flat_load[self.city] for _ in range(12)]
             elif len(self.user_entered_space_heating_fraction) == 1:
@@ -617,6 +597,28 @@ class BuiltInProfile(object):
         
         return heating_fraction
 
+def blend_profiles(profiles, time_steps_per_hour=1, percent_share=None, scale_to_site_load=False):
+    """
+    Combine the built-in profiles of the building types of a hybrid load
+    :param profiles: list of hourly (8760) numpy arrays, one per building type
+    :param time_steps_per_hour: int, the hourly values are repeated to this resolution
+    :param percent_share: list of the percent of the site load for each building type; only used for more than one
+        building type
+    :param scale_to_site_load: bool, for more than one building type scale each profile to the total of all of the
+        profiles before applying percent_share, so that the hybrid load totals the sum of the default annual loads
+    :return: numpy array of the combined load
+    """
+    profiles = np.repeat(np.array(profiles, dtype=float), time_steps_per_hour, axis=1)
+    if len(profiles) == 1:
+        return profiles[0]
+    if scale_to_site_load:
+        # act as if each partial load is scaled to the total site load (unknown until all of the partial loads are
+        # built) so that after applying the percent shares the total site load is the sum of the default annual loads
+        profile_totals = profiles.sum(axis=1)
+        profiles = profiles * (1.0 / (profile_totals / profile_totals.sum()))[:, None]
+    return (np.array(percent_share, dtype=float) / 100.0) @ profiles
+
+
 class LoadProfile(BuiltInProfile):
     """
     Important notes regarding different load profiles (from user's perspective):
@@ -663,7 +665,7 @@ class LoadProfile(BuiltInProfile):
                 raise lp_error
 
             else:
-                combine_loadlist = []
+                profiles = []
                 for i in range(len(doe_reference_name_list)):
                     kwargs["doe_reference_name"] = doe_reference_name_list[i]
                     if self.annual_kwh is not None:
@@ -671,31 +673,10 @@ class LoadProfile(BuiltInProfile):
                     if len(doe_reference_name_list[i])>1:
                         kwargs['monthly_totals_energy'] = kwargs.get('monthly_totals_kwh')
                     super(LoadProfile, self).__init__(**kwargs)
-                    if self.time_steps_per_hour > 1:
-                        load_list = [val for val in self.built_in_profile for _ in range(self.time_steps_per_hour)]
-                    else:
-                        load_list = self.built_in_profile 
-                    combine_loadlist.append(load_list)
-
-                # In the case where the user supplies a list of doe_reference_names and percent shares
-                # for consistency we want to act as if we had scaled the partial load to the total site 
-                # load which was unknown at the start of the loop above. This scalar makes it such that
-                # when the percent shares are later applied that the total site load will be the sum
-                # of the default annual loads for this location
-                if (len(doe_reference_name_list) > 1) and self.annual_kwh is None:
-                    total_site_load = sum([sum(l) for l in combine_loadlist])
-                    for i, load in enumerate(combine_loadlist):
-                        actual_percent_of_site_load = sum(load)/total_site_load
-                        scalar = 1.0 / actual_percent_of_site_load
-                        combine_loadlist[i] = list(np.array(load)* scalar)
-                
-                # Apply the percent share of annual load to each partial load
-                if (len(doe_reference_name_list) > 1):
-                    for i,load in enumerate(combine_loadlist):
-                        combine_loadlist[i] = (np.array(load) * (kwargs.get("percent_share")[i]/100.0)).tolist()
-                
-                # Aggregate total hybrid load
-                self.unmodified_load_list = (np.sum(np.array(combine_loadlist), axis=0)).tolist()
+                    profiles.append(self.built_in_profile_array)
+                self.unmodified_load_list = blend_profiles(profiles, self.time_steps_per_hour,
+                                                           kwargs.get("percent_share"),
+                                                           scale_to_site_load=self.annual_kwh is None).tolist()
 
         if loads_kw_is_net:
             self.load_list, existing_pv_kw_list = self._account_for_existing_pv(pvs, analysis_years)
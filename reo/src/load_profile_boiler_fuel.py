@@ -1,5 +1,5 @@
-from reo.src.load_profile import library_path_base, BuiltInProfile
-import json
+from reo.src.load_profile import BuiltInProfile, blend_profiles
+from reo.src.load_profile_library import json_table
 import os
 import copy
 import numpy as np
@@ -15,7 +15,7 @@ class LoadProfileBoilerFuel(BuiltInProfile):
 
     """  
 
-    total_heating_annual_loads = json.load(open(os.path.join(library_path_base, "total_heating_annual_loads.json"), "rb"))
+    total_heating_annual_loads = json_table("total_heating_annual_loads.json")
 
     def __init__(self, load_type, dfm=None, latitude = None, longitude = None, nearest_city = None, time_steps_per_hour = None, 
                     year = None, **kwargs):
@@ -65,7 +65,7 @@ class LoadProfileBoilerFuel(BuiltInProfile):
 
         else:  # building type and (annual_mmbtu OR monthly_mmbtu) defined by user
             doe_reference_name = kwargs['doe_reference_name']
-            combine_loadlist = []
+            profiles = []
             
             for i in range(len(doe_reference_name)):
                 # Monthly loads can only be used to scale a non-hybrid profile
@@ -95,33 +95,11 @@ class LoadProfileBoilerFuel(BuiltInProfile):
                 kwargs['year'] = year
                 kwargs['space_heating_fraction'] = self.space_heating_fraction
                 super(LoadProfileBoilerFuel, self).__init__(**kwargs)
-                if time_steps_per_hour > 1:
-                    partial_load_list = np.concatenate([[x] * time_steps_per_hour \
-                                                            for x in self.built_in_profile])
-                else:
-                    partial_load_list = self.built_in_profile
-                combine_loadlist.append(partial_load_list)
-            # In the case where the user supplies a list of doe_reference_names and percent shares
-            # for consistency we want to act as if we had scaled the partial load to the total site 
-            # load which was unknown at the start of the loop above. This scalar makes it such that
-            # when the percent shares are later applied that the total site load will be the sum
-            # of the default annual loads for this location
-            if (len(doe_reference_name) > 1) and kwargs['annual_energy'] is None:
-                total_site_load = sum([sum(l) for l in combine_loadlist])
-                for i, load in enumerate(combine_loadlist):
-                    actual_percent_of_site_load = sum(load)/total_site_load
-                    scalar = 1.0 / actual_percent_of_site_load
-                    combine_loadlist[i] = list(np.array(load)* scalar)
-            
-            #Apply the percent share of annual load to each partial load
-            if (len(doe_reference_name) > 1):
-                for i, load in enumerate(combine_loadlist):
-                    combine_loadlist[i] = list(np.array(load) * (kwargs.get("percent_share")[i]/100.0))
-
+                profiles.append(self.built_in_profile_array)
 
             # Aggregate total hybrid load
-            hybrid_loadlist = list(np.sum(np.array(combine_loadlist), 0))
-            self.load_list = copy.copy(hybrid_loadlist)
+            self.load_list = blend_profiles(profiles, time_steps_per_hour, kwargs.get("percent_share"),
+                                            scale_to_site_load=kwargs['annual_energy'] is None).tolist()
             self.annual_mmbtu = int(round(sum(self.load_list),0))
 
         if dfm is not None and load_type == "SpaceHeating":
@@ -1,4 +1,4 @@
-from reo.src.load_profile import library_path_base, BuiltInProfile, default_annual_electric_loads
+from reo.src.load_profile import library_path_base, BuiltInProfile, default_annual_electric_loads, blend_profiles
 import os
 import json
 import pandas as pd
@@ -69,7 +69,7 @@ class LoadProfileChillerThermal(BuiltInProfile):
         # DOE Reference building profile are used if there is a reference name provided
         elif kwargs.get('doe_reference_name'):
             doe_reference_name = kwargs.get('doe_reference_name') or []
-            combine_loadlist = []
+            profiles = []
             for i in range(len(doe_reference_name)):
                 # Monthly loads can only be used to scale a non-hybrid profile
                 kwargs['monthly_totals_energy'] = kwargs.get("monthly_tonhour")
@@ -90,30 +90,21 @@ class LoadProfileChillerThermal(BuiltInProfile):
                 kwargs['time_steps_per_hour'] = time_steps_per_hour
                 kwargs['year'] = year
                 super(LoadProfileChillerThermal, self).__init__(**kwargs)
-                if time_steps_per_hour > 1:
-                    partial_load_list = np.concatenate([[x] * time_steps_per_hour \
-                                                            for x in self.built_in_profile])
-                else:
-                    partial_load_list = self.built_in_profile
-                combine_loadlist.append(list(partial_load_list))
+                profiles.append(self.built_in_profile_array)
 
             # In the case where the user supplies a list of doe_reference_names and percent shares
             # WITHOUT an annual_energy (tonhour) value, then we use the weighted average (by percent_share)
             #  of the fraction of total electric load
             if kwargs.get('annual_energy') is None:
-                for i, building in enumerate(doe_reference_name):
-                    default_fraction = np.array(self.get_default_fraction_of_total_electric(building))
-                    modified_fraction = default_fraction * kwargs.get("percent_share")[i]/100.0
-                    combine_loadlist[i] = list(np.array(total_electric_load_list) * modified_fraction)
-            
-            #Apply the percent share of annual load to each partial load
-            elif (len(doe_reference_name) > 1):
-                for i, load in enumerate(combine_loadlist):
-                    combine_loadlist[i] = list(np.array(load) * (kwargs.get("percent_share")[i]/100.0))
+                modified_fractions = np.array([np.array(self.get_default_fraction_of_total_electric(building)) *
+                                               kwargs.get("percent_share")[i] / 100.0
+                                               for i, building in enumerate(doe_reference_name)])
+                hybrid_loadlist = (np.array(total_electric_load_list) * modified_fractions).sum(axis=0).tolist()
+
+            # Apply the percent share of annual load to each partial load and aggregate total hybrid load
+            else:
+                hybrid_loadlist = blend_profiles(profiles, time_steps_per_hour, kwargs.get("percent_share")).tolist()
 
-            # Aggregate total hybrid load
-            hybrid_loadlist = list(np.sum(np.array(combine_loadlist), 0))
-            
             if (kwargs.get("annual_tonhour") is not None) or (kwargs.get("monthly_tonhour") is not None):
                 #load_list is always expected to be in units of kWt
                 self.load_list = [i*TONHOUR_TO_KWHT for i in hybrid_loadlist]
@@ -158,14 +149,13 @@ class LoadProfileChillerThermal(BuiltInProfile):
     def get_default_fraction_of_total_electric(self, doe_reference_name):
         elec_bip = BuiltInProfile(annual_loads=default_annual_electric_loads, load_type='Electric',
                  latitude=self.latitude, longitude=self.longitude, doe_reference_name=doe_reference_name)
-        default_total_elec_load_profile = elec_bip.built_in_profile
+        default_total_elec_load_profile = elec_bip.built_in_profile_array
 
         cool_bip = BuiltInProfile(annual_loads=LoadProfileChillerThermal.annual_loads, load_type='Cooling',
                  latitude=self.latitude, longitude=self.longitude, doe_reference_name=doe_reference_name)
-        default_cooling_elec_load_profile = cool_bip.built_in_profile
+        default_cooling_elec_load_profile = cool_bip.built_in_profile_array
         
-        default_fraction_of_total_electric_profile = [default_cooling_elec_load_profile[i] / \
-                                                        max(default_total_elec_load_profile[i], 1.0E-6) 
-                                                        for i in range(len(default_total_elec_load_profile))]
+        default_fraction_of_total_electric_profile = (default_cooling_elec_load_profile /
+                                                      np.maximum(default_total_elec_load_profile, 1.0E-6)).tolist()
 
         return default_fraction_of_total_electric_profile
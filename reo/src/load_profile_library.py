@@ -0,0 +1,186 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Packed library of the built-in (DOE commercial reference building) normalized load profiles.
+
+The 8760 text files in input_files/LoadProfiles/<load_type>/ are packed into one float64 array of shape
+(load types, cities, buildings, 8760), saved as LOAD_PROFILE_LIBRARY_PATH (.npy) with an index of the load types,
+cities, and buildings saved next to it (.json). Build it with
+`python manage.py build_load_profile_library` (or `python -m reo.src.load_profile_library`), and again after any
+of the text files change. If the packed library does not exist when a profile is first needed it is built then.
+
+The packed library is memory-mapped read-only, so each profile lookup is a slice of the same pages in the OS page
+cache for every gunicorn and celery worker process.
+"""
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+import numpy as np
+from django.conf import settings
+from reo.src import file_cache
+log = logging.getLogger(__name__)
+
+library_path_base = os.path.join('input_files', 'LoadProfiles')
+load_type_file_map = {"Electric": "Load8760_norm_",
+                      "SpaceHeating": "SpaceHeating8760_norm_",
+                      "DHW": "DHW8760_norm_",
+                      "Cooling": "Cooling8760_norm_"}
+LOAD_PROFILE_LIBRARY_PATH = settings.LOAD_PROFILE_LIBRARY_PATH
+hours_per_year = 8760
+
+_library = None
+
+
+def index_path(path=None):
+    return os.path.splitext(path or LOAD_PROFILE_LIBRARY_PATH)[0] + '.json'
+
+
+def profile_file_path(load_type, city, building):
+    return os.path.join(library_path_base, load_type, load_type_file_map[load_type] + city + "_" + building + ".dat")
+
+
+def read_profile_file(load_type, city, building):
+    """
+    Read one normalized 8760 profile from its text file
+    :return: list of floats
+    """
+    with open(profile_file_path(load_type, city, building), 'r') as f:
+        return [float(line.strip('\n')) for line in f]
+
+
+def pack():
+    """
+    Pack all of the normalized profile text files into one array. Missing profiles are NaN.
+    :return: (numpy array, dict of {"load_types": [names], "cities": [names], "buildings": [names]})
+    """
+    files = set()
+    for load_type, prefix in load_type_file_map.items():
+        pattern = re.compile(re.escape(prefix) + r'([^_]+)_(.+)\.dat$')
+        for filename in sorted(os.listdir(os.path.join(library_path_base, load_type))):
+            match = pattern.match(filename)
+            if match is not None:
+                files.add((load_type, match.group(1), match.group(2)))
+    index = {
+        "load_types": list(load_type_file_map.keys()),
+        "cities": sorted({city for _, city, _ in files}),
+        "buildings": sorted({building for _, _, building in files}),
+    }
+    library = np.full((len(index["load_types"]), len(index["cities"]), len(index["buildings"]), hours_per_year),
+                      np.nan)
+    for (load_type, city, building) in files:
+        profile = read_profile_file(load_type, city, building)
+        if len(profile) != hours_per_year:
+            log.warning("Skipping {} profile for {} {} with {} values.".format(load_type, city, building, len(profile)))
+            continue
+        library[index["load_types"].index(load_type), index["cities"].index(city),
+                index["buildings"].index(building)] = profile
+    return library, index
+
+
+def build(path=None):
+    """
+    Pack the normalized profile text files and save the array (and its index) to path. The files are written to
+    temporary names and then renamed, so processes reading the library never see a partially written file. The array
+    is replaced before the index, which records the shape of its array so that load can detect an index that does not
+    match the array yet.
+    :param path: str, defaults to LOAD_PROFILE_LIBRARY_PATH
+    :return: dict, the index
+    """
+    path = path or LOAD_PROFILE_LIBRARY_PATH
+    library, index = pack()
+    file_cache.write_atomic(path, lambda f: np.save(f, library))
+    file_cache.write_atomic(index_path(path), lambda f: json.dump(dict(index, shape=library.shape), f), mode='w')
+    log.info("Saved the load profile library to {}".format(path))
+    return index
+
+
+def load():
+    """
+    Memory-map the packed library, building it first if it does not exist. If it cannot be saved (e.g. a read-only
+    file system) the library is built in memory for this process.
+    :return: (numpy memmap, dict of {"load_types": {name: i}, "cities": {name: i}, "buildings": {name: i}})
+    """
+    global _library
+    if _library is None:
+        try:
+            if not (os.path.isfile(LOAD_PROFILE_LIBRARY_PATH) and os.path.isfile(index_path())):
+                build()
+            with open(index_path(), 'r') as f:
+                index = json.load(f)
+            if "shape" not in index:  # saved by an earlier version
+                build()
+                with open(index_path(), 'r') as f:
+                    index = json.load(f)
+            array = np.load(LOAD_PROFILE_LIBRARY_PATH, mmap_mode='r')
+            if tuple(index.pop("shape")) != array.shape:
+                raise ValueError("the index does not match the array")
+        except (OSError, ValueError) as e:
+            log.warning("Could not load the load profile library from {} ({}); building it in memory.".format(
+                LOAD_PROFILE_LIBRARY_PATH, e))
+            array, index = pack()
+            array.flags.writeable = False
+        _library = (array, {k: {name: i for i, name in enumerate(v)} for k, v in index.items()})
+    return _library
+
+
+def normalized_profile(load_type, city, building):
+    """
+    Normalized 8760 profile from the packed library
+    :param load_type: str, one of load_type_file_map keys
+    :param city: str, one of BuiltInProfile.default_cities names
+    :param building: str, one of BuiltInProfile.default_buildings
+    :return: read-only numpy array view (no copy) of the profile; the text file is read instead if the profile is not
+        in the library (which raises the same error as before for an unknown city/building)
+    """
+    array, index = load()
+    try:
+        profile = array[index["load_types"][load_type], index["cities"][city], index["buildings"][building]]
+    except KeyError:
+        profile = None
+    if profile is None or np.isnan(profile[0]):
+        return np.array(read_profile_file(load_type, city, building))
+    return np.asarray(profile)
+
+
+@lru_cache(maxsize=None)
+def json_table(filename):
+    """
+    A JSON table in input_files/LoadProfiles (e.g. annual loads, space heating fractions), loaded once per process.
+    Do not modify the returned dict.
+    """
+    with open(os.path.join(library_path_base, filename), 'r') as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    build()
@@ -106,18 +106,6 @@ def calc_avoided_outage_costs(data, present_worth_factor, run_uuid):
     if sum(pv_production) == 0:
         pv_production = []
 
-    celery_eager = True
-    """ nlaws 200229
-    Set celery_eager = False to run each inner outage simulator loop in parallel. Timing tests with generator only
-    indicate that celery task management does not improve speed due to the overhead required to manage the 8760 tasks.
-    However, if the outage simulator does get more complicated (say with CHP) we should revisit using celery to run
-    the inner loops in parallel.
-    try:
-        if load_profile['outage_end_time_step'] - load_profile['outage_start_time_step'] > 1000:
-            celery_eager = False
-    except KeyError:
-        pass  # in case no outage has been defined
-    """
     results = simulate_outages(
         batt_kwh=site_outputs['Storage'].get('size_kwh') or 0,
         batt_kw=site_outputs['Storage'].get('size_kw') or 0,
@@ -130,7 +118,6 @@ def calc_avoided_outage_costs(data, present_worth_factor, run_uuid):
         fuel_available=generator_in['fuel_avail_gal'],
         b=generator_in['fuel_intercept_gal_per_hr'],
         m=generator_in['fuel_slope_gal_per_kwh'],
-        celery_eager=celery_eager,
         chp_kw=chp_kw
     )
 
@@ -0,0 +1,136 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Concurrent fetch stage of setup_scenario.
+
+The external data of a scenario that only depends on the validated inputs is fetched at the start of setup_scenario on
+a thread pool, while the rest of the scenario is set up:
+    - the PVWatts (or local pvwattsv5, see reo/src/pvwatts_local.py) response of each PV array
+    - the Wind Toolkit resource download and SAM windpower run of the Wind production factor
+
+The results are handed to the PV and Wind constructors. Exceptions are raised when a result is used, so they are
+handled by setup_scenario as if the fetch had been made in place. The URDB rate is not fetched here because it is
+downloaded during input validation, and the GHPGHX runs are not either because their inputs depend on the heating and
+cooling load profiles.
+
+The seconds spent on each fetch and the wall time of the whole stage are saved in the ProfileModel as
+setup_scenario_fetch_timings and setup_scenario_fetch_seconds.
+
+Settings: SETUP_FETCH_WORKERS, 0 to fetch in place (see reopt_api/performance_settings.py)
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from reo.src.pvwatts_local import get_pvwatts
+from reo.src.techs import PV, Wind
+log = logging.getLogger(__name__)
+
+SETUP_FETCH_WORKERS = settings.SETUP_FETCH_WORKERS
+
+
+class Prefetch(object):
+    """
+    Starts the fetches of a scenario on creation, see the module docstring
+    """
+
+    def __init__(self, inputs_dict, inputs_path, run_uuid=None, max_workers=SETUP_FETCH_WORKERS):
+        """
+        :param inputs_dict: validated inputs_dict['Scenario']
+        :param inputs_path: str, folder where wind resource data should download
+        :param run_uuid: str
+        :param max_workers: int, 0 to not fetch anything ahead of time
+        """
+        self.futures = dict()
+        self.timings = dict()
+        self.start = time.time()
+        self.end = self.start
+        fetches = self.fetches(inputs_dict, inputs_path, run_uuid) if max_workers > 0 else dict()
+        if fetches:
+            executor = ThreadPoolExecutor(max_workers=min(max_workers, len(fetches)))
+            for name, (fn, kwargs) in fetches.items():
+                self.futures[name] = executor.submit(self.timed, name, fn, **kwargs)
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def fetches(inputs_dict, inputs_path, run_uuid=None):
+        """
+        :return: dict of fetch name to tuple of function and its kwargs
+        """
+        site = inputs_dict['Site']
+        time_steps_per_hour = inputs_dict['time_steps_per_hour']
+        fetches = dict()
+        for pv_dict in site['PV']:
+            if (pv_dict['max_kw'] > 0 or pv_dict['existing_kw'] > 0) and pv_dict.get('prod_factor_series_kw') is None:
+                tilt, azimuth = PV.default_orientation(site['latitude'], pv_dict.get('array_type'),
+                                                       pv_dict.get('tilt', 0.537), pv_dict.get('azimuth', 180))
+                fetches['pv{}'.format(pv_dict['pv_number'])] = (get_pvwatts, dict(
+                    pv_dict, latitude=site['latitude'], longitude=site['longitude'], tilt=tilt, azimuth=azimuth,
+                    time_steps_per_hour=time_steps_per_hour))
+        wind_dict = site['Wind']
+        if wind_dict['max_kw'] > 0 and wind_dict.get('prod_factor_series_kw') is None:
+            fetches['wind'] = (Wind.run_sam, dict(wind_dict, inputs_path=inputs_path, latitude=site['latitude'],
+                                                  longitude=site['longitude'], run_uuid=run_uuid,
+                                                  time_steps_per_hour=time_steps_per_hour))
+        return fetches
+
+    def timed(self, name, fn, **kwargs):
+        """
+        Run fn and record its duration in self.timings
+        :param name: str
+        :param fn: function
+        :param kwargs: kwargs of fn
+        :return: result of fn
+        """
+        start = time.time()
+        try:
+            return fn(**kwargs)
+        finally:
+            end = time.time()
+            self.end = max(self.end, end)
+            self.timings[name] = round(end - start, 3)
+            log.info("Fetched {} in {} seconds.".format(name, self.timings[name]))
+
+    def result(self, name):
+        """
+        :param name: str, e.g. "pv1" or "wind"
+        :return: result of the fetch, waiting for it if needed, or None if it was not started
+        """
+        future = self.futures.get(name)
+        if future is None:
+            return None
+        return future.result()
+
+    @property
+    def seconds(self):
+        """
+        :return: wall time of the fetches that have finished
+        """
+        return round(self.end - self.start, 3)
@@ -31,9 +31,28 @@ import requests
 import json
 import keys
 import logging
+from requests.adapters import HTTPAdapter
+from django.conf import settings
 from reo.exceptions import PVWattsDownloadError
+from reo.src import pvwatts_cache
 log = logging.getLogger(__name__)
 
+PVWATTS_CONNECT_TIMEOUT = settings.PVWATTS_CONNECT_TIMEOUT
+PVWATTS_READ_TIMEOUT = settings.PVWATTS_READ_TIMEOUT
+
+_session = None
+
+
+def get_session():
+    """
+    :return: keep-alive requests.Session shared by the PVWatts queries of this process
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+    return _session
+
 
 def check_pvwatts_response_data(resp):
     """
@@ -131,14 +150,22 @@ class PVWatts:
         self.response = None
         self.response = self.data  # store response so don't hit API multiple times
 
+    @property
+    def query(self):
+        """
+        PVWatts query parameters other than the API key
+        :return: dict
+        """
+        return {"azimuth": self.azimuth, "system_capacity": self.system_capacity, "losses": self.losses*100,
+                "array_type": self.array_type, "module_type": self.module_type, "timeframe": self.timeframe,
+                "gcr": self.gcr, "dc_ac_ratio": self.dc_ac_ratio, "inv_eff": self.inv_eff*100,
+                "radius": int(self.radius), "dataset": self.dataset, "lat": self.latitude, "lon": self.longitude,
+                "tilt": self.tilt}
+
     @property
     def url(self):
-        url = self.url_base + "?api_key=" + self.key + "&azimuth=" + str(self.azimuth) + \
-              "&system_capacity=" + str(self.system_capacity) + "&losses=" + str(self.losses*100) + \
-              "&array_type=" + str(self.array_type) + "&module_type=" + str(self.module_type) + \
-              "&timeframe=" + self.timeframe + "&gcr=" + str(self.gcr) +  "&dc_ac_ratio=" + str(self.dc_ac_ratio) + \
-              "&inv_eff=" + str(self.inv_eff*100) + "&radius=" + str(int(self.radius)) + "&dataset=" + self.dataset + \
-              "&lat=" + str(self.latitude) + "&lon=" + str(self.longitude) + "&tilt=" + str(self.tilt)
+        url = self.url_base + "?api_key=" + self.key + \
+              "".join("&" + k + "=" + str(v) for k, v in self.query.items())
         return url
 
     @property
@@ -150,9 +177,19 @@ class PVWatts:
                     if self.longitude < 67.0 or self.longitude > 81.5 or self.latitude < -43.8 or self.latitude > 38.0: 
                         self.dataset = 'intl'
                         self.radius = self.radius *2
-            resp = requests.get(self.url, verify=self.verify)
-            log.info("PVWatts API query successful.")
-            data = check_pvwatts_response_data(resp)
+            cache_key = pvwatts_cache.query_key(dict(self.query, url_base=self.url_base))
+            data = pvwatts_cache.get(cache_key)
+            if data is not None:
+                log.info("Found PVWatts response in cache.")
+            else:
+                try:
+                    resp = get_session().get(self.url, verify=self.verify,
+                                             timeout=(PVWATTS_CONNECT_TIMEOUT, PVWATTS_READ_TIMEOUT))
+                except requests.exceptions.RequestException as e:
+                    raise_pvwatts_exception("PVWatts API query failed: {}".format(e))
+                log.info("PVWatts API query successful.")
+                data = check_pvwatts_response_data(resp)
+                pvwatts_cache.put(cache_key, data)
             self.response = data
         return self.response
 
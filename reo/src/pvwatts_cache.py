@@ -0,0 +1,180 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Persistent cache of PVWatts API responses.
+
+Responses are saved in PVWATTS_CACHE_PATH, one compressed .npz file per query, keyed by a hash of the normalized query:
+every PVWatts parameter except the API key, with the latitude and longitude rounded to PVWATTS_CACHE_GRID_DEGREES and
+the tilt and azimuth rounded to PVWATTS_CACHE_ANGLE_DEGREES. Only the key is rounded: PVWatts is queried with the exact
+inputs of the first site in a grid cell, and the other sites in the cell reuse that response. Only the hourly "ac" and
+"tamb" series are kept (as arrays), along with the non-hourly outputs and the station_info, inputs, and version.
+
+Entries older than PVWATTS_CACHE_MAX_AGE_DAYS are not used, and the oldest entries are removed when the cache is larger
+than PVWATTS_CACHE_MAX_MB. The cache can be filled ahead of time with:
+
+    python manage.py warm_pvwatts_cache <csv of sites>
+
+Settings: PVWATTS_CACHE_ENABLED, PVWATTS_CACHE_PATH, PVWATTS_CACHE_GRID_DEGREES, PVWATTS_CACHE_ANGLE_DEGREES,
+PVWATTS_CACHE_MAX_AGE_DAYS, and PVWATTS_CACHE_MAX_MB (see reopt_api/performance_settings.py)
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import numpy as np
+from django.conf import settings
+from reo.src import file_cache
+log = logging.getLogger(__name__)
+
+PVWATTS_CACHE_ENABLED = settings.PVWATTS_CACHE_ENABLED
+PVWATTS_CACHE_PATH = settings.PVWATTS_CACHE_PATH
+PVWATTS_CACHE_GRID_DEGREES = settings.PVWATTS_CACHE_GRID_DEGREES
+PVWATTS_CACHE_ANGLE_DEGREES = settings.PVWATTS_CACHE_ANGLE_DEGREES
+PVWATTS_CACHE_MAX_AGE_DAYS = settings.PVWATTS_CACHE_MAX_AGE_DAYS
+PVWATTS_CACHE_MAX_MB = settings.PVWATTS_CACHE_MAX_MB
+
+hourly_outputs = ['ac', 'tamb']
+SKELETON_KEY = '__skeleton__'
+EVICT_EVERY_N_PUTS = 100
+
+_n_puts = 0
+
+
+def round_to(value, resolution):
+    """
+    :param value: float
+    :param resolution: float, 0 to leave value as is
+    :return: value rounded to a multiple of resolution (with the float noise of the multiplication removed)
+    """
+    if not resolution:
+        return value
+    return round(round(value / resolution) * resolution, 6)
+
+
+def query_key(params):
+    """
+    :param params: dict of the PVWatts query parameters, without the API key
+    :return: str, hex digest of the parameters with the location and angles rounded to the cache resolution
+    """
+    params = dict(params)
+    for name, resolution in [('lat', PVWATTS_CACHE_GRID_DEGREES), ('lon', PVWATTS_CACHE_GRID_DEGREES),
+                             ('tilt', PVWATTS_CACHE_ANGLE_DEGREES), ('azimuth', PVWATTS_CACHE_ANGLE_DEGREES)]:
+        if params.get(name) is not None:
+            params[name] = round_to(params[name], resolution)
+    return hashlib.sha256(json.dumps(params, sort_keys=True, separators=(',', ':'), default=str).encode()).hexdigest()
+
+
+def _path(key):
+    return os.path.join(PVWATTS_CACHE_PATH, key[:2], key + '.npz')
+
+
+def _read_response(path):
+    """
+    :return: PVWatts response dict, or None if the response is older than PVWATTS_CACHE_MAX_AGE_DAYS
+    """
+    if time.time() - os.path.getmtime(path) > PVWATTS_CACHE_MAX_AGE_DAYS * 86400:
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        response = json.loads(str(npz[SKELETON_KEY]))
+        for name in hourly_outputs:
+            if name in npz.files:
+                response['outputs'][name] = npz[name].tolist()
+    return response
+
+
+def get(key):
+    """
+    :param key: str, from query_key
+    :return: PVWatts response dict, or None if the query is not cached (or is older than PVWATTS_CACHE_MAX_AGE_DAYS)
+    """
+    if not PVWATTS_CACHE_ENABLED:
+        return None
+    return file_cache.load(_path(key), _read_response, "cached PVWatts response {}".format(key))
+
+
+def put(key, response):
+    """
+    Save a successful PVWatts response
+    :param key: str, from query_key
+    :param response: dict, PVWatts response
+    :return: None
+    """
+    global _n_puts
+    if not PVWATTS_CACHE_ENABLED or response.get('errors') or not isinstance(response.get('outputs'), dict) \
+            or response['outputs'].get('ac') is None:
+        return
+    outputs = {k: v for k, v in response['outputs'].items() if not (isinstance(v, list) and len(v) >= 8760)}
+    skeleton = {k: v for k, v in response.items() if k != 'outputs'}
+    skeleton['outputs'] = outputs
+    arrays = {name: np.asarray(response['outputs'][name], dtype=float) for name in hourly_outputs
+              if response['outputs'].get(name) is not None}
+    if not file_cache.save(_path(key),
+                           lambda f: np.savez_compressed(f, **arrays, **{SKELETON_KEY: np.array(json.dumps(skeleton))}),
+                           "PVWatts response {}".format(key)):
+        return
+    _n_puts += 1
+    if _n_puts % EVICT_EVERY_N_PUTS == 0:
+        evict()
+
+
+def evict(max_mb=None, max_age_days=None):
+    """
+    Remove responses older than max_age_days, and then the oldest responses until the cache is under max_mb
+    :param max_mb: float, defaults to PVWATTS_CACHE_MAX_MB
+    :param max_age_days: float, defaults to PVWATTS_CACHE_MAX_AGE_DAYS
+    :return: int, number of responses removed
+    """
+    max_bytes = (PVWATTS_CACHE_MAX_MB if max_mb is None else max_mb) * 1e6
+    oldest = time.time() - (PVWATTS_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days) * 86400
+    entries = []
+    for root, dirs, files in os.walk(PVWATTS_CACHE_PATH):
+        for name in files:
+            if name.endswith('.npz'):
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except FileNotFoundError:  # removed by another worker
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+    entries.sort()
+    total_bytes = sum(size for mtime, size, path in entries)
+    n_removed = 0
+    for mtime, size, path in entries:
+        if mtime >= oldest and total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            n_removed += 1
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+    if n_removed > 0:
+        log.info("Removed {} responses from the PVWatts cache.".format(n_removed))
+    return n_removed
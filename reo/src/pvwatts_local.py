@@ -0,0 +1,235 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Local PV production factors from SAM's pvwattsv5 module (see reo/src/sscapi.py) and locally stored weather files.
+
+With PV_ENGINE = "local", get_pvwatts returns a LocalPVWatts in place of a PVWatts. LocalPVWatts takes the same
+inputs, runs pvwattsv5 on the weather file of the nearest station in WEATHER_FILES_PATH, and builds a response with
+the same "outputs" ("ac" in W and "tamb" in deg C) and "station_info" as the PVWatts API, so that pv_prod_factor and the
+ambient temperatures used by GHP are unchanged. Each LocalPVWatts has its own SSC data, and SSC releases the GIL while
+it runs, so many PV arrays can be run at once on local cores with a thread pool.
+
+Weather files are SAM CSV files (e.g. NSRDB PSM3 TMY downloads) or TMY3 CSV files. They are imported with:
+
+    python manage.py import_weather_files <files or directories>
+
+which copies them to WEATHER_FILES_PATH and indexes their locations in index.json. As with the PVWatts API, a radius of
+0 uses the nearest station regardless of the distance. When no station is within the (non-zero) radius of a site, LocalPVWatts queries the PVWatts API unless PV_LOCAL_FALLBACK_TO_API is False.
+
+Settings: PV_ENGINE, WEATHER_FILES_PATH, and PV_LOCAL_FALLBACK_TO_API (see reopt_api/performance_settings.py)
+"""
+import csv
+import json
+import logging
+import os
+import shutil
+import numpy as np
+from django.conf import settings
+from reo.src import file_cache
+from reo.src.pvwatts import PVWatts, raise_pvwatts_exception
+from reo.src.sscapi import PySSC
+log = logging.getLogger(__name__)
+
+PV_ENGINE = settings.PV_ENGINE
+WEATHER_FILES_PATH = settings.WEATHER_FILES_PATH
+PV_LOCAL_FALLBACK_TO_API = settings.PV_LOCAL_FALLBACK_TO_API
+
+INDEX_FILE = 'index.json'
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_MILE = 1609.344
+
+_stations = None
+_stations_mtime = None
+
+
+def read_weather_header(filename):
+    """
+    Read the location of a weather file
+    :param filename: path to a SAM CSV (two header rows of names and values) or TMY3 CSV (one row of id, name, state,
+        time zone, latitude, longitude, elevation) weather file
+    :return: dict with id, city, state, lat, lon, tz, and elev
+    """
+    with open(filename, 'r', newline='') as f:
+        rows = csv.reader(f)
+        first = next(rows)
+        if 'Latitude' in first:
+            values = dict(zip(first, next(rows)))
+            return {'id': values.get('Location ID', ''), 'city': values.get('City', ''),
+                    'state': values.get('State', ''), 'lat': float(values['Latitude']),
+                    'lon': float(values['Longitude']), 'tz': float(values.get('Time Zone', 0)),
+                    'elev': float(values.get('Elevation', 0))}
+    station_id, city, state, tz, lat, lon, elev = first[:7]
+    return {'id': station_id, 'city': city, 'state': state, 'lat': float(lat), 'lon': float(lon), 'tz': float(tz),
+            'elev': float(elev)}
+
+
+def build_index(path=None):
+    """
+    Index the locations of the weather files in path
+    :param path: str, defaults to WEATHER_FILES_PATH
+    :return: list of station dicts (see read_weather_header) with the name of their file
+    """
+    path = path or WEATHER_FILES_PATH
+    stations = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith('.csv'):
+            continue
+        try:
+            station = read_weather_header(os.path.join(path, name))
+        except (ValueError, KeyError, StopIteration) as e:
+            log.warning("Skipping weather file {} with unreadable header: {}".format(name, e))
+            continue
+        station['file'] = name
+        stations.append(station)
+    file_cache.write_atomic(os.path.join(path, INDEX_FILE), lambda f: json.dump({'stations': stations}, f), mode='w')
+    return stations
+
+
+def import_weather_files(filenames, path=None):
+    """
+    Copy weather files to the weather file directory and re-index it
+    :param filenames: list of paths to weather files
+    :param path: str, defaults to WEATHER_FILES_PATH
+    :return: list of station dicts in the index
+    """
+    path = path or WEATHER_FILES_PATH
+    os.makedirs(path, exist_ok=True)
+    for filename in filenames:
+        if os.path.abspath(os.path.dirname(filename)) != os.path.abspath(path):
+            shutil.copy(filename, os.path.join(path, os.path.basename(filename)))
+    return build_index(path)
+
+
+def load_stations():
+    """
+    Stations of WEATHER_FILES_PATH/index.json, reloaded when the index changes
+    :return: tuple of list of station dicts and (n, 2) array of their latitudes and longitudes in radians
+    """
+    global _stations, _stations_mtime
+    index = os.path.join(WEATHER_FILES_PATH, INDEX_FILE)
+    try:
+        mtime = os.path.getmtime(index)
+    except OSError:
+        return [], np.zeros((0, 2))
+    if _stations is None or mtime != _stations_mtime:
+        with open(index, 'r') as f:
+            stations = json.load(f)['stations']
+        coords = np.radians(np.array([[s['lat'], s['lon']] for s in stations]).reshape(-1, 2))
+        _stations, _stations_mtime = (stations, coords), mtime
+    return _stations
+
+
+def nearest_station(latitude, longitude):
+    """
+    :param latitude: float
+    :param longitude: float
+    :return: tuple of the nearest station dict (None if there are no stations) and its distance in meters
+    """
+    stations, coords = load_stations()
+    if not stations:
+        return None, None
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    a = np.sin((coords[:, 0] - lat) / 2) ** 2 + \
+        np.cos(lat) * np.cos(coords[:, 0]) * np.sin((coords[:, 1] - lon) / 2) ** 2
+    distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1)))
+    i = int(np.argmin(distances))
+    return stations[i], float(distances[i])
+
+
+class LocalPVWatts(PVWatts):
+    """
+    PVWatts run locally with SAM's pvwattsv5 module, see the module docstring
+    """
+
+    @property
+    def data(self):
+        if self.response is None:
+            station, distance = nearest_station(self.latitude, self.longitude)
+            # a radius of 0 means the closest station regardless of the distance (see nested_inputs PV radius)
+            if station is None or (self.radius > 0 and distance > self.radius * METERS_PER_MILE):
+                message = "No local weather file within {} miles of ({}, {})".format(self.radius, self.latitude,
+                                                                                   self.longitude)
+                if not PV_LOCAL_FALLBACK_TO_API:
+                    raise_pvwatts_exception(message)
+                log.info(message + ", querying the PVWatts API.")
+                return super(LocalPVWatts, self).data
+            self.response = self.run_pvwattsv5(station, distance)
+        return self.response
+
+    def run_pvwattsv5(self, station, distance):
+        """
+        :param station: dict from the weather file index
+        :param distance: float, meters from the site to the station
+        :return: dict like a PVWatts API response
+        """
+        ssc = PySSC()
+        ssc.module_exec_set_print(0)
+        data = ssc.data_create()
+        ssc.data_set_string(data, 'solar_resource_file', os.path.join(WEATHER_FILES_PATH, station['file']))
+        ssc.data_set_number(data, 'system_capacity', self.system_capacity)
+        ssc.data_set_number(data, 'module_type', self.module_type)
+        ssc.data_set_number(data, 'array_type', self.array_type)
+        ssc.data_set_number(data, 'losses', self.losses * 100)
+        ssc.data_set_number(data, 'tilt', self.tilt)
+        ssc.data_set_number(data, 'azimuth', self.azimuth)
+        ssc.data_set_number(data, 'gcr', self.gcr)
+        ssc.data_set_number(data, 'dc_ac_ratio', self.dc_ac_ratio)
+        ssc.data_set_number(data, 'inv_eff', self.inv_eff * 100)
+        ssc.data_set_number(data, 'adjust:constant', 0)
+        module = ssc.module_create('pvwattsv5')
+        try:
+            if ssc.module_exec(module, data) == 0:
+                messages = []
+                msg = ssc.module_log(module, 0)
+                while msg is not None:
+                    messages.append(msg.decode("utf-8") if type(msg) == bytes else msg)
+                    msg = ssc.module_log(module, len(messages))
+                raise_pvwatts_exception("pvwattsv5 simulation error: {}".format("; ".join(messages)))
+            outputs = {'ac': list(ssc.data_get_array(data, 'ac')),
+                       'tamb': list(ssc.data_get_array(data, 'tamb')),
+                       'ac_annual': ssc.data_get_number(data, 'ac_annual')}
+        finally:
+            ssc.module_free(module)
+            ssc.data_free(data)
+        station_info = {'lat': station['lat'], 'lon': station['lon'], 'elev': station['elev'], 'tz': station['tz'],
+                        'location': station['id'], 'city': station['city'], 'state': station['state'],
+                        'solar_resource_file': station['file'], 'distance': int(round(distance))}
+        return {'inputs': self.query, 'errors': [], 'warnings': [], 'version': 'pvwattsv5',
+                'station_info': station_info, 'outputs': outputs}
+
+
+def get_pvwatts(**kwargs):
+    """
+    :param kwargs: PVWatts inputs
+    :return: LocalPVWatts if PV_ENGINE is "local", else PVWatts
+    """
+    if PV_ENGINE == 'local' and not kwargs.get('offline'):
+        return LocalPVWatts(**kwargs)
+    return PVWatts(**kwargs)
@@ -2,12 +2,15 @@
 sample Python codes for EASIUR and APSCA
 """
 
-import csv
 import deepdish
 import h5py
 import numpy as np
+import pandas as pd
 import pyproj
 import os
+from functools import lru_cache
+from django.conf import settings
+from reo.src import file_cache
 
 # print(f"This module uses the following packages")
 # print(f"deepdish: {deepdish.__version__}")
@@ -16,6 +19,12 @@ import os
 # print(f"pyproj  : {pyproj.__version__}")
 
 library_path = os.path.join('reo', 'src', 'data')
+# Adjusted EASIUR grids are saved here (one .npz per stack, pop_year, income_year, dollar_year) so that new worker
+# processes do not have to recompute them; set to an empty string to only cache in memory
+EASIUR_CACHE_PATH = settings.EASIUR_CACHE_PATH
+# (stack, pop_year, income_year, dollar_year) of the grids used by EASIURCalculator, precomputed by
+# `python manage.py warm_easiur_cache`
+reopt_grids = [('p150', 2020, 2020, 2010), ('area', 2020, 2020, 2010), ('p150', 2024, 2024, 2010)]
 
 # Income Growth Adjustment factors from BenMAP
 MorIncomeGrowthAdj = {
@@ -109,50 +118,87 @@ DATUM_WGS84 = pyproj.Proj("epsg:4326 +proj=longlat +ellps=WGS84 +datum=WGS84 +no
 def get_EASIUR2005(stack, pop_year=2005, income_year=2005, dollar_year=2010):
     """Returns EASIUR for a given `stack` height in a dict.
 
+    The adjusted grids are cached in memory for each set of arguments (and on disk in EASIUR_CACHE_PATH), so the
+    arrays in the returned dict are read-only.
+
     Args:
         stack: area, p150, p300
         pop_year: population year
         income_year: income level (1990 to 2024)
         dollar_year: dollar year (1980 to 2010)
     """
+    ret_map = _get_EASIUR2005(stack, int(pop_year), int(income_year), int(dollar_year))
+    if ret_map is False:
+        return False
+    return dict(ret_map)
+
+
+def _easiur_source_files(stack, pop_year):
+    files = [os.path.join(library_path, 'EASIUR_Data', "sc_8.6MVSL_" + stack + "_pop2005.hdf5")]
+    if pop_year != 2005:
+        files.append(os.path.join(library_path, 'EASIUR_Data', "sc_growth_rate_pop2005_pop2040_" + stack + ".hdf5"))
+    return files
+
+
+def _easiur_cache_file(stack, pop_year, income_year, dollar_year):
+    return os.path.join(EASIUR_CACHE_PATH, "easiur_{}_pop{}_inc{}_dol{}.npz".format(stack, pop_year, income_year,
+                                                                                     dollar_year))
+
+
+@lru_cache(maxsize=32)
+def _get_EASIUR2005(stack, pop_year, income_year, dollar_year):
 
     if stack not in ["area", "p150", "p300"]:
         print("stack should be one of 'area', 'p150', 'p300'")
         return False
+    if income_year != 2005 and income_year not in MorIncomeGrowthAdj:
+        print("income year must be between 1990 to 2024")
+        return False
+    if dollar_year != 2010 and dollar_year not in GDP_deflator:
+        print("Dollar year must be between 1980 to 2010")
+        return False
 
-    file_2005 = "sc_8.6MVSL_" + stack + "_pop2005.hdf5"
-
-    #ret_map = deepdish.io.load("data/EASIUR_Data/" + file_2005)
-    ret_map = deepdish.io.load(os.path.join(library_path, 'EASIUR_Data', file_2005))
-
-    if pop_year != 2005:
-        filename = "sc_growth_rate_pop2005_pop2040_" + stack + ".hdf5"
-        map_rate = deepdish.io.load(os.path.join(library_path, 'EASIUR_Data', filename))
+    source_files = _easiur_source_files(stack, pop_year)
+    cache_file = _easiur_cache_file(stack, pop_year, income_year, dollar_year)
+    if EASIUR_CACHE_PATH and os.path.isfile(cache_file) and \
+            os.path.getmtime(cache_file) >= max(os.path.getmtime(f) for f in source_files):
+        with np.load(cache_file) as cached:
+            ret_map = {k: cached[k] for k in cached.files}
+    else:
+        ret_map = deepdish.io.load(source_files[0])
 
-        for k, v in map_rate.items():
-            ret_map[k] = ret_map[k] * (v ** (pop_year - 2005))
+        if pop_year != 2005:
+            map_rate = deepdish.io.load(source_files[1])
+            for k, v in map_rate.items():
+                ret_map[k] = ret_map[k] * (v ** (pop_year - 2005))
 
-    if income_year != 2005:
-        try:
+        if income_year != 2005:
             adj = MorIncomeGrowthAdj[income_year] / MorIncomeGrowthAdj[2005]
             for k, v in ret_map.items():
                 ret_map[k] = v * adj
-        except KeyError:
-            print("income year must be between 1990 to 2024")
-            return False
 
-    if dollar_year != 2010:
-        try:
+        if dollar_year != 2010:
             adj = GDP_deflator[dollar_year] / GDP_deflator[2010]
             for k, v in ret_map.items():
                 ret_map[k] = v * adj
-        except KeyError:
-            print("Dollar year must be between 1980 to 2010")
-            return False
 
+        if EASIUR_CACHE_PATH:
+            file_cache.save(cache_file, lambda f: np.savez(f, **ret_map), "EASIUR grids to {}".format(cache_file))
+
+    for v in ret_map.values():
+        v.flags.writeable = False
     return ret_map
 
 
+def warm_cache(grids=None):
+    """
+    Compute (or load) the adjusted EASIUR grids and save them to EASIUR_CACHE_PATH
+    :param grids: list of (stack, pop_year, income_year, dollar_year), defaults to reopt_grids
+    """
+    for grid in grids or reopt_grids:
+        _get_EASIUR2005(*grid)
+
+
 def get_pop_inc(year, min_age=30):
     """Returns population and incidence (or mortality) rate of `min_age` or older for a given `year`."""
 
@@ -168,39 +214,33 @@ def get_pop_inc(year, min_age=30):
         return pop, inc
 
 
+@lru_cache(maxsize=None)
 def get_pop_inc_raw(year, min_age=30):
     """Returns population and incidence (or mortality) rate of `min_age` or older for a given `year`.
 
-    Raw data (CSV files) were derived from BenMAP
+    Raw data (CSV files) were derived from BenMAP. The returned arrays are cached, and read-only.
     """
 
-#    with open("data/EASIUR_Data/PopInc/popinc" + str(year) + ".CSV", newline="") as f:
-    with open(os.path.join(library_path, 'EASIUR_Data/PopInc/popinc{}.CSV'.format(str(year))), newline="") as f:
-        
-        pop = np.zeros((148, 112))
-        inc = np.zeros((148, 112))
-        popinc_csv = csv.reader(f)
-        header = next(popinc_csv)
-
-        if "Col" in header[0]:  # Col has a strange char
-            header[0] = "Col"
-
-        xys = set()
-        for row in popinc_csv:
-            row_d = dict(zip(header, row))
-            if int(row_d["Start Age"]) == min_age:
-                x = int(row_d["Col"]) - 1
-                y = int(row_d["Row"]) - 1
-                if (x, y) in xys:
-                    # just to check
-                    print("Duplicate?", x, y)
-                xys.add((x, y))
-                p = float(row_d["Population"])
-                i = float(row_d["Baseline"])
-                # print float(row_d['Point Estimate'])/i, row_d['Percent of Baseline']
-                pop[x, y] = p
-                inc[x, y] = i / p
-        return pop, inc
+    df = pd.read_csv(os.path.join(library_path, 'EASIUR_Data/PopInc/popinc{}.CSV'.format(str(year))))
+    df = df.rename(columns={df.columns[0]: "Col"})  # Col has a strange char
+    df = df[df["Start Age"].astype(int) == min_age]
+    x = df["Col"].values.astype(int) - 1
+    y = df["Row"].values.astype(int) - 1
+    p = df["Population"].values.astype(float)
+    i = df["Baseline"].values.astype(float)
+
+    duplicated = pd.DataFrame({"x": x, "y": y}).duplicated(keep='first').values
+    for dx, dy in zip(x[duplicated], y[duplicated]):
+        # just to check
+        print("Duplicate?", dx, dy)
+
+    pop = np.zeros((148, 112))
+    inc = np.zeros((148, 112))
+    pop[x, y] = p
+    inc[x, y] = i / p
+    pop.flags.writeable = False
+    inc.flags.writeable = False
+    return pop, inc
 
 
 def get_avg_plume(x, y, spec, stack="area", season="Q0"):
@@ -251,11 +291,22 @@ def l2g(x, y, inverse=False, datum="NAD83"):
         datum = DATUM_WGS84
 
     if inverse:
-        return np.array(pyproj.transform(datum, LCP_US, x, y)) / 36000.0 + np.array(
+        return np.array(_transform(datum, LCP_US, x, y)) / 36000.0 + np.array(
             [1, 1]
         )
     else:
-        return pyproj.transform(LCP_US, datum, (x - 1) * 36e3, (y - 1) * 36e3)
+        return _transform(LCP_US, datum, (x - 1) * 36e3, (y - 1) * 36e3)
+
+
+_transformers = dict()
+
+
+def _transform(source, target, x, y):
+    """Same as pyproj.transform(source, target, x, y), with the Transformer for each pair of Projs reused"""
+    key = (id(source), id(target))
+    if key not in _transformers:
+        _transformers[key] = (source, target, pyproj.Transformer.from_proj(source, target))
+    return _transformers[key][2].transform(x, y)
 
 
 def g2l(lon, lat, datum="NAD83"):
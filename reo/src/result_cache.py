@@ -0,0 +1,304 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Content-addressed cache of completed optimizations.
+
+The validated (normalized) inputs of every job are hashed together with the code version and the version of the
+default data (load profiles, AVERT, EASIUR, PVWatts API version, ...) and saved in ResultCacheModel. When a job is
+POST'ed with the same hash as a run that finished with an optimal status within RESULT_CACHE_TTL_DAYS, the results of
+that run are copied to the new run_uuid instead of running setup_scenario and the optimizations again.
+
+The business-as-usual results are also cached on their own, keyed by a fingerprint of the BAU REopt inputs built in
+DataManager.finalize, so that scenarios that only differ in technology inputs (eg. a parametric study of costs or
+max sizes) skip the BAU solve in run_jump_model.
+
+Settings: RESULT_CACHE_ENABLED, RESULT_CACHE_TTL_DAYS, and RESULT_CACHE_DATA_VERSION (see
+reopt_api/performance_settings.py). Users can opt out of the cache for a single job by POST'ing with the query parameter use_result_cache=false.
+"""
+import hashlib
+import inspect
+import json
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import numpy as np
+from reo.models import ResultCacheModel, BAUResultModel, ScenarioModel, ProfileModel, SiteModel, FinancialModel, LoadProfileModel, \
+    LoadProfileBoilerFuelModel, LoadProfileChillerThermalModel, ElectricTariffModel, FuelTariffModel, PVModel, \
+    WindModel, StorageModel, GeneratorModel, CHPModel, BoilerModel, ElectricChillerModel, AbsorptionChillerModel, \
+    HotTESModel, ColdTESModel, NewBoilerModel, SteamTurbineModel, GHPModel, MessageModel
+from reo.src.pvwatts import PVWatts
+from resilience_stats.models import ResilienceModel
+log = logging.getLogger(__name__)
+
+RESULT_CACHE_ENABLED = settings.RESULT_CACHE_ENABLED
+RESULT_CACHE_TTL_DAYS = settings.RESULT_CACHE_TTL_DAYS
+RESULT_CACHE_DATA_VERSION = settings.RESULT_CACHE_DATA_VERSION
+
+# Increment when the default data that the results depend on (input_files, reo/src/data) changes, so that results
+# built with the old data are not reused. RESULT_CACHE_DATA_VERSION does the same for a single deployment.
+DATA_VERSION = 1
+
+# Scenario inputs that do not change the results
+request_specific_scenario_inputs = ['user_uuid', 'webtool_uuid', 'description', 'timeout_seconds']
+
+# v1/v2 models that hold the inputs and results of a run (ProfileModel is not copied since no time was spent)
+run_models = [SiteModel, FinancialModel, LoadProfileModel, LoadProfileBoilerFuelModel, LoadProfileChillerThermalModel,
+              ElectricTariffModel, FuelTariffModel, PVModel, WindModel, StorageModel, GeneratorModel, CHPModel,
+              BoilerModel, ElectricChillerModel, AbsorptionChillerModel, HotTESModel, ColdTESModel, NewBoilerModel,
+              SteamTurbineModel, GHPModel, MessageModel]
+
+_code_version = None
+
+
+def code_version():
+    """
+    Version of the API code, from the latest header in the CHANGELOG (eg. "v2.11.0" or "Develop - 2023-03-29")
+    :return: str
+    """
+    global _code_version
+    if _code_version is None:
+        _code_version = ''
+        try:
+            with open('CHANGELOG.md', 'r') as f:
+                for line in f:
+                    if line.startswith('## ') and 'Guidelines' not in line:
+                        _code_version = line[3:].strip()
+                        break
+        except IOError:
+            log.warning("Could not read CHANGELOG.md for the result cache code version.")
+    return _code_version
+
+
+def data_version():
+    """
+    Version of the default data used to build the optimization inputs: DATA_VERSION, the PVWatts API url, and
+    RESULT_CACHE_DATA_VERSION. It does not depend on the files on disk, which the caches of the data add to, so that
+    every worker computes the same keys.
+    :return: str
+    """
+    return "{}:{}:{}".format(DATA_VERSION, inspect.signature(PVWatts).parameters['url_base'].default,
+                             RESULT_CACHE_DATA_VERSION)
+
+
+def json_default(obj):
+    """
+    json.dumps default for the types in the REopt inputs that are not JSON serializable
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+def canonical_hash(obj):
+    """
+    sha256 of obj serialized with sorted keys
+    :param obj: JSON serializable object
+    :return: str, hex digest
+    """
+    return hashlib.sha256(
+        json.dumps(obj, sort_keys=True, separators=(',', ':'), default=json_default).encode()
+    ).hexdigest()
+
+
+def input_hash(inputs, api_version):
+    """
+    Canonical hash of validated inputs
+    :param inputs: dict, validated inputs with defaults filled in
+    :param api_version: int
+    :return: str, hex digest
+    """
+    payload = {
+        "inputs": inputs,
+        "api_version": api_version,
+        "code_version": code_version(),
+        "data_version": data_version(),
+    }
+    return canonical_hash(payload)
+
+
+def scenario_input_hash(input_dict, api_version):
+    """
+    Hash of the v1/v2 validated inputs, excluding the request_specific_scenario_inputs
+    :param input_dict: dict, ValidateNestedInput.input_dict
+    :param api_version: int, 1 or 2
+    :return: str, hex digest
+    """
+    scenario = {k: v for k, v in input_dict['Scenario'].items() if k not in request_specific_scenario_inputs}
+    return input_hash({'Scenario': scenario}, api_version)
+
+
+def use_result_cache(request):
+    """
+    :param request: HttpRequest
+    :return: bool, False if the cache is turned off, the user opted out with use_result_cache=false, or the request
+        is a monitoring check (which has to run the whole pipeline)
+    """
+    if not RESULT_CACHE_ENABLED:
+        return False
+    if (request.META.get('HTTP_USER_AGENT') or '').startswith('check_http/'):
+        return False
+    return str(request.GET.get('use_result_cache', 'true')).lower() not in ['false', '0']
+
+
+def save_input_hash(run_uuid, input_hash, api_version):
+    """
+    Save the input hash of a new run, best-effort since a run without a hash is only left out of the cache
+    """
+    try:
+        ResultCacheModel.create(run_uuid=run_uuid, input_hash=input_hash, api_version=api_version)
+    except Exception as e:
+        log.warning("Could not save the input hash of run_uuid {}: {}".format(run_uuid, e))
+
+
+def find_cached_run(input_hash, api_version, is_optimal):
+    """
+    Find the most recent run with the same input hash that was created within RESULT_CACHE_TTL_DAYS and is optimal
+    :param input_hash: str
+    :param api_version: int
+    :param is_optimal: function of run_uuid that returns True if the run finished with an optimal status
+    :return: str, run_uuid or None
+    """
+    oldest = timezone.now() - timedelta(days=RESULT_CACHE_TTL_DAYS)
+    candidates = ResultCacheModel.objects.filter(input_hash=input_hash, api_version=api_version,
+                                                 created__gte=oldest).order_by('-created')
+    for candidate in candidates.values_list('run_uuid', flat=True):
+        if is_optimal(candidate):
+            return str(candidate)
+    return None
+
+
+def scenario_is_optimal(run_uuid):
+    return ScenarioModel.objects.filter(run_uuid=run_uuid, status='optimal').exists()
+
+
+def find_cached_scenario(input_hash, api_version):
+    """
+    v1/v2 wrapper for find_cached_run
+    :return: str, run_uuid or None
+    """
+    return find_cached_run(input_hash, api_version, scenario_is_optimal)
+
+
+def clone_scenario(source_run_uuid, data):
+    """
+    Save a new v1/v2 run with the inputs and results of source_run_uuid.
+    :param source_run_uuid: str, run_uuid of an optimal run with the same input hash
+    :param data: dict, constructed in api.py, mirrors reopt api response structure
+    :return: None
+    """
+    run_uuid = data['outputs']['Scenario']['run_uuid']
+    # values that are specific to the new request
+    scenario_updates = {k: data['inputs']['Scenario'].get(k) for k in request_specific_scenario_inputs}
+    scenario_updates['job_type'] = data['outputs']['Scenario'].get('job_type')
+    scenario_updates['api_version'] = data['outputs']['Scenario'].get('api_version')
+
+    with transaction.atomic():
+        scenario = ScenarioModel.objects.get(run_uuid=source_run_uuid)
+        scenario.pk = None
+        scenario.run_uuid = run_uuid
+        for k, v in scenario_updates.items():
+            setattr(scenario, k, v)
+        scenario.save()
+
+        ProfileModel.create(run_uuid=run_uuid,
+                            pre_setup_scenario_seconds=data['outputs']['Scenario']['Profile'].get(
+                                'pre_setup_scenario_seconds'))
+
+        for model in run_models:
+            for obj in model.objects.filter(run_uuid=source_run_uuid):
+                obj.pk = None
+                obj.run_uuid = run_uuid
+                obj.save()
+        MessageModel.create(run_uuid=run_uuid, message_type='cached_results',
+                            message="Results copied from run_uuid {}, which has identical inputs.".format(
+                                source_run_uuid))
+
+        for rm in ResilienceModel.objects.filter(scenariomodel__run_uuid=source_run_uuid):
+            rm.pk = None
+            rm.scenariomodel = scenario
+            rm.save()
+    log.info("Copied results of run_uuid {} to run_uuid {}".format(source_run_uuid, run_uuid))
+
+
+def bau_fingerprint(reopt_inputs_bau):
+    """
+    Fingerprint of the BAU inputs to reopt.jl, which are the same for scenarios that share the load, tariff,
+    existing techs, and financial inputs
+    :param reopt_inputs_bau: dict, DataManager.reopt_inputs_bau
+    :return: str, hex digest
+    """
+    return canonical_hash({"reopt_inputs_bau": reopt_inputs_bau, "code_version": code_version()})
+
+
+def find_bau_results(fingerprint, tolerance):
+    """
+    :param fingerprint: str, from bau_fingerprint
+    :param tolerance: float, optimality tolerance of the BAU solve
+    :return: dict of BAU results from reopt.jl created within RESULT_CACHE_TTL_DAYS, or None
+    """
+    if not RESULT_CACHE_ENABLED or fingerprint is None:
+        return None
+    oldest = timezone.now() - timedelta(days=RESULT_CACHE_TTL_DAYS)
+    bau = BAUResultModel.objects.filter(fingerprint=fingerprint, tolerance=tolerance, created__gte=oldest).first()
+    if bau is None:
+        return None
+    return bau.results
+
+
+def bau_results_seconds(fingerprint, tolerance):
+    """
+    :param fingerprint: str, from bau_fingerprint
+    :param tolerance: float, optimality tolerance of the BAU solve
+    :return: float, reopt_bau_seconds of the run that solved the cached BAU results, or None
+    """
+    bau = BAUResultModel.objects.filter(fingerprint=fingerprint, tolerance=tolerance).first()
+    if bau is None:
+        return None
+    return ProfileModel.objects.filter(run_uuid=bau.run_uuid).values_list('reopt_bau_seconds', flat=True).first()
+
+
+def save_bau_results(fingerprint, tolerance, run_uuid, results):
+    """
+    Save optimal BAU results, replacing any expired results with the same fingerprint
+    :param fingerprint: str, from bau_fingerprint
+    :param tolerance: float, optimality tolerance of the BAU solve
+    :param run_uuid: str, run that solved the BAU scenario
+    :param results: dict, BAU results from reopt.jl
+    :return: None
+    """
+    if not RESULT_CACHE_ENABLED or fingerprint is None:
+        return
+    BAUResultModel.objects.update_or_create(fingerprint=fingerprint, tolerance=tolerance,
+                                            defaults={'run_uuid': run_uuid, 'results': results,
+                                                      'created': timezone.now()})
@@ -28,13 +28,17 @@
 # OF THE POSSIBILITY OF SUCH DAMAGE.
 # *********************************************************************************
 import sys
+import copy
 import traceback
-import os
 import time
-import requests
+from requests.exceptions import ReadTimeout
 from celery import shared_task, Task
 from reo.exceptions import REoptError, OptimizationTimeout, UnexpectedError, NotOptimal, REoptFailedToStartError
 from reo.models import ModelManager
+from reo.src.result_cache import find_bau_results, save_bau_results, bau_results_seconds
+from reo.src import dfm_store
+from reo.src.julia_client import get_julia_client
+from reo.src.solve_time import estimate_solve_seconds, reopt_inputs_features, julia_request_timeout, REOPT_INPUTS
 from reo.src.profiler import Profiler
 from celery.utils.log import get_task_logger
 logger = get_task_logger(__name__)
@@ -67,6 +71,7 @@ class RunJumpModelTask(Task):
         data["messages"]["error"] = msg
         data["outputs"]["Scenario"]["status"] = "An error occurred. See messages for more."
         ModelManager.update_scenario_and_messages(data, run_uuid=data['outputs']['Scenario']['run_uuid'])
+        dfm_store.remove(data['outputs']['Scenario']['run_uuid'])  # process_results will not run
 
         self.request.chain = None  # stop the chain
         self.request.callback = None
@@ -78,21 +83,43 @@ def run_jump_model(dfm, data, bau=False):
     profiler = Profiler()
     time_dict = dict()
     name = 'reopt' if not bau else 'reopt_bau'
-    reopt_inputs = dfm['reopt_inputs'] if not bau else dfm['reopt_inputs_bau']
+    inputs_key = 'reopt_inputs' if not bau else 'reopt_inputs_bau'
+    results_key = 'results' if not bau else 'results_bau'
+    handle = None
+    if dfm_store.is_handle(dfm):  # only load the inputs for this run (see reo/src/dfm_store.py)
+        handle = dfm
+        dfm = dfm_store.load(handle, parts=[inputs_key])
+    reopt_inputs = dfm[inputs_key]
     run_uuid = data['outputs']['Scenario']['run_uuid']
     user_uuid = data['outputs']['Scenario'].get('user_uuid')
     reopt_inputs["timeout_seconds"] = data['inputs']['Scenario']['timeout_seconds']
     reopt_inputs["tolerance"] = data['inputs']['Scenario']['optimality_tolerance_bau'] if bau \
         else data['inputs']['Scenario']['optimality_tolerance_techs']
 
+    # scenarios that share BAU inputs (eg. in parametric studies) can reuse the BAU results
+    cached_bau_results = None
+    if bau:
+        try:
+            cached_bau_results = find_bau_results(dfm.get('bau_fingerprint'), reopt_inputs["tolerance"])
+        except Exception as e:
+            logger.warning("Could not look up cached BAU results: {}".format(e))
+
     logger.info("Running {} JuMP model ...".format("BAU" if bau else ""))
     try:
         t_start = time.time()
-        julia_host = os.environ.get('JULIA_HOST', "julia")
-        response = requests.post("http://" + julia_host + ":8081/job/", json=reopt_inputs)
-        results = response.json()
-        if response.status_code == 500:
-            raise REoptFailedToStartError(task=name, message=results["error"], run_uuid=run_uuid, user_uuid=user_uuid)
+        if cached_bau_results is not None:
+            logger.info("Using cached BAU results with identical BAU inputs.")
+            results = cached_bau_results
+        else:
+            estimated_seconds = estimate_solve_seconds(reopt_inputs_features(reopt_inputs), REOPT_INPUTS)
+            if estimated_seconds is not None:
+                logger.info("Estimated solve time {:.0f} seconds".format(estimated_seconds))
+            response = get_julia_client().post("job", json=reopt_inputs, timeout=julia_request_timeout(
+                reopt_inputs["timeout_seconds"], estimated_seconds))
+            results = response.json()
+            if response.status_code == 500:
+                raise REoptFailedToStartError(task=name, message=results["error"], run_uuid=run_uuid,
+                                              user_uuid=user_uuid)
         time_dict["pyjulia_run_reopt_seconds"] = time.time() - t_start
         results.update(time_dict)
 
@@ -103,6 +130,10 @@ def run_jump_model(dfm, data, bau=False):
             msg = "Optimization exceeded timeout: {} seconds.".format(data["inputs"]["Scenario"]["timeout_seconds"])
             logger.info(msg)
             raise OptimizationTimeout(task=name, message=msg, run_uuid=run_uuid, user_uuid=user_uuid)
+        elif isinstance(e, ReadTimeout):  # reopt.jl did not respond within julia_request_timeout
+            msg = "Optimization exceeded timeout: {} seconds.".format(data["inputs"]["Scenario"]["timeout_seconds"])
+            logger.error("The Julia API did not respond in time.")
+            raise OptimizationTimeout(task=name, message=msg, run_uuid=run_uuid, user_uuid=user_uuid)
         elif "RemoteDisconnected" in str(e.args[0]):
             msg = "The Julia API disconnected."
             logger.error(msg)
@@ -133,12 +164,33 @@ def run_jump_model(dfm, data, bau=False):
             )
             raise NotOptimal(task=name, run_uuid=run_uuid, status=status.strip(), user_uuid=user_uuid)
 
+    if bau and cached_bau_results is None:
+        try:
+            save_bau_results(dfm.get('bau_fingerprint'), reopt_inputs["tolerance"], run_uuid, results)
+        except Exception as e:
+            logger.warning("Could not save BAU results to the cache: {}".format(e))
+
     profiler.profileEnd()
-    ModelManager.updateModel('ProfileModel', {name+'_seconds': profiler.getDuration()}, run_uuid)
+    seconds = profiler.getDuration()
+    if cached_bau_results is not None:
+        # record the solve time of the cached run rather than the lookup time, since the ProfileModel timings are used
+        # to predict solve times (see reo/src/job_routing.py and reo/src/solve_time.py)
+        try:
+            seconds = bau_results_seconds(dfm.get('bau_fingerprint'), reopt_inputs["tolerance"])
+        except Exception as e:
+            seconds = None
+            logger.warning("Could not look up the BAU solve time of the cached results: {}".format(e))
+    if seconds is not None:
+        ModelManager.updateModel('ProfileModel', {name+'_seconds': seconds}, run_uuid)
+
+    if handle is not None:
+        dfm_store.save_part(run_uuid, results_key, dfm[results_key])
+        dfm_store.remove_part(run_uuid, inputs_key)
+        handle = copy.deepcopy(handle)
+        # process_results only uses the BAU results from the BAU run
+        handle[dfm_store.HANDLE_KEY]['parts'] = ['dfm', results_key] if not bau else [results_key]
+        return handle
 
     # reduce the amount data being transferred between tasks
-    if bau:
-        del dfm['reopt_inputs_bau']
-    else:
-        del dfm['reopt_inputs']
+    del dfm[inputs_key]
     return dfm
@@ -0,0 +1,213 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Solve time estimates from a log-linear regression trained on the solve times in ProfileModel.
+
+There are two feature sets, each with its own regression:
+    "post": features known when a job is POST'ed (see job_routing.scenario_features and job_routing.job_features),
+        used for queue routing and the estimated_solve_seconds returned in the POST response. The target is the
+        time from setup_scenario to the end of process_results (the BAU and optimal cases are solved in parallel).
+    "reopt_inputs": features of DataManager.reopt_inputs (number of techs, cost curve segments, demand tiers, TOU
+        periods, time steps, outage time steps), used to set the timeout of the request to the Julia API. The target
+        is ProfileModel.reopt_seconds.
+
+The regression coefficients are saved in SOLVE_TIME_MODEL_PATH (default reo/solve_time_model.json) by
+`python manage.py train_solve_time_model`. Without a trained model estimate_solve_seconds returns None.
+"""
+import json
+import logging
+import math
+import os
+from datetime import datetime
+import numpy as np
+from django.conf import settings
+log = logging.getLogger(__name__)
+
+SOLVE_TIME_MODEL_PATH = settings.SOLVE_TIME_MODEL_PATH
+SOLVE_TIME_TIMEOUT_MARGIN_SECONDS = settings.SOLVE_TIME_TIMEOUT_MARGIN_SECONDS
+POST = 'post'
+REOPT_INPUTS = 'reopt_inputs'
+feature_sets = [POST, REOPT_INPUTS]
+ridge_penalty = 1.0e-3  # keeps the regression well posed when a feature is constant in the training data
+
+_model = None
+_model_mtime = None
+
+
+def post_features(features):
+    """
+    Regression features from the features used for job routing
+    :param features: dict, from job_routing.scenario_features or job_routing.job_features
+    :return: dict of floats
+    """
+    d = {
+        "log_time_steps_per_hour": math.log(features["time_steps_per_hour"]),
+        "log1p_tariff_periods": math.log1p(features["tariff_periods"]),
+        "outage": float(features["outage"]),
+        "off_grid": float(features["off_grid"]),
+    }
+    for tech in features["techs"]:
+        d["tech_" + tech] = d.get("tech_" + tech, 0.0) + 1.0
+    return d
+
+
+def reopt_inputs_features(reopt_inputs):
+    """
+    Regression features from the inputs to reopt.jl
+    :param reopt_inputs: dict, DataManager.reopt_inputs or reopt_inputs_bau
+    :return: dict of floats
+    """
+    elec_rates = reopt_inputs.get('ElecRate') or []
+    return {
+        "log_time_steps": math.log(max(reopt_inputs.get('TimeStepCount') or 8760, 1)),
+        "techs": float(len(reopt_inputs.get('Tech') or [])),
+        "cost_curve_segments": float(reopt_inputs.get('CapCostSegCount') or 0),
+        "demand_tiers": float(reopt_inputs.get('DemandBinCount') or 0),
+        "demand_ratchets": float(reopt_inputs.get('NumRatchets') or 0),
+        "energy_tiers": float(reopt_inputs.get('PricingTierCount') or 0),
+        "log1p_tou_periods": math.log1p(len(set(elec_rates))),
+        "log1p_outage_time_steps": math.log1p(len(reopt_inputs.get('TimeStepsWithoutGrid') or [])),
+        "storage": float(max(reopt_inputs.get('StorageMaxSizePower') or [0]) > 0),
+        "chp": float(len(reopt_inputs.get('CHPTechs') or [])),
+        "ghp_options": float(len(reopt_inputs.get('GHPInstalledCost') or [])),
+        "off_grid": float(bool(reopt_inputs.get('OffGridFlag'))),
+    }
+
+
+def load_model():
+    """
+    :return: dict of regressions keyed by feature set (reloaded when the file changes), or an empty dict
+    """
+    global _model, _model_mtime
+    try:
+        mtime = os.path.getmtime(SOLVE_TIME_MODEL_PATH)
+    except OSError:
+        return {}
+    if _model is None or mtime != _model_mtime:
+        with open(SOLVE_TIME_MODEL_PATH, 'r') as f:
+            _model = json.load(f)
+        _model_mtime = mtime
+    return _model
+
+
+def estimate_solve_seconds(features, feature_set=POST):
+    """
+    :param features: dict, from post_features or reopt_inputs_features
+    :param feature_set: str, POST or REOPT_INPUTS
+    :return: float, estimated seconds, or None if there is no trained regression for feature_set
+    """
+    regression = load_model().get(feature_set)
+    if regression is None:
+        return None
+    log_seconds = regression["intercept"] + sum(c * features.get(name, 0.0)
+                                                 for name, c in regression["coefficients"].items())
+    return float(math.exp(log_seconds))
+
+
+def julia_request_timeout(timeout_seconds, estimated_seconds):
+    """
+    Seconds to wait for the response of reopt.jl: the optimization timeout plus SOLVE_TIME_TIMEOUT_MARGIN_SECONDS for
+    building the model, extended to twice the estimated solve time for problems that are expected to take longer, so
+    that the estimate never cuts a run short
+    :param timeout_seconds: float, optimization timeout
+    :param estimated_seconds: float or None, from estimate_solve_seconds with the REOPT_INPUTS features
+    :return: float, or None to use the default timeout when there is no estimate
+    """
+    if estimated_seconds is None:
+        return None
+    return timeout_seconds + max(SOLVE_TIME_TIMEOUT_MARGIN_SECONDS, 2 * estimated_seconds)
+
+
+def fit(feature_dicts, seconds):
+    """
+    Ridge regression of log(seconds) on the features
+    :param feature_dicts: list of dicts, from post_features or reopt_inputs_features
+    :param seconds: list of floats
+    :return: dict with the intercept, coefficients, number of runs, and r2 (on the training data)
+    """
+    names = sorted(set(name for d in feature_dicts for name in d))
+    x = np.array([[d.get(name, 0.0) for name in names] for d in feature_dicts])
+    y = np.log(np.maximum(np.array(seconds, dtype=float), 0.1))
+    x = np.hstack([np.ones((len(y), 1)), x])
+    penalty = ridge_penalty * np.eye(x.shape[1])
+    penalty[0, 0] = 0  # do not penalize the intercept
+    beta = np.linalg.solve(x.T @ x + penalty, x.T @ y)
+    residuals = y - x @ beta
+    ss_tot = float(((y - y.mean()) ** 2).sum())
+    return {
+        "intercept": float(beta[0]),
+        "coefficients": {name: float(b) for name, b in zip(names, beta[1:])},
+        "runs": len(y),
+        "r2": 1 - float((residuals ** 2).sum()) / ss_tot if ss_tot > 0 else None,
+        "trained": datetime.utcnow().isoformat(),
+    }
+
+
+def training_data(feature_set, max_runs):
+    """
+    Features and solve times of the most recent runs that have both
+    :param feature_set: str, POST or REOPT_INPUTS
+    :param max_runs: int
+    :return: (list of feature dicts, list of seconds)
+    """
+    from reo.models import ProfileModel, SolveFeaturesModel
+    field = 'post_features' if feature_set == POST else 'reopt_inputs_features'
+    features = dict(SolveFeaturesModel.objects.filter(**{field + '__isnull': False}).order_by('-id').values_list(
+        'run_uuid', field)[:max_runs])
+    profiles = ProfileModel.objects.filter(run_uuid__in=list(features.keys()), reopt_seconds__isnull=False)
+    feature_dicts, seconds = [], []
+    for p in profiles:
+        if feature_set == POST:
+            s = (p.setup_scenario_seconds or 0) + max(p.reopt_seconds, p.reopt_bau_seconds or 0) + \
+                (p.parse_run_outputs_seconds or 0)
+        else:
+            s = p.reopt_seconds
+        feature_dicts.append(features[p.run_uuid])
+        seconds.append(s)
+    return feature_dicts, seconds
+
+
+def train(max_runs=5000, min_runs=50):
+    """
+    Fit the regression for each feature set and save them to SOLVE_TIME_MODEL_PATH
+    :param max_runs: int, number of most recent runs to use
+    :param min_runs: int, feature sets with fewer runs are not fit (and keep their previous regression)
+    :return: dict, the saved regressions
+    """
+    model = dict(load_model())
+    for feature_set in feature_sets:
+        feature_dicts, seconds = training_data(feature_set, max_runs)
+        if len(seconds) < min_runs:
+            log.warning("Only {} runs with {} features, not training.".format(len(seconds), feature_set))
+            continue
+        model[feature_set] = fit(feature_dicts, seconds)
+    with open(SOLVE_TIME_MODEL_PATH, 'w') as f:
+        json.dump(model, f, indent=2, sort_keys=True)
+    return model
@@ -0,0 +1,157 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Cache of parsed URDB rates.
+
+UrdbParse.parse_rate output (the REoptArgs and the energy and demand rate summaries) only depends on the URDB response
+and a few ElectricTariff inputs (load_year, time_steps_per_hour, custom TOU energy rates, wholesale and export rates,
+CHP standby inputs) and on whether there are any techs that can export. parse_rate looks up the key of those inputs in a
+bounded in-process LRU, and then in the shared store if TARIFF_CACHE_PATH is set, and only parses the rate on a miss.
+
+Settings: TARIFF_CACHE_ENABLED, TARIFF_CACHE_SIZE, and TARIFF_CACHE_PATH (see reopt_api/performance_settings.py)
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from reo.src import file_cache
+log = logging.getLogger(__name__)
+
+TARIFF_CACHE_ENABLED = settings.TARIFF_CACHE_ENABLED
+TARIFF_CACHE_SIZE = settings.TARIFF_CACHE_SIZE
+TARIFF_CACHE_PATH = settings.TARIFF_CACHE_PATH
+
+# increment when a change to UrdbParse changes the parsed rates so that the shared store is not used for stale entries
+PARSER_VERSION = 1
+
+_lru = OrderedDict()
+_lock = threading.Lock()
+
+
+def _json_default(obj):
+    if hasattr(obj, 'tolist'):  # numpy arrays and scalars
+        return obj.tolist()
+    return str(obj)
+
+
+def tariff_key(urdb_response, year, time_steps_per_hour, wholesale_rate, excess_rate, custom_tou_energy_rates,
+               add_tou_energy_rates_to_urdb_rate, override_urdb_rate_with_tou_energy_rates,
+               chp_standby_rate_us_dollars_per_kw_per_month, chp_does_not_reduce_demand_charges, big_number,
+               has_techs, has_bau_techs):
+    """
+    Key of the parsed rate: the URDB label followed by a hash of the URDB response and the parse context. Must be
+    called before parsing since RateData modifies the URDB response.
+    :return: str
+    """
+    context = {
+        'version': PARSER_VERSION,
+        'urdb_response': urdb_response,
+        'year': year,
+        'time_steps_per_hour': time_steps_per_hour,
+        'wholesale_rate': wholesale_rate,
+        'excess_rate': excess_rate,
+        'custom_tou_energy_rates': custom_tou_energy_rates,
+        'add_tou_energy_rates_to_urdb_rate': add_tou_energy_rates_to_urdb_rate,
+        'override_urdb_rate_with_tou_energy_rates': override_urdb_rate_with_tou_energy_rates,
+        'chp_standby_rate_us_dollars_per_kw_per_month': chp_standby_rate_us_dollars_per_kw_per_month,
+        'chp_does_not_reduce_demand_charges': chp_does_not_reduce_demand_charges,
+        'big_number': big_number,
+        'has_techs': has_techs,
+        'has_bau_techs': has_bau_techs,
+    }
+    digest = hashlib.sha256(
+        json.dumps(context, sort_keys=True, separators=(',', ':'), default=_json_default).encode()
+    ).hexdigest()
+    label = str((urdb_response or dict()).get('label') or 'custom')
+    return '{}-{}'.format(''.join(c for c in label if c.isalnum())[:32], digest)
+
+
+def _store_path(key):
+    return os.path.join(TARIFF_CACHE_PATH, key + '.pkl')
+
+
+def _read_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _remember(key, value):
+    with _lock:
+        _lru[key] = value
+        _lru.move_to_end(key)
+        while len(_lru) > max(TARIFF_CACHE_SIZE, 0):
+            _lru.popitem(last=False)
+
+
+def get(key):
+    """
+    :param key: str, from tariff_key
+    :return: dict with "reopt_args" (dict of REoptArgs attributes), "energy_rates_summary", and
+        "demand_rates_summary", or None if the rate has not been parsed. The caller owns the returned copy.
+    """
+    if not TARIFF_CACHE_ENABLED:
+        return None
+    with _lock:
+        value = _lru.get(key)
+        if value is not None:
+            _lru.move_to_end(key)
+    if value is None and TARIFF_CACHE_PATH:
+        value = file_cache.load(_store_path(key), _read_pickle, "parsed tariff {}".format(key))
+        if value is not None:
+            _remember(key, value)
+    return copy.deepcopy(value)
+
+
+def put(key, value):
+    """
+    :param key: str, from tariff_key
+    :param value: dict, see get
+    :return: None
+    """
+    if not TARIFF_CACHE_ENABLED:
+        return
+    value = copy.deepcopy(value)
+    _remember(key, value)
+    if TARIFF_CACHE_PATH:
+        file_cache.save(_store_path(key), lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL),
+                        "parsed tariff {}".format(key))
+
+
+def clear():
+    """
+    Empty the in-process LRU (the shared store is left as is)
+    """
+    with _lock:
+        _lru.clear()
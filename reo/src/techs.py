@@ -28,7 +28,7 @@
 # OF THE POSSIBILITY OF SUCH DAMAGE.
 # *********************************************************************************
 from reo.src.data_manager import big_number
-from reo.src.pvwatts import PVWatts
+from reo.src.pvwatts_local import get_pvwatts
 from reo.src.wind import WindSAMSDK
 from reo.src.incentives import Incentives, IncentivesNoProdBased
 from reo.utilities import TONHOUR_TO_KWHT, generate_year_profile_hourly, MMBTU_TO_KWH
@@ -110,7 +110,7 @@ class PV(Tech):
 
     def __init__(self, dfm, degradation_pct, time_steps_per_hour=1, acres_per_kw=6e-3, kw_per_square_foot=0.01,
                  existing_kw=0.0, tilt=0.537, azimuth=180, pv_number=1, location='both', prod_factor_series_kw=None,
-                 **kwargs):
+                 pvwatts=None, **kwargs):
         super(PV, self).__init__(**kwargs)
 
         self.degradation_pct = degradation_pct
@@ -120,8 +120,6 @@ class PV(Tech):
         self.kw_per_square_foot = kw_per_square_foot
         self.time_steps_per_hour = time_steps_per_hour
         self.incentives = Incentives(**kwargs)
-        self.tilt = tilt
-        self.azimuth = azimuth
         self.pvwatts_prod_factor = None
         self.existing_kw = existing_kw
         self.prod_factor_series_kw = prod_factor_series_kw
@@ -131,25 +129,15 @@ class PV(Tech):
         self.pvwatts = None
         self.sr_required_pct = kwargs.get("sr_required_pct")
 
-        # If site is in southern hemisphere and user has not changed from default azimuth of 180, update to 0 for all array types
-        if kwargs.get('latitude') < 0:
-            if self.azimuth == 180: # Assume user does not want array facing away from equator
-                self.azimuth = 0
-        # if user hasn't entered the tilt (default value is 0.537), tilt value gets assigned based on array_type
-        if self.tilt == 0.537:
-            if kwargs.get('array_type') == 0:  # 0 are Ground Mount Fixed (Open Rack) arrays, we assume an optimal tilt
-                """
-                start assuming the site is in the northern hemisphere, set the tilt to the latitude and leave the
-                default azimuth of 180 (unless otherwise specified)
-                """
-                self.tilt = abs(kwargs.get('latitude')) # if site is in southern hemisphere will set tilt to positive latitude value
-            else:  # All other tilts come from lookup table included in the array_type_to_tilt_angle dictionary above
-                self.tilt = PV.array_type_to_tilt_angle[kwargs.get('array_type')]
+        self.tilt, self.azimuth = PV.default_orientation(kwargs.get('latitude'), kwargs.get('array_type'), tilt,
+                                                         azimuth)
 
         if self.prod_factor_series_kw is not None:  # then don't call PVWatts
             self.station = (kwargs.get("latitude", 0), kwargs.get("longitude", 0), 0)
+        elif pvwatts is not None:  # fetched ahead of time, see reo/src/prefetch.py
+            self.pvwatts = pvwatts
         else:
-            self.pvwatts = PVWatts(time_steps_per_hour=self.time_steps_per_hour, azimuth=self.azimuth, tilt=self.tilt, **self.kwargs)
+            self.pvwatts = get_pvwatts(time_steps_per_hour=self.time_steps_per_hour, azimuth=self.azimuth, tilt=self.tilt, **self.kwargs)
 
         dfm.add_pv(self)
 
@@ -172,6 +160,32 @@ class PV(Tech):
             station = self.station
         return station
 
+    @staticmethod
+    def default_orientation(latitude, array_type, tilt=0.537, azimuth=180):
+        """
+        Tilt and azimuth of a PV array with the defaults that depend on the site and array_type filled in
+        :param latitude: float
+        :param array_type: int
+        :param tilt: float, 0.537 if not entered by the user
+        :param azimuth: float, 180 if not entered by the user
+        :return: tuple of tilt and azimuth
+        """
+        # If site is in southern hemisphere and user has not changed from default azimuth of 180, update to 0 for all array types
+        if latitude < 0:
+            if azimuth == 180: # Assume user does not want array facing away from equator
+                azimuth = 0
+        # if user hasn't entered the tilt (default value is 0.537), tilt value gets assigned based on array_type
+        if tilt == 0.537:
+            if array_type == 0:  # 0 are Ground Mount Fixed (Open Rack) arrays, we assume an optimal tilt
+                """
+                start assuming the site is in the northern hemisphere, set the tilt to the latitude and leave the
+                default azimuth of 180 (unless otherwise specified)
+                """
+                tilt = abs(latitude) # if site is in southern hemisphere will set tilt to positive latitude value
+            else:  # All other tilts come from lookup table included in the array_type_to_tilt_angle dictionary above
+                tilt = PV.array_type_to_tilt_angle[array_type]
+        return tilt, azimuth
+
 
 class Wind(Tech):
     size_class_to_hub_height = {
@@ -211,7 +225,7 @@ class Wind(Tech):
     }
 
     def __init__(self, dfm, inputs_path, acres_per_kw=.03, time_steps_per_hour=1, api_version=1,
-                prod_factor_series_kw=None, **kwargs):
+                prod_factor_series_kw=None, sam_prod_factor=None, **kwargs):
         super(Wind, self).__init__(**kwargs)
 
         self.path_inputs = inputs_path
@@ -234,7 +248,7 @@ class Wind(Tech):
             self.installed_cost_us_dollars_per_kw = \
                 Wind.size_class_to_installed_cost[api_version][kwargs.get('size_class')]
 
-        self.sam_prod_factor = None
+        self.sam_prod_factor = sam_prod_factor  # can be run ahead of time, see reo/src/prefetch.py
         dfm.add_wind(self)
 
     @property
@@ -245,13 +259,26 @@ class Wind(Tech):
         """
         if self.prod_factor_series_kw is None:
             if self.sam_prod_factor is None:
-                sam = WindSAMSDK(path_inputs=self.path_inputs, hub_height_meters=self.hub_height_meters,
-                                 time_steps_per_hour=self.time_steps_per_hour, **self.kwargs)
-                self.sam_prod_factor = sam.wind_prod_factor()
+                self.sam_prod_factor = Wind.run_sam(self.path_inputs, time_steps_per_hour=self.time_steps_per_hour,
+                                                    **self.kwargs)
             return self.sam_prod_factor
         else:
             return self.prod_factor_series_kw
 
+    @staticmethod
+    def run_sam(inputs_path, size_class, time_steps_per_hour=1, **kwargs):
+        """
+        Download the wind resource and run the SAM SDK windpower model
+        :param inputs_path: str, folder where resource data should download
+        :param size_class: str
+        :param time_steps_per_hour: int
+        :param kwargs: Wind inputs, including latitude and longitude
+        :return: wind turbine production factor for 1kW system for 1 year
+        """
+        sam = WindSAMSDK(path_inputs=inputs_path, hub_height_meters=Wind.size_class_to_hub_height[size_class],
+                         size_class=size_class, time_steps_per_hour=time_steps_per_hour, **kwargs)
+        return sam.wind_prod_factor()
+
 
 class Generator(Tech):
 
@@ -0,0 +1,120 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+NumPy helpers for validating and resampling time-series inputs, shared by the v1 (reo) and v3 (job) input validators.
+
+Each series is converted to a float array once and then checked and resampled with array operations instead of
+building a pandas Series (and a DatetimeIndex) for every input:
+    - to_array returns None for anything that is not a flat list of numbers so that callers can fall back to their
+      element-wise conversion and keep their error messages
+    - downsampling takes the mean of each block of time steps with a compensated (Kahan) sum, which gives exactly the
+      values of the pandas resample().mean() that it replaces
+    - upsampling repeats each value (forward-fill)
+"""
+import numpy as np
+
+VALID_LENGTHS = [8760, 17520, 35040]  # hourly, 30 minute, and 15 minute samples
+
+
+def to_array(series):
+    """
+    Convert a time series to a float array.
+    :param series: list of numbers
+    :return: 1-d numpy array of floats, or None if the series is not a flat list of numbers (eg. it contains None,
+        strings, or lists)
+    """
+    try:
+        arr = np.asarray(series)
+    except (ValueError, TypeError):  # ragged nested lists
+        return None
+    if arr.ndim != 1 or arr.dtype.kind not in 'biuf':
+        return None
+    return arr.astype(float)
+
+
+def has_non_finite(arr):
+    """
+    :param arr: numpy array of floats
+    :return: bool, True if any value is NaN or infinite
+    """
+    return not bool(np.isfinite(arr).all())
+
+
+def time_steps_per_hour_of(series):
+    """
+    :param series: list or array
+    :return: int, the time steps per hour (one of [1, 2, 4]) implied by the length of the series, or None if the
+        series is not hourly, 30 minute, or 15 minute
+    """
+    n = len(series)
+    if n not in VALID_LENGTHS:
+        return None
+    return n // 8760
+
+
+def resample(series, time_steps_per_hour_in, time_steps_per_hour_out):
+    """
+    Down-sample a time series by averaging each block of time steps or up-sample it by repeating each value.
+    :param series: list or array of floats without NaNs, with 8760 * time_steps_per_hour_in values
+    :param time_steps_per_hour_in: int, one of [1, 2, 4]
+    :param time_steps_per_hour_out: int, one of [1, 2, 4]
+    :return: list of floats with 8760 * time_steps_per_hour_out values
+    """
+    arr = np.asarray(series, dtype=float)
+    if time_steps_per_hour_out < time_steps_per_hour_in:
+        steps = int(time_steps_per_hour_in // time_steps_per_hour_out)
+        blocks = arr.reshape(-1, steps)
+        total = np.zeros(blocks.shape[0])
+        compensation = np.zeros(blocks.shape[0])
+        for column in blocks.T:  # at most 4 columns, each summed across all blocks at once
+            y = column - compensation
+            t = total + y
+            compensation = (t - total) - y
+            total = t
+        return (total / steps).tolist()
+    if time_steps_per_hour_out > time_steps_per_hour_in:
+        return np.repeat(arr, int(time_steps_per_hour_out // time_steps_per_hour_in)).tolist()
+    return arr.tolist()
+
+
+def first_invalid_timestep(series, max_timesteps):
+    """
+    :param series: list of timesteps, None values are ignored
+    :param max_timesteps: int, largest valid timestep
+    :return: the first value that is not an integer between 1 and max_timesteps inclusive, or None if all are valid
+    """
+    values = [ts for ts in series if ts is not None]
+    arr = to_array(values)
+    if arr is None:
+        return next((ts for ts in values if ts < 1 or ts > max_timesteps or ts % 1 > 0), None)
+    invalid = np.flatnonzero((arr < 1) | (arr > max_timesteps) | (arr % 1 > 0))
+    if invalid.size == 0:
+        return None
+    return values[invalid[0]]
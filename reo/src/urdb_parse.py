@@ -30,11 +30,32 @@
 import calendar
 import numpy
 import logging
+from functools import lru_cache
+from reo.src import tariff_cache
 log = logging.getLogger(__name__)
 
 cum_days_in_yr = numpy.cumsum(calendar.mdays)
 
 
+@lru_cache(maxsize=None)
+def hour_index(year):
+    """
+    Month, hour of day, and weekday flag of each hour of the year as laid out in REopt time series: 365 days with
+    28 days in February (the leap day is skipped), with weekdays from the actual calendar of year
+    :param year: int
+    :return: (month (zero-indexed), hour of day, is_weekday) read-only numpy arrays of length 8760
+    """
+    month, is_weekday = [], []
+    for m in range(12):
+        for day in range(calendar.mdays[m + 1]):
+            month.append(m)
+            is_weekday.append(calendar.weekday(year, m + 1, day + 1) < 5)
+    index = (numpy.repeat(month, 24), numpy.tile(numpy.arange(24), len(month)), numpy.repeat(is_weekday, 24))
+    for a in index:
+        a.flags.writeable = False
+    return index
+
+
 class REoptArgs:
 
     def __init__(self, big_number):
@@ -185,6 +206,7 @@ class UrdbParse:
         self.energy_rates_summary = []
         self.demand_rates_summary = []
         self.energy_costs = []
+        self.demand_periods_in_month = dict()
         self.has_fixed_demand = "no"
         self.has_tou_demand = "no"
         self.has_demand_tiers = "no"
@@ -204,6 +226,18 @@ class UrdbParse:
     def parse_rate(self, utility, rate):
         log.info("Processing: " + utility + ", " + rate)
 
+        cache_key = tariff_cache.tariff_key(
+            self.urdb_rate, self.year, self.time_steps_per_hour, self.wholesale_rate, self.excess_rate,
+            self.custom_tou_energy_rates, self.add_tou_energy_rates_to_urdb_rate,
+            self.override_urdb_rate_with_tou_energy_rates, self.chp_standby_rate_us_dollars_per_kw_per_month,
+            self.chp_does_not_reduce_demand_charges, self.big_number, len(self.techs) > 0, len(self.bau_techs) > 0)
+        cached = tariff_cache.get(cache_key)
+        if cached is not None:
+            self.reopt_args.__dict__.update(cached['reopt_args'])
+            self.energy_rates_summary = cached['energy_rates_summary']
+            self.demand_rates_summary = cached['demand_rates_summary']
+            return self.reopt_args
+
         current_rate = RateData(self.urdb_rate)
 
         if self.override_urdb_rate_with_tou_energy_rates:
@@ -228,7 +262,10 @@ class UrdbParse:
         self.reopt_args.chp_standby_rate_us_dollars_per_kw_per_month_bau, \
         self.reopt_args.chp_does_not_reduce_demand_charges_bau, \
         = self.prepare_techs_and_loads(self.bau_techs)
-        
+
+        tariff_cache.put(cache_key, {'reopt_args': vars(self.reopt_args),
+                                     'energy_rates_summary': self.energy_rates_summary,
+                                     'demand_rates_summary': self.demand_rates_summary})
         return self.reopt_args
 
     def prepare_summary(self, current_rate):
@@ -330,53 +367,38 @@ class UrdbParse:
             self.reopt_args.energy_max_in_tiers.append(self.big_number)
             log.warning("Cannot handle max usage units of " + energy_tier_unit + "! Using average rate")
 
-        for tier in range(0, self.reopt_args.energy_tiers_num):
-            hour_of_year = 0
-            for month in range(0, 12):
-                for day in range(0, self.days_in_month[month]):
-
-                    if calendar.weekday(self.year, month + 1, day + 1) < 5:
-                        is_weekday = True
-                    else:
-                        is_weekday = False
-
-                    energy_ts_per_hour = int(len(current_rate.energyweekdayschedule[0])/24)
-                    simulation_time_steps_per_rate_time_step = int(self.time_steps_per_hour / energy_ts_per_hour)
-                    for hour in range(0, 24):
-                        energy_ts = hour * energy_ts_per_hour
-                        for ts in range(energy_ts_per_hour):
-                            if is_weekday:
-                                period = int(current_rate.energyweekdayschedule[month][energy_ts])
-                            else:
-                                period = int(current_rate.energyweekendschedule[month][energy_ts])
-
-                            # workaround for cases where there are different numbers of tiers in periods
-                            n_tiers_in_period = len(current_rate.energyratestructure[period])
-
-                            if n_tiers_in_period == 1:
-                                tier_use = 0  # use the first and only tier in the period
-                            elif tier > n_tiers_in_period-1:  # 'tier' is indexed on zero
-                                tier_use = n_tiers_in_period-1  # use last tier in current period, which has less tiers than the maximum tiers for any period
-                            else:
-                                tier_use = tier
-
-                            if average_rates:
-                                rate = rate_average
-                            else:
-                                rate = float(current_rate.energyratestructure[period][tier_use].get('rate') or 0)
-
-                            adj = float(current_rate.energyratestructure[period][tier_use].get('adj') or 0)
-                            total_rate = rate + adj
-
-                            for step in range(0, simulation_time_steps_per_rate_time_step):
-                                if self.add_tou_energy_rates_to_urdb_rate:
-                                    idx = hour_of_year  # len(self.custom_tou_energy_rates) == 8760:
-                                    if len(self.custom_tou_energy_rates) == 35040:
-                                        idx = hour_of_year * 4 + step
-                                    total_rate = rate + adj + self.custom_tou_energy_rates[idx]
-                                self.energy_costs.append(total_rate)
-                            energy_ts += 1
-                        hour_of_year += 1
+        # total rate (rate + adj) of each period and tier
+        # workaround for cases where there are different numbers of tiers in periods: use the last tier in periods
+        # with fewer tiers than the maximum tiers for any period
+        total_rates = numpy.zeros((n_periods, self.reopt_args.energy_tiers_num))
+        for period, energy_rate in enumerate(current_rate.energyratestructure):
+            for tier in range(self.reopt_args.energy_tiers_num):
+                tier_use = min(tier, len(energy_rate) - 1)
+                if average_rates:
+                    rate = rate_average
+                else:
+                    rate = float(energy_rate[tier_use].get('rate') or 0)
+                adj = float(energy_rate[tier_use].get('adj') or 0)
+                total_rates[period, tier] = rate + adj
+
+        # period of each (hour of year, rate time step in hour)
+        energy_ts_per_hour = int(len(current_rate.energyweekdayschedule[0])/24)
+        simulation_time_steps_per_rate_time_step = int(self.time_steps_per_hour / energy_ts_per_hour)
+        month, hour, is_weekday = hour_index(self.year)
+        energy_ts = hour[:, None] * energy_ts_per_hour + numpy.arange(energy_ts_per_hour)
+        periods = numpy.where(is_weekday[:, None],
+                              numpy.array(current_rate.energyweekdayschedule, dtype=int)[month[:, None], energy_ts],
+                              numpy.array(current_rate.energyweekendschedule, dtype=int)[month[:, None], energy_ts])
+
+        # costs indexed on (hour of year, rate time step, simulation time step, tier)
+        costs = numpy.repeat(total_rates[periods][:, :, None, :], simulation_time_steps_per_rate_time_step, axis=2)
+        if self.add_tou_energy_rates_to_urdb_rate:
+            hour_of_year = numpy.arange(8760)[:, None, None]
+            idx = hour_of_year  # len(self.custom_tou_energy_rates) == 8760:
+            if len(self.custom_tou_energy_rates) == 35040:
+                idx = hour_of_year * 4 + numpy.arange(simulation_time_steps_per_rate_time_step)
+            costs = costs + numpy.array(self.custom_tou_energy_rates, dtype=float)[idx][..., None]
+        self.energy_costs.extend(costs.transpose(3, 0, 1, 2).ravel().tolist())
 
     def prepare_techs_and_loads(self, techs):
 
@@ -645,31 +667,30 @@ class UrdbParse:
         :param period: int (zero-indexed)
         :return: list of ints (indexed on 1)
         """
-        step_array = []
         start_step = 1
-
-        demand_ts_per_hour = int(len(current_rate.demandweekdayschedule[0]) / 24)
-        simulation_time_steps_per_rate_time_step = int(self.time_steps_per_hour / demand_ts_per_hour)
-
-
         if month > 0:
             start_step = (self.last_hour_in_month[month - 1]) * self.time_steps_per_hour + 1
 
-        step_of_year = start_step
+        return (start_step + numpy.flatnonzero(self.get_demand_periods_in_month(current_rate, month) == period)).tolist()
 
-        for day in range(0, self.days_in_month[month]):
-            if calendar.weekday(self.year, month + 1, day + 1) < 5:
-                is_weekday = True
-            else:
-                is_weekday = False
-
-            for hour in range(0, 24):
-                for ts in range(demand_ts_per_hour):
-                    demand_ts = hour + ts
-                    for step in range(0, simulation_time_steps_per_rate_time_step): # this fails to loop if time_steps_per_hour < demand_ts_per_hour
-                        if is_weekday and current_rate.demandweekdayschedule[month][demand_ts] == period:
-                            step_array.append(step_of_year)
-                        elif not is_weekday and current_rate.demandweekendschedule[month][demand_ts] == period:
-                            step_array.append(step_of_year)
-                        step_of_year += 1
-        return step_array
+    def get_demand_periods_in_month(self, current_rate, month):
+        """
+        Get the demand TOU period of every time step in a month, computed once per rate and month
+        :param current_rate: RateData class instance
+        :param month: int (zero-indexed)
+        :return: numpy array of the periods (as given in the demand schedules) of the time steps in the month
+        """
+        key = (id(current_rate), month)
+        if key not in self.demand_periods_in_month:
+            demand_ts_per_hour = int(len(current_rate.demandweekdayschedule[0]) / 24)
+            simulation_time_steps_per_rate_time_step = int(self.time_steps_per_hour / demand_ts_per_hour)
+            month_of_hour, hour, is_weekday = hour_index(self.year)
+            in_month = month_of_hour == month
+            demand_ts = hour[in_month][:, None] + numpy.arange(demand_ts_per_hour)
+            periods = numpy.where(is_weekday[in_month][:, None],
+                                  numpy.array(current_rate.demandweekdayschedule[month], dtype=object)[demand_ts],
+                                  numpy.array(current_rate.demandweekendschedule[month], dtype=object)[demand_ts])
+            # this is empty if time_steps_per_hour < demand_ts_per_hour
+            periods = numpy.repeat(periods.ravel(), simulation_time_steps_per_rate_time_step)
+            self.demand_periods_in_month[key] = (current_rate, periods)
+        return self.demand_periods_in_month[key][1]
@@ -41,8 +41,8 @@ NOTE:
     version=4 is International URDB
     The same rate will have different labels between versions 3 and 4!
 
-The Rate class checks a local JSON cache for desired rate before checking URDB.
-If rate cache does not exist it makes a new one and adds the rate to it.
+The Rate class checks the local rate store (reo/src/urdb_store.py) for the desired rate before checking URDB, and
+adds every rate that it finds in URDB to the store. With URDB_OFFLINE set, rates that are not in the store are not found.
 
 Example usage:
 
@@ -53,44 +53,49 @@ my_rate2 = Rate(rate='Residential Time of Use', util='United Power, Inc')
 import requests
 import json
 import logging
+from django.db import DatabaseError
+from reo.src import urdb_store
 log = logging.getLogger(__name__)
 
-# cache_file = "rate_cache.json"
-# try:
-#     with open(cache_file, 'rb') as f:
-#         rate_cache = json.load(f)
-#
-# except ValueError as e:
-#     log("INFO", "Could not find rate cache. Making new {}.".format(cache_file))
-#     rate_cache = dict()
-# except IOError:
-#     log("INFO", "Could not find rate cache. Making new {}.".format(cache_file))
-#     rate_cache = dict()
-
 
 class Rate(object):
 
-    def __init__(self, rate, util=None):
+    def __init__(self, rate, util=None, offline=False):
         """
         :param rate: str, rate name (must include util name) or rate label
         :param util: str, optional
+        :param offline: bool, only look in the URDB rate store (as with URDB_OFFLINE)
         """
         self.util = util
         self.rate = rate  # rate name string
+        self.offline = offline
 
         self.urdb_dict = self.get_rate() # can return None
 
     def get_rate(self):
 
-        # try:
-        #     rate_dict = rate_cache[self.rate]
-        #     log("INFO", 'Found rate in cache.')
-        #
-        # except KeyError:
+        if urdb_store.URDB_STORE_ENABLED:
+            try:
+                rate_dict = urdb_store.find(self.rate, self.util, any_age=urdb_store.URDB_OFFLINE or self.offline)
+            except DatabaseError as e:
+                log.warning('Could not check the URDB rate store for {}: {}'.format(self.rate, e))
+                rate_dict = None
+            if rate_dict is not None:
+                log.info('Found rate in the URDB rate store.')
+                return rate_dict
+
+        if urdb_store.URDB_OFFLINE or self.offline:
+            log.info('Could not find {} in the URDB rate store (offline).'.format(self.rate))
+            return None
+
         rate_dict = self.download_rate()
         if rate_dict is not None:
             log.info('Found rate in URDB.')
-                # self.add_rate_to_cache(rate_dict, rate_cache)
+            if urdb_store.URDB_STORE_ENABLED:
+                try:
+                    urdb_store.save(rate_dict)
+                except DatabaseError as e:
+                    log.warning('Could not save {} to the URDB rate store: {}'.format(self.rate, e))
         else:
             return None
 
@@ -0,0 +1,165 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Local store of URDB rates, indexed by label and by (utility, rate name).
+
+reo.src.urdb_rate.Rate looks up rates here before going to the URDB API, and saves every rate that it downloads, so
+that validation never downloads a rate that has been seen before. A label always refers to the same rate, but a
+utility can publish a new rate under the same name, so lookups by name only use rates that were saved in the last
+URDB_STORE_NAME_MAX_AGE_SECONDS (unless offline). The store can be filled ahead of time from a URDB JSON dump with:
+
+    python manage.py import_urdb_rates <path to dump>
+
+Settings: URDB_STORE_ENABLED, URDB_STORE_NAME_MAX_AGE_SECONDS, and URDB_OFFLINE, to never download rates from URDB
+(see reopt_api/performance_settings.py)
+"""
+import gzip
+import json
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from reo.models import URDBRateModel
+log = logging.getLogger(__name__)
+
+URDB_STORE_ENABLED = settings.URDB_STORE_ENABLED
+URDB_OFFLINE = settings.URDB_OFFLINE
+URDB_STORE_NAME_MAX_AGE_SECONDS = settings.URDB_STORE_NAME_MAX_AGE_SECONDS
+
+
+def is_label(rate, util=None):
+    """
+    Same rule as Rate.download_rate: there are no spaces in rate labels
+    """
+    return " " not in rate or util is None
+
+
+def _startdate(rate_dict):
+    try:
+        return int(rate_dict.get('startdate'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _model_fields(rate_dict, source):
+    return dict(utility=rate_dict.get('utility'), name=rate_dict.get('name'), startdate=_startdate(rate_dict),
+                rate=rate_dict, source=source)
+
+
+def find(rate, util=None, any_age=False):
+    """
+    :param rate: str, rate label, or rate name if util is provided
+    :param util: str, utility name, optional
+    :param any_age: bool, also use rates found by name that are older than URDB_STORE_NAME_MAX_AGE_SECONDS
+    :return: URDB rate dict or None. For a rate name the newest rate of that name is returned.
+    """
+    if is_label(rate, util):
+        obj = URDBRateModel.objects.filter(label=rate).first()
+    else:
+        objs = URDBRateModel.objects.filter(utility=util, name=rate)
+        if not any_age:
+            objs = objs.filter(updated__gte=timezone.now() - timedelta(seconds=URDB_STORE_NAME_MAX_AGE_SECONDS))
+        obj = objs.order_by(F('startdate').desc(nulls_last=True), '-id').first()
+    return obj.rate if obj is not None else None
+
+
+def save(rate_dict, source='download'):
+    """
+    Add or update a rate
+    :param rate_dict: URDB rate dict, rates without a label are not saved
+    :param source: str, where the rate came from
+    :return: None
+    """
+    if not rate_dict.get('label'):
+        return
+    URDBRateModel.objects.update_or_create(label=rate_dict['label'], defaults=_model_fields(rate_dict, source))
+
+
+def import_rates(rates, source='import', batch_size=1000):
+    """
+    Bulk add or update rates
+    :param rates: iterable of URDB rate dicts, rates without a label are skipped
+    :param source: str, where the rates came from
+    :param batch_size: int, number of rates written per query
+    :return: int, number of rates imported
+    """
+    n = 0
+    batch = dict()
+    for rate_dict in rates:
+        if not isinstance(rate_dict, dict) or not rate_dict.get('label'):
+            continue
+        batch[rate_dict['label']] = rate_dict
+        if len(batch) >= batch_size:
+            n += _import_batch(batch, source)
+            batch = dict()
+    if batch:
+        n += _import_batch(batch, source)
+    return n
+
+
+def _import_batch(batch, source):
+    with transaction.atomic():
+        existing = {obj.label: obj for obj in URDBRateModel.objects.filter(label__in=list(batch.keys()))}
+        new, updated = [], []
+        now = timezone.now()  # bulk_update does not set auto_now fields
+        for label, rate_dict in batch.items():
+            fields = _model_fields(rate_dict, source)
+            if label in existing:
+                obj = existing[label]
+                for k, v in fields.items():
+                    setattr(obj, k, v)
+                obj.updated = now
+                updated.append(obj)
+            else:
+                new.append(URDBRateModel(label=label, **fields))
+        URDBRateModel.objects.bulk_create(new)
+        URDBRateModel.objects.bulk_update(updated, ['utility', 'name', 'startdate', 'rate', 'source', 'updated'])
+    return len(batch)
+
+
+def read_dump(path):
+    """
+    Read the rates in a URDB JSON dump: a URDB API response ({"items": [...]}), a list of rates, or one rate per line.
+    Files ending in .gz are decompressed.
+    :param path: str
+    :return: list of URDB rate dicts
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f:
+        text = f.read()
+    try:
+        data = json.loads(text, strict=False)
+    except ValueError:
+        return [json.loads(line, strict=False) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        data = data.get('items', [data])
+    return data
@@ -31,6 +31,7 @@ import csv
 import numpy as np
 import os
 from .sscapi import PySSC
+from reo.src import wind_cache
 
 """
 Generic NREL powercurves for different scales of turbines as defined in SAM as
@@ -213,6 +214,8 @@ class WindSAMSDK:
         self.time_steps_per_hour = time_steps_per_hour
         self.interval = time_step_hour_to_minute_interval_lookup[round(float(time_steps_per_hour), 2)]
         self.use_input_data = False
+        self.prod_factor_key = None
+        self.cached_prod_factor = None
 
         if file_resource_full is not None:
             self.file_resource_full = file_resource_full
@@ -228,7 +231,6 @@ class WindSAMSDK:
 
         # If we need to download the resource data
         elif file_resource_full is None or not self.file_downloaded:
-            # TODO: check input_files for previously downloaded wind resource file
             from reo.src.wind_resource import get_wind_resource_developer_api
 
             # evaluate hub height, determine what heights of resource data are required
@@ -259,19 +261,37 @@ class WindSAMSDK:
                 file_resource_full += "_" + str(h) + 'm'
             file_resource_full += ".srw"
 
-            for height, f in file_resource_heights.items():
-                success = get_wind_resource_developer_api(
-                    filename=f,
-                    year=self.year,
-                    latitude=self.latitude,
-                    longitude=self.longitude,
-                    hub_height_meters=height)
-                if not success:
-                    raise ValueError('Unable to download wind data')
-
-            # combine into one file to pass to SAM
-            if len(heights) > 1:
-                self.file_downloaded = combine_wind_files(file_resource_heights, file_resource_full)
+            # sites in a Wind Toolkit grid cell that has already been modeled skip the download and SAM
+            cell = wind_cache.grid_cell(latitude, longitude)
+            if cell is not None:
+                self.prod_factor_key = wind_cache.prod_factor_key(cell, year, hub_height_meters, size_class,
+                                                                  time_steps_per_hour)
+                cached = wind_cache.get(self.prod_factor_key)
+                if cached is not None:
+                    self.cached_prod_factor = cached['prod_factor'].tolist()
+
+            if self.cached_prod_factor is None:
+                resources = []
+                for height, f in file_resource_heights.items():
+                    key = wind_cache.resource_key(cell, year, height, self.interval) if cell is not None else None
+                    resource = wind_cache.get(key) if key is not None else None
+                    if resource is None:
+                        success = get_wind_resource_developer_api(
+                            filename=f,
+                            year=self.year,
+                            latitude=self.latitude,
+                            longitude=self.longitude,
+                            hub_height_meters=height)
+                        if not success:
+                            raise ValueError('Unable to download wind data')
+                        resource = wind_cache.read_srw(f)
+                        if key is not None:
+                            wind_cache.put(key, **resource)
+                    resources.append(resource)
+
+                # combine into one file to pass to SAM
+                wind_cache.write_srw(resources, file_resource_full)
+                self.file_downloaded = True
 
         self.file_resource_full = file_resource_full
         self.wind_turbine_powercurve = wind_turbine_powercurve_lookup[size_class] 
@@ -282,7 +302,8 @@ class WindSAMSDK:
         self.data = []
         self.module = []
         self.wind_resource = []
-        self.make_ssc()
+        if self.cached_prod_factor is None:
+            self.make_ssc()
 
     def make_ssc(self):
         """
@@ -347,8 +368,11 @@ class WindSAMSDK:
         """
         Retrieve the wind production factor, a time series unit representation of wind power production
         """
+        if self.cached_prod_factor is not None:
+            return self.cached_prod_factor
 
-        if self.ssc.module_exec(self.module, self.data) == 0:
+        success = self.ssc.module_exec(self.module, self.data) != 0
+        if not success:
             print ('windpower simulation error')
             idx = 1
             msg = self.ssc.module_log(self.module, 0)
@@ -385,6 +409,8 @@ class WindSAMSDK:
             #prod_factor.append(round(prod_factor_original[hour]/self.time_steps_per_hour, 3))
             prod_factor.append(prod_factor_original[hour])
 
+        if self.prod_factor_key is not None and success:
+            wind_cache.put(self.prod_factor_key, prod_factor=np.array(prod_factor_original))
         return prod_factor_original
 
 
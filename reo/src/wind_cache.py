@@ -0,0 +1,196 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Cache of Wind Toolkit resource data and SAM wind production factors.
+
+Two levels of entries are saved in WIND_CACHE_PATH:
+    - resource/: the parsed .srw resource data (header rows and a float array of the data) of each Wind Toolkit grid
+      cell (from get_conic_coords), year, height, and interval, so that resource data are only downloaded once per cell
+    - prod_factor/: the wind_prod_factor of each grid cell, year, hub height, size class, and time_steps_per_hour, so
+      that sites that have already been modeled do not download data or run SAM
+index.json holds the size and last use time of every entry, and the least recently used entries are removed when the
+cache is larger than WIND_CACHE_MAX_MB. The index is updated under a file lock since the cache is shared by the workers.
+
+Settings: WIND_CACHE_ENABLED, WIND_CACHE_PATH, and WIND_CACHE_MAX_MB (see reopt_api/performance_settings.py)
+"""
+import csv
+import fcntl
+import json
+import logging
+import os
+import time
+import numpy as np
+from django.conf import settings
+from reo.src import file_cache
+log = logging.getLogger(__name__)
+
+WIND_CACHE_ENABLED = settings.WIND_CACHE_ENABLED
+WIND_CACHE_PATH = settings.WIND_CACHE_PATH
+WIND_CACHE_MAX_MB = settings.WIND_CACHE_MAX_MB
+
+SRW_HEADER_ROWS = 5  # location, description, field names, units, heights
+
+
+def grid_cell(latitude, longitude):
+    """
+    :return: (y, x) Wind Toolkit grid cell of the site, or None if the cache is disabled or the site is outside of
+        the Wind Toolkit
+    """
+    if not WIND_CACHE_ENABLED or latitude is None or longitude is None:
+        return None
+    from reo.src.wind_resource import get_conic_coords
+    try:
+        return tuple(int(i) for i in get_conic_coords(latitude, longitude))
+    except ValueError:
+        return None
+
+
+def resource_key(cell, year, height, interval):
+    return 'resource/{}_{}_{}_{}m_{}min'.format(cell[0], cell[1], year, height, interval)
+
+
+def prod_factor_key(cell, year, hub_height_meters, size_class, time_steps_per_hour):
+    return 'prod_factor/{}_{}_{}_{}m_{}_{}'.format(cell[0], cell[1], year, hub_height_meters, size_class,
+                                                  time_steps_per_hour)
+
+
+def _path(key):
+    return os.path.join(WIND_CACHE_PATH, key + '.npz')
+
+
+def _read_npz(path):
+    with np.load(path, allow_pickle=False) as npz:
+        return {k: npz[k] for k in npz.files}
+
+
+def _update_index(update):
+    """
+    Read, update, and save index.json while holding the cache lock
+    :param update: function of the index dict (entry key -> {"size", "last_used"}) that modifies it in place
+    """
+    os.makedirs(WIND_CACHE_PATH, exist_ok=True)
+    index_path = os.path.join(WIND_CACHE_PATH, 'index.json')
+    with open(os.path.join(WIND_CACHE_PATH, 'index.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(index_path, 'r') as f:
+                index = json.load(f)
+        except (IOError, ValueError):
+            index = dict()
+        update(index)
+        file_cache.write_atomic(index_path, lambda f: json.dump(index, f), mode='w')
+
+
+def _evict(index, max_bytes):
+    for key in [k for k in index if not os.path.isfile(_path(k))]:
+        del index[key]
+    total_bytes = sum(entry['size'] for entry in index.values())
+    for key in sorted(index, key=lambda k: index[k]['last_used']):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(_path(key))
+        except FileNotFoundError:
+            pass
+        total_bytes -= index.pop(key)['size']
+        log.info("Removed {} from the wind cache.".format(key))
+
+
+def get(key):
+    """
+    :param key: str, from resource_key or prod_factor_key
+    :return: dict of the arrays saved with put, or None
+    """
+    if not WIND_CACHE_ENABLED:
+        return None
+    arrays = file_cache.load(_path(key), _read_npz, "{} from the wind cache".format(key))
+    if arrays is None:
+        return None
+
+    def touch(index):
+        index.setdefault(key, {'size': os.path.getsize(_path(key))})['last_used'] = time.time()
+    try:
+        _update_index(touch)
+    except OSError as e:
+        log.warning("Could not update the wind cache index: {}".format(e))
+    return arrays
+
+
+def put(key, **arrays):
+    """
+    Save arrays and remove the least recently used entries if the cache is over its budget
+    :param key: str, from resource_key or prod_factor_key
+    :param arrays: numpy arrays
+    :return: None
+    """
+    if not WIND_CACHE_ENABLED:
+        return
+    path = _path(key)
+    if not file_cache.save(path, lambda f: np.savez_compressed(f, **arrays), "{} to the wind cache".format(key)):
+        return
+
+    def add(index):
+        index[key] = {'size': os.path.getsize(path), 'last_used': time.time()}
+        _evict(index, WIND_CACHE_MAX_MB * 1e6)
+    try:
+        _update_index(add)
+    except OSError as e:
+        log.warning("Could not update the wind cache index: {}".format(e))
+
+
+def read_srw(filename):
+    """
+    :param filename: str, path to a .srw file
+    :return: dict with "header" (array of the header rows, padded with '') and "data" (float array)
+    """
+    with open(filename, 'r') as f:
+        rows = [row for row in csv.reader(f, delimiter=',') if len(row) > 0]
+    header = rows[:SRW_HEADER_ROWS]
+    n_columns = max(len(row) for row in header)
+    return {'header': np.array([row + [''] * (n_columns - len(row)) for row in header]),
+            'data': np.array(rows[SRW_HEADER_ROWS:], dtype=float)}
+
+
+def write_srw(resources, filename):
+    """
+    Write the resource data of one or more heights to one .srw file, with the columns of each height side by side
+    (the location and description rows are those of the last height, as in combine_wind_files)
+    :param resources: list of dicts from read_srw
+    :param filename: str
+    :return: None
+    """
+    header = [[v for v in row if v != ''] for row in resources[-1]['header'][:2]]
+    for i in range(2, SRW_HEADER_ROWS):
+        header.append([v for resource in resources for v in resource['header'][i] if v != ''])
+    data = np.hstack([resource['data'] for resource in resources])
+    with open(filename, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerows(header)
+        writer.writerows(data.tolist())
@@ -0,0 +1,135 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import calendar
+import json
+import numpy as np
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from reo.src.bill_calculator import BillCalculator, get_urdb_responses
+
+
+class BillCalculatorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.rate = {
+            'label': 'bill_calculator_test',
+            'energyratestructure': [[{'rate': 0.1, 'max': 1000}, {'rate': 0.2}]],
+            'energyweekdayschedule': [[0] * 24] * 12,
+            'energyweekendschedule': [[0] * 24] * 12,
+            'flatdemandstructure': [[{'rate': 10.0}]],
+            'flatdemandmonths': [0] * 12,
+            'fixedmonthlycharge': 5.0,
+        }
+        self.hours_in_month = [24 * days for days in calendar.mdays[1:]]  # REopt years have 365 days
+
+    def test_tiered_energy_demand_and_fixed_charges(self):
+        load = 2.0 * np.ones(8760)
+        bill = BillCalculator.from_urdb_response(self.rate, 2017).calculate(load)[0]
+
+        energy = sum(1000 * 0.1 + (2 * hours - 1000) * 0.2 for hours in self.hours_in_month)
+        self.assertAlmostEqual(bill['year_one_energy_cost_us_dollars'], round(energy, 2))
+        self.assertAlmostEqual(bill['year_one_demand_cost_us_dollars'], 12 * 2 * 10.0)
+        self.assertAlmostEqual(bill['year_one_fixed_cost_us_dollars'], 60.0)
+        self.assertAlmostEqual(bill['year_one_min_charge_adder_us_dollars'], 0.0)
+        self.assertAlmostEqual(bill['year_one_bill_us_dollars'], round(energy + 240 + 60, 2))
+
+        # the same load at 15 minute resolution has the same bill
+        bill_15_minute = BillCalculator.from_urdb_response(self.rate, 2017, time_steps_per_hour=4) \
+            .calculate(np.repeat(load, 4))[0]
+        self.assertDictEqual(bill, bill_15_minute)
+
+    def test_lookback_min_and_coincident_peak_charges(self):
+        self.rate.update({'lookbackpercent': 0.5, 'lookbackrange': 0, 'lookbackmonths': [True] * 12,
+                          'minmonthlycharge': 1000.0})
+        calculator = BillCalculator.from_urdb_response(
+            self.rate, 2017, coincident_peak_load_active_timesteps=list(range(1, 25)),
+            coincident_peak_load_charge_us_dollars_per_kw=3.0)
+        loads = 2.0 * np.ones((2, 8760))
+        loads[1, 10] = 100.0  # a January peak that sets the demand of every month through the lookback
+        bills = calculator.calculate(loads)
+
+        self.assertAlmostEqual(bills[0]['year_one_demand_cost_us_dollars'], 240.0)
+        self.assertAlmostEqual(bills[1]['year_one_demand_cost_us_dollars'], (100 + 11 * 50) * 10.0)
+        self.assertAlmostEqual(bills[0]['year_one_coincident_peak_cost_us_dollars'], 6.0)
+        self.assertAlmostEqual(bills[1]['year_one_coincident_peak_cost_us_dollars'], 300.0)
+        for bill in bills:  # both bills are below the minimum charge
+            self.assertGreater(bill['year_one_min_charge_adder_us_dollars'], 0)
+            self.assertAlmostEqual(bill['year_one_bill_us_dollars'], 12000.0)
+
+    def test_coincident_peak_shapes(self):
+        """
+        One list of time steps with a list of one rate is one period, and mismatched inputs are a ValueError
+        """
+        self.assertEqual(BillCalculator.coincident_peak_periods([1, 2], [3.0]), ([[1, 2]], [3.0]))
+        self.assertEqual(BillCalculator.coincident_peak_periods([[1], [2]], [3.0, 4.0]), ([[1], [2]], [3.0, 4.0]))
+        with self.assertRaises(ValueError):
+            BillCalculator.coincident_peak_periods([1, 2], [3.0, 4.0])
+
+    def test_urdb_downloads(self):
+        """
+        Rates in the URDB rate store are found offline and at most max_downloads rates are downloaded
+        """
+        def rate(rate, util=None, offline=False):
+            return mock.Mock(urdb_dict=self.rate if rate == 'stored' or not offline else None)
+
+        with mock.patch('reo.src.bill_calculator.Rate', side_effect=rate) as rate_mock:
+            responses = get_urdb_responses([{'urdb_label': 'stored'}, {'urdb_label': 'new'}], max_downloads=1)
+            self.assertEqual(responses, [self.rate, self.rate])
+            self.assertEqual([c.kwargs['offline'] for c in rate_mock.call_args_list], [True, True, False])
+            with self.assertRaises(ValueError):
+                get_urdb_responses([{'urdb_label': 'new'}, {'urdb_label': 'newer'}], max_downloads=1)
+
+    def test_endpoint(self):
+        post = {'tariffs': [{'urdb_response': self.rate}, {'urdb_response': dict(self.rate, fixedmonthlycharge=0)}],
+                'loads_kw': [[2.0] * 8760, [1.0] * 8760]}
+        resp = self.client.post('/v2/bill_calculator', data=json.dumps(post), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        bills = json.loads(resp.content)['bills']
+        self.assertEqual(len(bills), 2)
+        self.assertEqual(len(bills[0]), 2)
+        self.assertAlmostEqual(bills[0][0]['year_one_bill_us_dollars'] - bills[1][0]['year_one_bill_us_dollars'], 60.0)
+
+        post['loads_kw'] = [[2.0] * 100]
+        resp = self.client.post('/v2/bill_calculator', data=json.dumps(post), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+
+    @override_settings(BILL_CALCULATOR_MAX_LOADS=2, BILL_CALCULATOR_MAX_TARIFFS=1)
+    def test_endpoint_bad_requests(self):
+        """
+        Requests that are not a POST of a JSON object, or that have too many loads or tariffs, are rejected
+        """
+        tariff = {'urdb_response': self.rate}
+        self.assertEqual(self.client.get('/v2/bill_calculator').status_code, 405)
+        for post, status in [([tariff], 400),
+                             ({'tariffs': [tariff], 'loads_kw': [[2.0] * 8760] * 3}, 400),
+                             ({'tariffs': [tariff] * 2, 'loads_kw': [[2.0] * 8760]}, 400),
+                             ({'tariffs': [tariff], 'loads_kw': [[2.0] * 8760] * 2}, 200)]:
+            resp = self.client.post('/v2/bill_calculator', data=json.dumps(post), content_type='application/json')
+            self.assertEqual(resp.status_code, status)
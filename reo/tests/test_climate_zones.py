@@ -0,0 +1,71 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import math
+import geopandas as gpd
+from django.test import SimpleTestCase
+from shapely.geometry import Point
+from reo.src import climate_zones
+from reo.src.load_profile import BuiltInProfile
+
+
+def brute_force_lookup(latitude, longitude, default_cities):
+    """
+    The original lookup: intersect every polygon in the shapefile, then the nearest city by distance
+    """
+    nearest_city = None
+    geometric_flag = False
+    gdf = gpd.read_file(climate_zones.CLIMATE_CITIES_PATH)
+    gdf = gdf[gdf.geometry.intersects(Point(longitude, latitude))]
+    if not gdf.empty:
+        nearest_city = gdf.city.values[0].replace(' ', '')
+    if nearest_city is None:
+        cities_to_search = default_cities
+    else:
+        climate_zone = [c for c in default_cities if c.name == nearest_city][0].zoneid
+        cities_to_search = [c for c in default_cities if c.zoneid == climate_zone]
+    if len(cities_to_search) > 1:
+        geometric_flag = True
+        nearest_city = min(cities_to_search, key=lambda c: math.sqrt((latitude - c.lat) ** 2 +
+                                                                     (longitude - c.lng) ** 2)).name
+    climate_zone = [c for c in default_cities if c.name == nearest_city][0].zoneid
+    return climate_zone, nearest_city, geometric_flag
+
+
+class ClimateZoneTests(SimpleTestCase):
+
+    def test_lookup_matches_brute_force(self):
+        sites = [(25.76, -80.19), (39.74, -104.99), (34.05, -118.24), (37.34, -121.89), (61.22, -149.90),
+                 (21.31, -157.86), (47.61, -122.33), (40.71, -74.01), (0.0, 0.0)]
+        for latitude, longitude in sites:
+            self.assertEqual(climate_zones.lookup(latitude, longitude),
+                             brute_force_lookup(latitude, longitude, BuiltInProfile.default_cities))
+
+    def test_index_loaded_once(self):
+        self.assertIs(climate_zones.get_index(), climate_zones.get_index())
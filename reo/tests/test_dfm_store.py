@@ -0,0 +1,103 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import numpy as np
+from unittest import mock
+from django.test import SimpleTestCase
+from reo.src import dfm_store
+
+
+class DFMStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.store_path = dfm_store.DFM_STORE_PATH
+        dfm_store.DFM_STORE_PATH = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(dfm_store.DFM_STORE_PATH, ignore_errors=True)
+        dfm_store.DFM_STORE_PATH = self.store_path
+
+    def test_round_trip(self):
+        """
+        The DataManager payload loaded from a handle is identical to the payload that was saved, including int vs.
+        float values, and the handle is much smaller than the payload
+        """
+        run_uuid = str(uuid.uuid4())
+        rng = np.random.default_rng(42)
+        dfm = {
+            'reopt_inputs': {'ElecLoad': rng.random(35040).tolist(), 'Tech': ['PV1', 'UTIL1'],
+                             'TimeStepCount': 35040, 'TimeStepRatchets': [list(range(1, 745))] * 12,
+                             'MixedTypes': [0, 0.5] * 20, 'Nones': [None] * 8760},
+            'reopt_inputs_bau': {'ElecLoad': rng.random(8760).tolist()},
+            'LoadProfile': {'year_one_electric_load_series_kw': [1.5] * 8760},
+            'bau_fingerprint': 'abc',
+            'n_timesteps': 35040,
+            'available_techs': ['pv1', 'wind'],
+        }
+        handle = dfm_store.dump(dfm, run_uuid)
+        self.assertTrue(dfm_store.is_handle(handle))
+        self.assertLess(len(json.dumps(handle)), 1000)
+        loaded = dfm_store.load(handle)
+        self.assertEqual(json.dumps(loaded, sort_keys=True), json.dumps(dfm, sort_keys=True))
+
+        bau = dfm_store.load(handle, parts=['reopt_inputs_bau'])
+        self.assertEqual(set(bau.keys()), {'reopt_inputs_bau', 'bau_fingerprint', 'n_timesteps'})
+
+        dfm_store.remove(run_uuid)
+        with self.assertRaises(FileNotFoundError):
+            dfm_store.load(handle)
+
+    def test_remove_expired(self):
+        """
+        The parts of runs that were not cleaned up (eg. revoked tasks) are removed once they expire
+        """
+        old_run, new_run = str(uuid.uuid4()), str(uuid.uuid4())
+        dfm_store.save_part(old_run, 'dfm', {'a': 1})
+        dfm_store.save_part(new_run, 'dfm', {'a': 1})
+        old_dir = os.path.join(dfm_store.DFM_STORE_PATH, old_run)
+        os.utime(old_dir, (time.time() - 3600, time.time() - 3600))
+        self.assertEqual(dfm_store.remove_expired(max_age_seconds=60), 1)
+        self.assertFalse(os.path.exists(old_dir))
+        self.assertEqual(dfm_store.load_part(new_run, 'dfm'), {'a': 1})
+
+    def test_disabled_without_path(self):
+        """
+        Without a shared DFM_STORE_PATH nothing is removed relative to the working directory
+        """
+        with mock.patch.object(dfm_store, 'DFM_STORE_PATH', ''):
+            with mock.patch('reo.src.dfm_store.shutil.rmtree') as rmtree:
+                dfm_store.remove(str(uuid.uuid4()))
+                self.assertEqual(dfm_store.remove_expired(max_age_seconds=0), 0)
+            rmtree.assert_not_called()
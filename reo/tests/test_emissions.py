@@ -1,6 +1,14 @@
 import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from unittest import mock
 from django.test import TestCase
 from tastypie.test import ResourceTestCaseMixin
+from reo.src import emissions_calculator
+from reo.src.emissions_calculator import AvertStore, EmissionsCalculator
+from reo.src.pyeasiur import get_EASIUR2005
 
 
 class ClassAttributes:
@@ -41,6 +49,57 @@ class TestEmissions(ResourceTestCaseMixin, TestCase):
         test = self.api_client.get('/v1/emissions_profile/',data={"latitude":1,"longitude":1})
         self.assertTrue("Your site location (1.0,1.0) is more than 5 miles from the nearest emission region." in str(test.content))
 
+    def test_avert_store(self):
+        """
+        Emissions factors from the AvertStore cache match the AVERT CSVs, repeated for sub-hourly time steps
+        """
+        store = AvertStore.get()
+        self.assertIs(store, AvertStore.get())
+        self.assertEqual(store.region(45.0, -110.0), ('NW', 0))
+        for pollutant in store.pollutants:
+            df = pd.read_csv(store.csv_path(pollutant), dtype='float64', float_precision='high')
+            ec = EmissionsCalculator(latitude=45, longitude=-110, pollutant=pollutant, time_steps_per_hour=2)
+            self.assertListEqual(ec.emissions_series[::2], list(df['NW'].round(6).values))
+            self.assertListEqual(ec.emissions_series[1::2], list(df['NW'].round(6).values))
+            self.assertEqual(ec.meters_to_region, 0)
+
+        ec = EmissionsCalculator(latitude=1.0, longitude=1.0, pollutant='CO2')
+        with self.assertRaises(AttributeError):
+            ec.region_abbr
+        self.assertIsNotNone(ec._region_abbr)  # the nearest region is kept, as before the AvertStore
+        self.assertGreater(ec.meters_to_region, AvertStore.max_meters_to_region)
+
+    def test_avert_emissions_mismatched_index(self):
+        """
+        An emissions index that does not match the array (eg. read while the cache is being rebuilt) is not used
+        """
+        store = AvertStore.get()
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+                emissions_calculator, 'AVERT_EMISSIONS_CACHE_PATH', os.path.join(tmp, 'avert.npy')), \
+                mock.patch.object(store, '_emissions', None):
+            array, pollutant_index, region_index = store.emissions_table()
+            self.assertIsInstance(array, np.memmap)
+            with open(os.path.join(tmp, 'avert.json'), 'r') as f:
+                index = json.load(f)
+            index["shape"][1] -= 1
+            with open(os.path.join(tmp, 'avert.json'), 'w') as f:
+                json.dump(index, f)
+            store._emissions = None
+            array, pollutant_index, region_index = store.emissions_table()
+            self.assertNotIsInstance(array, np.memmap)
+            self.assertEqual(array.shape[1], len(region_index))
+
+    def test_easiur_grids_cached(self):
+        """
+        Adjusted EASIUR grids are computed once per set of arguments and returned read-only
+        """
+        grids = get_EASIUR2005('p150', pop_year=2020, income_year=2020, dollar_year=2010)
+        self.assertIs(grids['NOX_Annual'], get_EASIUR2005('p150', pop_year=2020, income_year=2020,
+                                                          dollar_year=2010)['NOX_Annual'])
+        self.assertFalse(grids['NOX_Annual'].flags.writeable)
+        self.assertEqual(grids['NOX_Annual'].shape, (148, 112))
+        self.assertFalse(get_EASIUR2005('p150', pop_year=2020, income_year=1900, dollar_year=2010))
+
     def test_easiur_and_fuel_urls(self):
         test = self.api_client.get('/v1/easiur_costs/',data={"latitude":30.2672,"longitude":-97.7431,"inflation":0.025})
         self.assertEqual(round(json.loads(test.content)['nox_cost_us_dollars_per_tonne_grid'],3), round(4534.03247048984,3))
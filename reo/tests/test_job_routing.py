@@ -0,0 +1,124 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import json
+import os
+import copy
+from unittest import mock
+from django.test import TestCase
+from reo.validators import ValidateNestedInput
+from reo.src import job_routing, solve_time
+
+
+class JobRoutingTests(TestCase):
+
+    def setUp(self):
+        post_file = os.path.join('reo', 'tests', 'posts', 'nestedPOST.json')
+        self.post = json.load(open(post_file, 'r'))
+        self.post["Scenario"]["Site"]["LoadProfile"].pop("outage_start_time_step")
+        self.post["Scenario"]["Site"]["LoadProfile"].pop("outage_end_time_step")
+
+    def features(self, post):
+        return job_routing.scenario_features(ValidateNestedInput(copy.deepcopy(post)).input_dict)
+
+    def test_features(self):
+        features = self.features(self.post)
+        self.assertEqual(features["techs"], ["pv", "storage"])
+        self.assertEqual(features["time_steps_per_hour"], 1)
+        self.assertGreater(features["tariff_periods"], 0)
+        self.assertFalse(features["outage"])
+
+        post = copy.deepcopy(self.post)
+        post["Scenario"]["time_steps_per_hour"] = 4
+        post["Scenario"]["Site"]["LoadProfile"]["outage_start_time_step"] = 10
+        post["Scenario"]["Site"]["LoadProfile"]["outage_end_time_step"] = 20
+        features_4 = self.features(post)
+        self.assertEqual(features_4["techs"], ["pv", "storage", "generator"])
+        self.assertGreater(job_routing.heuristic_solve_seconds(features_4),
+                           4 * job_routing.heuristic_solve_seconds(features))
+
+    def test_choose_queue(self):
+        """
+        Jobs only go to the slow queue when it is configured, and hard problem rates are always slow
+        """
+        features = self.features(self.post)
+        with mock.patch.object(job_routing, "SLOW_QUEUE_NAME", None), \
+                mock.patch.object(solve_time, "SOLVE_TIME_MODEL_PATH", "no_solve_time_model.json"):
+            self.assertEqual(job_routing.choose_queue(features)[0], job_routing.FAST_QUEUE_NAME)
+        with mock.patch.object(job_routing, "SLOW_QUEUE_NAME", "slow"), \
+                mock.patch.object(solve_time, "SOLVE_TIME_MODEL_PATH", "no_solve_time_model.json"):
+            queue, predicted_seconds = job_routing.choose_queue(features)
+            self.assertEqual(queue, job_routing.FAST_QUEUE_NAME)
+            self.assertLess(predicted_seconds, job_routing.JOB_ROUTING_SLOW_SECONDS)
+
+            features["urdb_label"] = sorted(job_routing.hard_problem_labels)[0]
+            self.assertEqual(job_routing.choose_queue(features)[0], "slow")
+
+            features["urdb_label"] = ""
+            with self.settings(JOB_ROUTING_WEIGHTS={"techs": {"storage": 500}}):
+                self.assertEqual(job_routing.choose_queue(features)[0], "slow")
+
+    def test_route_job(self):
+        """
+        A job whose features can not be computed is sent to the default queue instead of failing the request
+        """
+        queue, predicted_seconds, features = job_routing.route_job(job_routing.scenario_features, {})
+        self.assertEqual(queue, job_routing.FAST_QUEUE_NAME)
+        self.assertIsNone(predicted_seconds)
+        self.assertIsNone(features)
+        self.assertIsNone(job_routing.estimated_seconds(predicted_seconds))
+
+    def test_julia_request_timeout(self):
+        """
+        The solve time estimate only extends the margin for building the model
+        """
+        margin = solve_time.SOLVE_TIME_TIMEOUT_MARGIN_SECONDS
+        self.assertIsNone(solve_time.julia_request_timeout(420, None))
+        self.assertEqual(solve_time.julia_request_timeout(420, 10), 420 + margin)
+        self.assertEqual(solve_time.julia_request_timeout(420, margin), 420 + 2 * margin)
+
+    def test_solve_time_regression(self):
+        """
+        The regression recovers the effect of each feature on the log of the solve time, and the trained estimate
+        replaces the heuristic in the routing
+        """
+        features = self.features(self.post)
+        feature_dicts, seconds = [], []
+        for time_steps_per_hour in [1, 2, 4]:
+            for chp in [False, True]:
+                f = dict(features, time_steps_per_hour=time_steps_per_hour,
+                         techs=features["techs"] + (["chp"] if chp else []))
+                feature_dicts.append(solve_time.post_features(f))
+                seconds.append(10.0 * time_steps_per_hour * (5 if chp else 1))
+        regression = solve_time.fit(feature_dicts, seconds)
+        self.assertAlmostEqual(regression["coefficients"]["log_time_steps_per_hour"], 1.0, places=2)
+        self.assertAlmostEqual(regression["r2"], 1.0, places=3)
+
+        with mock.patch.object(solve_time, "load_model", return_value={solve_time.POST: regression}):
+            self.assertAlmostEqual(job_routing.choose_queue(features, use_history=False)[1], 10.0, places=0)
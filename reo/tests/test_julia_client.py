@@ -0,0 +1,91 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.test import SimpleTestCase
+from reo.src.julia_client import JuliaClient, HEALTHY, DOWN
+
+
+class FakeJuliaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.startswith('/reopt'):
+            time.sleep(0.2)  # a solve
+        body = json.dumps({"port": self.server.server_port}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = respond
+    do_POST = respond
+
+
+class JuliaClientTests(SimpleTestCase):
+
+    def setUp(self):
+        self.servers = [ThreadingHTTPServer(('127.0.0.1', 0), FakeJuliaHandler) for _ in range(2)]
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def test_least_outstanding_routing(self):
+        """
+        Concurrent solves are spread over the servers and a server that is down is not used
+        """
+        ports = [s.server_port for s in self.servers]
+        down_server = ThreadingHTTPServer(('127.0.0.1', 0), FakeJuliaHandler)
+        down_port = down_server.server_port
+        down_server.server_close()
+        client = JuliaClient(hosts=["127.0.0.1:{}".format(p) for p in ports + [down_port]])
+        self.addCleanup(client.close)
+        client._refresh_health()  # normally done by the health check thread
+
+        with ThreadPoolExecutor(4) as executor:
+            responses = list(executor.map(lambda i: client.post("reopt", json={"i": i}).json()["port"], range(8)))
+        self.assertEqual(responses.count(ports[0]), 4)
+        self.assertEqual(responses.count(ports[1]), 4)
+
+        metrics = client.metrics()
+        self.assertEqual([m["status"] for m in metrics], [HEALTHY, HEALTHY, DOWN])
+        self.assertEqual([m["requests"] for m in metrics], [4, 4, 0])
+        self.assertEqual([m["outstanding"] for m in metrics], [0, 0, 0])
@@ -0,0 +1,112 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from reo.src import load_profile_library
+from reo.src.load_profile import BuiltInProfile, blend_profiles, month_index
+
+
+class LoadProfileLibraryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.library_path = load_profile_library.LOAD_PROFILE_LIBRARY_PATH
+        self.tmp_dir = tempfile.mkdtemp()
+        load_profile_library.LOAD_PROFILE_LIBRARY_PATH = os.path.join(self.tmp_dir, 'load_profile_library.npy')
+        load_profile_library._library = None
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        load_profile_library.LOAD_PROFILE_LIBRARY_PATH = self.library_path
+        load_profile_library._library = None
+
+    def test_library_matches_text_files(self):
+        """
+        Profiles from the packed library are read-only views identical to the profiles in the text files, and the
+        library is built on first use
+        """
+        for load_type in load_profile_library.load_type_file_map:
+            for city in ['Miami', 'Fairbanks']:
+                for building in ['Hospital', 'Warehouse']:
+                    profile = load_profile_library.normalized_profile(load_type, city, building)
+                    expected = load_profile_library.read_profile_file(load_type, city, building)
+                    self.assertListEqual(profile.tolist(), expected)
+                    self.assertFalse(profile.flags.writeable)
+        self.assertTrue(os.path.isfile(load_profile_library.LOAD_PROFILE_LIBRARY_PATH))
+        self.assertIsInstance(load_profile_library.load()[0], np.memmap)
+
+        bip = BuiltInProfile(load_type='Electric', latitude=25.76, longitude=-80.19, doe_reference_name='Hospital',
+                             annual_energy=1000.0)
+        self.assertAlmostEqual(sum(bip.built_in_profile), 1000.0, places=2)
+
+    def test_mismatched_index(self):
+        """
+        An index that does not match the array (eg. read while the library is being rebuilt) is not used
+        """
+        load_profile_library.build()
+        with open(load_profile_library.index_path(), 'r') as f:
+            index = json.load(f)
+        index["shape"][1] -= 1
+        with open(load_profile_library.index_path(), 'w') as f:
+            json.dump(index, f)
+        array, index = load_profile_library.load()
+        self.assertNotIsInstance(array, np.memmap)
+        self.assertEqual(array.shape[1], len(index["cities"]))
+
+    def test_unknown_building(self):
+        with self.assertRaises(IOError):
+            load_profile_library.normalized_profile('Electric', 'Miami', 'NotABuilding')
+
+    def test_monthly_scaled_profile(self):
+        """
+        The monthly scaled profile sums to the monthly energy in each month
+        """
+        monthly_totals_energy = [float(1000 + 100 * m) for m in range(12)]
+        bip = BuiltInProfile(load_type='Electric', latitude=25.76, longitude=-80.19, doe_reference_name='Hospital',
+                             monthly_totals_energy=monthly_totals_energy)
+        profile = bip.built_in_profile
+        self.assertIsInstance(profile, list)
+        monthly_sums = np.bincount(month_index(bip.year), weights=profile, minlength=12)
+        np.testing.assert_allclose(monthly_sums, monthly_totals_energy)
+
+    def test_blend_profiles(self):
+        """
+        Hybrid profiles are upsampled to the time step and weighted by percent share after scaling each building's
+        profile to the total site load
+        """
+        profiles = [np.full(8760, 1.0), np.full(8760, 3.0)]
+        self.assertListEqual(blend_profiles(profiles[:1], 4).tolist(), [1.0] * 35040)
+        blended = blend_profiles(profiles, 2, [25, 75], scale_to_site_load=True)
+        self.assertEqual(len(blended), 17520)
+        np.testing.assert_allclose(blended, 0.25 * 4.0 + 0.75 * 4.0)
+        np.testing.assert_allclose(blend_profiles(profiles, 1, [25, 75]), 0.25 * 1.0 + 0.75 * 3.0)
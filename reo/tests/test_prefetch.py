@@ -0,0 +1,87 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import time
+from unittest import mock
+from django.test import SimpleTestCase
+from reo.exceptions import PVWattsDownloadError
+from reo.src.prefetch import Prefetch
+from reo.src.techs import Wind
+
+
+class PrefetchTests(SimpleTestCase):
+
+    def setUp(self):
+        pv = {'max_kw': 100, 'existing_kw': 0, 'tilt': 0.537, 'azimuth': 180, 'array_type': 1, 'radius': 0}
+        self.inputs_dict = {
+            'time_steps_per_hour': 1,
+            'Site': {
+                'latitude': 39.7407, 'longitude': -104.9903,
+                'PV': [dict(pv, pv_number=1), dict(pv, pv_number=2, array_type=0),
+                       dict(pv, pv_number=3, max_kw=0), dict(pv, pv_number=4, prod_factor_series_kw=[0.1] * 8760)],
+                'Wind': {'max_kw': 50, 'size_class': 'commercial', 'prod_factor_series_kw': None},
+            }
+        }
+
+    def test_fetches_run_concurrently(self):
+        def slow(result):
+            def fetch(**kwargs):
+                time.sleep(0.5)
+                return result, kwargs
+            return fetch
+
+        with mock.patch('reo.src.prefetch.get_pvwatts', side_effect=slow('pvwatts')), \
+                mock.patch.object(Wind, 'run_sam', side_effect=slow('sam')):
+            prefetch = Prefetch(self.inputs_dict, '/tmp', run_uuid='abc')
+            pv1, pv2, wind = prefetch.result('pv1'), prefetch.result('pv2'), prefetch.result('wind')
+
+        self.assertEqual(sorted(prefetch.timings), ['pv1', 'pv2', 'wind'])
+        self.assertIsNone(prefetch.result('pv3'))
+        self.assertIsNone(prefetch.result('pv4'))
+        self.assertLess(prefetch.seconds, 1.2)  # the three 0.5 second fetches overlap
+        self.assertGreaterEqual(prefetch.timings['wind'], 0.5)
+        self.assertEqual((pv1[1]['tilt'], pv1[1]['azimuth']), (10, 180))  # same defaults as the PV class
+        self.assertEqual(pv2[1]['tilt'], 39.7407)
+        self.assertEqual((wind[0], wind[1]['inputs_path'], wind[1]['run_uuid']), ('sam', '/tmp', 'abc'))
+
+    def test_errors_are_raised_on_use(self):
+        error = PVWattsDownloadError(task='pvwatts.py', message='no station')
+        with mock.patch('reo.src.prefetch.get_pvwatts', side_effect=error), \
+                mock.patch.object(Wind, 'run_sam', return_value=[0.5] * 8760):
+            prefetch = Prefetch(self.inputs_dict, '/tmp')
+            self.assertEqual(prefetch.result('wind'), [0.5] * 8760)
+            with self.assertRaises(PVWattsDownloadError):
+                prefetch.result('pv1')
+
+    def test_no_workers(self):
+        with mock.patch('reo.src.prefetch.get_pvwatts') as get_pvwatts:
+            prefetch = Prefetch(self.inputs_dict, '/tmp', max_workers=0)
+        self.assertIsNone(prefetch.result('pv1'))
+        get_pvwatts.assert_not_called()
+        self.assertEqual(prefetch.timings, {})
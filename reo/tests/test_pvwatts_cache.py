@@ -0,0 +1,82 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import json
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase
+from reo.src import pvwatts_cache
+from reo.src.pvwatts import PVWatts
+
+
+class PVWattsCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(pvwatts_cache, 'PVWATTS_CACHE_PATH', self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.response = {
+            'inputs': {}, 'errors': [], 'warnings': [], 'version': '1.0.0',
+            'station_info': {'lat': 39.73, 'lon': -104.98, 'distance': 1234},
+            'outputs': {'ac': [0, 250.5] * 4380, 'tamb': [1.5] * 8760, 'dc': [0] * 8760, 'ac_annual': 1096938.0},
+        }
+
+    def pvwatts(self, **kwargs):
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(status_code=200, text=json.dumps(self.response))
+        with mock.patch('reo.src.pvwatts.get_session', return_value=session):
+            return PVWatts(**kwargs), session.get.call_count
+
+    def test_sites_in_a_grid_cell_share_a_response(self):
+        pv1, n_queries = self.pvwatts(latitude=39.7407, longitude=-104.9903, tilt=39.7407)
+        self.assertEqual(n_queries, 1)
+        self.assertIn('&lat=39.7407&lon=-104.9903&tilt=39.7407', pv1.url)  # only the cache key is rounded
+
+        pv2, n_queries = self.pvwatts(latitude=39.7411, longitude=-104.9898, tilt=39.7411)
+        self.assertEqual(n_queries, 0)
+        self.assertListEqual(pv2.pv_prod_factor, pv1.pv_prod_factor)
+        self.assertListEqual(pv2.response['outputs']['tamb'], self.response['outputs']['tamb'])
+        self.assertDictEqual(pv2.response['station_info'], self.response['station_info'])
+        self.assertNotIn('dc', pv2.response['outputs'])  # only the ac and tamb series are kept
+
+        pv3, n_queries = self.pvwatts(latitude=39.7407, longitude=-104.9903, tilt=39.7407, array_type=1)
+        self.assertEqual(n_queries, 1)
+
+    def test_errors_are_not_cached_and_eviction(self):
+        self.response['errors'] = ['station not found']
+        self.pvwatts(latitude=39.7407, longitude=-104.9903, tilt=10)
+        self.assertEqual(self.pvwatts(latitude=39.7407, longitude=-104.9903, tilt=10)[1], 1)
+
+        self.response['errors'] = []
+        self.pvwatts(latitude=39.7407, longitude=-104.9903, tilt=10)
+        self.assertEqual(pvwatts_cache.evict(), 0)
+        self.assertEqual(pvwatts_cache.evict(max_mb=0), 1)
+        self.assertEqual(self.pvwatts(latitude=39.7407, longitude=-104.9903, tilt=10)[1], 1)
@@ -0,0 +1,106 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import os
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase
+from reo.exceptions import PVWattsDownloadError
+from reo.src import pvwatts_local
+
+
+class LocalPVWattsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = mock.patch.object(pvwatts_local, 'WEATHER_FILES_PATH', os.path.join(self.tmp_dir.name, 'weather'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        downloads = os.path.join(self.tmp_dir.name, 'downloads')
+        os.makedirs(downloads)
+        with open(os.path.join(downloads, 'denver_psm3.csv'), 'w') as f:
+            f.write("Source,Location ID,City,State,Country,Latitude,Longitude,Time Zone,Elevation\n"
+                    "NSRDB,149190,-,-,-,39.73,-104.98,-7,1609\n"
+                    "Year,Month,Day,Hour,Minute,DNI,DHI,GHI,Temperature,Wind Speed\n")
+        with open(os.path.join(downloads, '724030TYA.CSV'), 'w') as f:
+            f.write('724030,"WASHINGTON DC REAGAN AP",VA,-5.0,38.867,-77.033,3\n'
+                    'Date (MM/DD/YYYY),Time (HH:MM),ETR (W/m^2)\n')
+        self.stations = pvwatts_local.import_weather_files(
+            [os.path.join(downloads, name) for name in sorted(os.listdir(downloads))])
+
+    def ssc(self, ac):
+        ssc = mock.Mock()
+        ssc.module_exec.return_value = 1
+        ssc.data_get_array.side_effect = lambda data, name: ac if name == 'ac' else [12.5] * 8760
+        ssc.data_get_number.return_value = sum(ac)
+        return ssc
+
+    def test_weather_file_index(self):
+        self.assertEqual(len(self.stations), 2)
+        station, distance = pvwatts_local.nearest_station(39.7407, -104.9903)
+        self.assertEqual(station['file'], 'denver_psm3.csv')
+        self.assertEqual(station['elev'], 1609)
+        self.assertLess(distance, 2000)
+        station, distance = pvwatts_local.nearest_station(38.9, -77.0)
+        self.assertEqual((station['id'], station['state'], station['tz']), ('724030', 'VA', -5.0))
+
+    def test_local_prod_factor(self):
+        ssc = self.ssc([0, 500.0] * 4380)
+        with mock.patch('reo.src.pvwatts_local.PySSC', return_value=ssc):
+            pv = pvwatts_local.LocalPVWatts(latitude=39.7407, longitude=-104.9903, tilt=39.7407, losses=0.14,
+                                            time_steps_per_hour=2)
+        self.assertEqual(pv.pv_prod_factor[:4], [0, 0, 0.5, 0.5])
+        self.assertEqual(pv.response['outputs']['tamb'], [12.5] * 8760)
+        self.assertEqual(pv.response['station_info']['solar_resource_file'], 'denver_psm3.csv')
+        numbers = {c[0][1]: c[0][2] for c in ssc.data_set_number.call_args_list}
+        self.assertAlmostEqual(numbers['losses'], 14)  # percent, as in the PVWatts API query
+        self.assertAlmostEqual(numbers['inv_eff'], 96)
+        ssc.data_set_string.assert_called_once_with(
+            mock.ANY, 'solar_resource_file', os.path.join(pvwatts_local.WEATHER_FILES_PATH, 'denver_psm3.csv'))
+        ssc.data_free.assert_called_once()
+
+    def test_no_nearby_weather_file(self):
+        with mock.patch.object(pvwatts_local, 'PV_LOCAL_FALLBACK_TO_API', False):
+            with self.assertRaises(PVWattsDownloadError):
+                pvwatts_local.LocalPVWatts(latitude=61.2, longitude=-149.9, tilt=20, radius=100)
+        with mock.patch('reo.src.pvwatts.PVWatts.data', new_callable=mock.PropertyMock) as api_data:
+            api_data.return_value = {'outputs': {'ac': [0] * 8760}}
+            pvwatts_local.LocalPVWatts(latitude=61.2, longitude=-149.9, tilt=20, radius=100)
+        api_data.assert_called_once()
+
+    def test_zero_radius_uses_nearest_station(self):
+        """
+        A radius of 0 (the default PV radius) uses the nearest weather file however far away it is
+        """
+        with mock.patch('reo.src.pvwatts_local.PySSC', return_value=self.ssc([0, 500.0] * 4380)), \
+                mock.patch('reo.src.pvwatts.PVWatts.data', new_callable=mock.PropertyMock) as api_data:
+            pv = pvwatts_local.LocalPVWatts(latitude=61.2, longitude=-149.9, tilt=20, radius=0)
+        api_data.assert_not_called()
+        self.assertEqual(pv.response['station_info']['solar_resource_file'], 'denver_psm3.csv')
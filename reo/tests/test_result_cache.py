@@ -0,0 +1,145 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import json
+import os
+import copy
+import uuid
+import numpy as np
+from unittest import mock
+from django.test import TestCase, RequestFactory
+from reo.validators import ValidateNestedInput
+from reo.models import ModelManager, ScenarioModel, MessageModel, ProfileModel
+from reo.src.result_cache import scenario_input_hash, find_cached_scenario, clone_scenario, save_input_hash, \
+    bau_fingerprint, find_bau_results, save_bau_results, use_result_cache, \
+    bau_results_seconds
+
+
+class ResultCacheTests(TestCase):
+
+    def setUp(self):
+        post_file = os.path.join('reo', 'tests', 'posts', 'nestedPOST.json')
+        self.post = json.load(open(post_file, 'r'))
+
+    @staticmethod
+    def make_data(post):
+        run_uuid = str(uuid.uuid4())
+        validator = ValidateNestedInput(post, api_version=2)
+        return {
+            "inputs": validator.input_dict,
+            "messages": validator.messages,
+            "outputs": {"Scenario": {'run_uuid': run_uuid, 'api_version': "version 2.0.0", 'status': 'Optimizing...',
+                                     'job_type': 'Internal NREL',
+                                     'Profile': {'pre_setup_scenario_seconds': 0, 'setup_scenario_seconds': 0,
+                                                 'reopt_seconds': 0, 'reopt_bau_seconds': 0,
+                                                 'parse_run_outputs_seconds': 0}}}
+        }
+
+    def test_input_hash(self):
+        """
+        The hash does not depend on request specific inputs or key order, but does depend on every other input
+        """
+        h = scenario_input_hash(self.make_data(copy.deepcopy(self.post))["inputs"], 2)
+
+        post = copy.deepcopy(self.post)
+        post['Scenario']['description'] = 'another description'
+        post['Scenario']['timeout_seconds'] = 123
+        post['Scenario']['Site'] = dict(reversed(list(post['Scenario']['Site'].items())))
+        self.assertEqual(h, scenario_input_hash(self.make_data(post)["inputs"], 2))
+        self.assertNotEqual(h, scenario_input_hash(self.make_data(post)["inputs"], 1))
+
+        post['Scenario']['Site']['latitude'] += 0.01
+        self.assertNotEqual(h, scenario_input_hash(self.make_data(post)["inputs"], 2))
+
+    def test_use_result_cache(self):
+        """
+        Monitoring checks and requests with use_result_cache=false always run the optimization
+        """
+        factory = RequestFactory()
+        self.assertTrue(use_result_cache(factory.post('/v2/job/')))
+        self.assertFalse(use_result_cache(factory.post('/v2/job/?use_result_cache=false')))
+        self.assertFalse(use_result_cache(factory.post('/v2/job/', HTTP_USER_AGENT='check_http/v2.3.3')))
+
+    def test_save_input_hash_failure(self):
+        """
+        A run whose input hash cannot be saved is left out of the cache instead of failing the request
+        """
+        with mock.patch('reo.src.result_cache.ResultCacheModel.create', side_effect=Exception('db error')):
+            save_input_hash(str(uuid.uuid4()), 'abc', api_version=2)
+
+    def test_clone_scenario(self):
+        """
+        Only optimal runs are reused, and the copied run has the same response except for request specific values
+        """
+        data = self.make_data(copy.deepcopy(self.post))
+        source_run_uuid = data["outputs"]["Scenario"]["run_uuid"]
+        h = scenario_input_hash(data["inputs"], 2)
+        ModelManager().create_and_save(data)
+        save_input_hash(source_run_uuid, h, 2)
+        self.assertIsNone(find_cached_scenario(h, 2))
+
+        ScenarioModel.objects.filter(run_uuid=source_run_uuid).update(status='optimal')
+        self.assertEqual(find_cached_scenario(h, 2), source_run_uuid)
+        self.assertIsNone(find_cached_scenario(h, 1))
+
+        post = copy.deepcopy(self.post)
+        post['Scenario']['description'] = 'copy'
+        new_data = self.make_data(post)
+        clone_scenario(source_run_uuid, new_data)
+
+        source = ModelManager.make_response(source_run_uuid)
+        new = ModelManager.make_response(new_data["outputs"]["Scenario"]["run_uuid"])
+        self.assertEqual(new["inputs"]["Scenario"]["description"], 'copy')
+        self.assertEqual(new["outputs"]["Scenario"]["status"], 'optimal')
+        self.assertEqual(new["inputs"]["Scenario"]["Site"], source["inputs"]["Scenario"]["Site"])
+        self.assertEqual(new["outputs"]["Scenario"]["Site"], source["outputs"]["Scenario"]["Site"])
+        self.assertTrue(MessageModel.objects.filter(run_uuid=new_data["outputs"]["Scenario"]["run_uuid"],
+                                                    message_type='cached_results').exists())
+
+    def test_bau_results(self):
+        """
+        BAU inputs with equal values (including numpy arrays) have the same fingerprint, and cached BAU results are
+        only found for the same optimality tolerance
+        """
+        bau_inputs = {'Tech': [], 'LoadProfile': np.array([1.0] * 8760), 'Lbs_per_tonne': 2204.62}
+        fingerprint = bau_fingerprint(bau_inputs)
+        self.assertEqual(fingerprint, bau_fingerprint(
+            {'Lbs_per_tonne': 2204.62, 'LoadProfile': [1.0] * 8760, 'Tech': []}))
+        bau_inputs['LoadProfile'][4000] = 2.0
+        self.assertNotEqual(fingerprint, bau_fingerprint(bau_inputs))
+
+        self.assertIsNone(find_bau_results(fingerprint, 0.001))
+        run_uuid = str(uuid.uuid4())
+        ProfileModel.objects.create(run_uuid=run_uuid, reopt_bau_seconds=12.5)
+        save_bau_results(fingerprint, 0.001, run_uuid, {'status': 'optimal', 'lcc': 1.0})
+        self.assertEqual(find_bau_results(fingerprint, 0.001), {'status': 'optimal', 'lcc': 1.0})
+        self.assertIsNone(find_bau_results(fingerprint, 0.01))
+        # runs that reuse the BAU results record the solve time of the cached run
+        self.assertEqual(bau_results_seconds(fingerprint, 0.001), 12.5)
+        self.assertIsNone(bau_results_seconds(fingerprint, 0.01))
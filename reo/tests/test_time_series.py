@@ -0,0 +1,79 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from reo.src import time_series
+from job.validators import validate_time_series
+
+
+class TimeSeriesTests(SimpleTestCase):
+
+    def setUp(self):
+        self.series = (np.random.RandomState(42).rand(35040) * 1000).tolist()
+
+    def test_downsample_matches_pandas(self):
+        for minutes, steps_in, steps_out in [(15, 4, 1), (15, 4, 2), (30, 2, 1)]:
+            series = self.series[:8760 * steps_in]
+            index = pd.date_range('1/1/2000', periods=len(series), freq='{}T'.format(minutes))
+            expected = pd.Series(series, index=index).resample('{}T'.format(int(60 / steps_out))).mean().tolist()
+            self.assertListEqual(time_series.resample(series, steps_in, steps_out), expected)
+
+    def test_upsample_repeats_values(self):
+        resampled, msg, err = validate_time_series(self.series[:8760], 4)
+        self.assertEqual(len(resampled), 35040)
+        self.assertListEqual(resampled[:8], [self.series[0]] * 4 + [self.series[1]] * 4)
+        self.assertEqual(msg, "Upsampled to match time_steps_per_hour via forward-fill.")
+        self.assertEqual(err, "")
+
+    def test_invalid_length(self):
+        resampled, msg, err = validate_time_series(self.series[:100], 1)
+        self.assertTrue(err.startswith("Invalid length."))
+        self.assertIsNone(time_series.time_steps_per_hour_of(self.series[:100]))
+
+    def test_non_finite_values(self):
+        for value in [float('nan'), float('inf'), float('-inf')]:
+            series = self.series[:8760]
+            series[10] = value
+            resampled, msg, err = validate_time_series(series, 1)
+            self.assertEqual(err, "Contains at least one NaN or infinite value.")
+
+    def test_to_array(self):
+        self.assertTrue(time_series.has_non_finite(time_series.to_array([1, float('nan')])))
+        self.assertTrue(time_series.has_non_finite(time_series.to_array([1, float('inf')])))
+        self.assertTrue(time_series.has_non_finite(time_series.to_array([float('-inf'), 1])))
+        self.assertFalse(time_series.has_non_finite(time_series.to_array([1, 2.5, True])))
+        for series in [[1, None], [1, 'a'], [[1], [2]]]:
+            self.assertIsNone(time_series.to_array(series))
+
+    def test_first_invalid_timestep(self):
+        self.assertIsNone(time_series.first_invalid_timestep([1, 2, None, 8760], 8760))
+        self.assertEqual(time_series.first_invalid_timestep([1, 2.5, 0], 8760), 2.5)
+        self.assertEqual(time_series.first_invalid_timestep([0, 8761], 8760), 0)
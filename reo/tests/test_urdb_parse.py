@@ -0,0 +1,117 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import calendar
+import types
+from unittest import mock
+from django.test import SimpleTestCase
+from reo.src import tariff_cache
+from reo.src.urdb_parse import UrdbParse, RateData, hour_index
+
+
+class UrdbParseTests(SimpleTestCase):
+
+    def parser(self, rate, year=2020, time_steps_per_hour=1, custom_tou_energy_rates=None):
+        elec_tariff = types.SimpleNamespace(
+            urdb_response=rate, load_year=year, time_steps_per_hour=time_steps_per_hour,
+            wholesale_rate=[0.0], wholesale_rate_above_site_load=[0.0],
+            chp_standby_rate_us_dollars_per_kw_per_month=0, chp_does_not_reduce_demand_charges=False,
+            tou_energy_rates=custom_tou_energy_rates or [],
+            add_tou_energy_rates_to_urdb_rate=custom_tou_energy_rates is not None,
+            override_urdb_rate_with_tou_energy_rates=False)
+        return UrdbParse(1.0e8, elec_tariff, [], [])
+
+    def test_hour_index(self):
+        """
+        365 days in a leap year (no February 29) with weekdays from the actual calendar
+        """
+        month, hour, is_weekday = hour_index(2020)
+        self.assertEqual(len(month), 8760)
+        self.assertEqual(month[59 * 24], 2)  # the 60th day is March 1
+        self.assertEqual(bool(is_weekday[59 * 24]), calendar.weekday(2020, 3, 1) < 5)
+        self.assertListEqual(hour[:25].tolist(), list(range(24)) + [0])
+
+    def test_energy_costs_and_demand_tou_steps(self):
+        weekday_schedule = [[0] * 12 + [1] * 12] * 12
+        weekend_schedule = [[0] * 24] * 12
+        rate = {
+            'energyratestructure': [[{'rate': 0.1, 'max': 100}, {'rate': 0.2}], [{'rate': 0.3, 'adj': 0.01}]],
+            'energyweekdayschedule': weekday_schedule,
+            'energyweekendschedule': weekend_schedule,
+            'demandratestructure': [[{'rate': 5.0}], [{'rate': 10.0}]],
+            'demandweekdayschedule': weekday_schedule,
+            'demandweekendschedule': weekend_schedule,
+        }
+        year, time_steps_per_hour = 2021, 2
+        parser = self.parser(rate, year, time_steps_per_hour, custom_tou_energy_rates=[0.5] * 8760)
+        current_rate = RateData(rate)
+        parser.prepare_summary(current_rate)
+        parser.prepare_demand_periods(current_rate)
+        parser.prepare_energy_costs(current_rate)
+
+        month, hour, is_weekday = hour_index(year)
+        expected = []
+        for tier in range(2):
+            for h in range(8760):
+                on_peak = is_weekday[h] and hour[h] >= 12
+                expected += [(0.3 + 0.01 if on_peak else [0.1, 0.2][tier]) + 0.5] * time_steps_per_hour
+        self.assertListEqual(parser.energy_costs, expected)
+
+        # January 2021 starts on a Friday: the on-peak steps of its first day are 25-48
+        on_peak_steps = parser.get_demand_tou_steps(current_rate, 0, 1)
+        self.assertListEqual(on_peak_steps[:24], list(range(25, 49)))
+        off_peak_steps = parser.get_demand_tou_steps(current_rate, 0, 0)
+        self.assertEqual(len(on_peak_steps) + len(off_peak_steps), 31 * 24 * time_steps_per_hour)
+        self.assertEqual(parser.reopt_args.demand_num_ratchets, 24)
+
+    def test_parsed_rate_cache(self):
+        """
+        The second parse of the same rate and context is served from the cache without parsing
+        """
+        tariff_cache.clear()
+        rate = {'label': 'test', 'energyratestructure': [[{'rate': 0.1}]], 'fixedmonthlycharge': 10.0,
+                'energyweekdayschedule': [[0] * 24] * 12, 'energyweekendschedule': [[0] * 24] * 12,
+                'flatdemandstructure': [[{'rate': 5.0}]], 'flatdemandmonths': [0] * 12}
+        parser = self.parser(dict(rate))
+        args = parser.parse_rate('utility', 'rate')
+
+        cached_parser = self.parser(dict(rate))
+        with mock.patch('reo.src.urdb_parse.RateData') as rate_data:
+            cached_args = cached_parser.parse_rate('utility', 'rate')
+            rate_data.assert_not_called()
+        self.assertDictEqual(vars(cached_args), vars(args))
+        self.assertListEqual(cached_parser.energy_rates_summary, parser.energy_rates_summary)
+        self.assertListEqual(cached_parser.demand_rates_summary, parser.demand_rates_summary)
+        cached_args.energy_costs[0] = -1  # callers get their own copy
+        self.assertEqual(self.parser(dict(rate)).parse_rate('utility', 'rate').energy_costs[0], args.energy_costs[0])
+
+        with mock.patch('reo.src.urdb_parse.RateData', wraps=RateData) as rate_data:
+            self.parser(dict(rate), year=2021).parse_rate('utility', 'rate')
+            rate_data.assert_called_once()
+
@@ -0,0 +1,102 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from reo.models import URDBRateModel
+from reo.src import urdb_store
+from reo.src.urdb_rate import Rate
+
+
+class URDBStoreTests(TestCase):
+
+    def setUp(self):
+        self.rates = [
+            {'label': 'label1', 'utility': 'Some Utility', 'name': 'Residential Time of Use', 'startdate': 100},
+            {'label': 'label2', 'utility': 'Some Utility', 'name': 'Residential Time of Use', 'startdate': 200},
+            {'label': 'label3', 'utility': 'Some Utility', 'name': 'Commercial'},
+        ]
+
+    def test_import_dump(self):
+        """
+        Dumps can be API responses or one rate per line, and importing a rate again updates it
+        """
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'urdb.json.gz')
+            with gzip.open(path, 'wt') as f:
+                json.dump({'items': self.rates}, f)
+            self.assertEqual(urdb_store.import_rates(urdb_store.read_dump(path), batch_size=2), 3)
+
+            path = os.path.join(d, 'urdb.jsonl')
+            with open(path, 'w') as f:
+                f.write('\n'.join(json.dumps(dict(r, fixedmonthlycharge=10)) for r in self.rates[:2]))
+            self.assertEqual(urdb_store.import_rates(urdb_store.read_dump(path)), 2)
+
+        self.assertEqual(urdb_store.find('label1')['fixedmonthlycharge'], 10)
+        self.assertNotIn('fixedmonthlycharge', urdb_store.find('label3'))
+        self.assertEqual(urdb_store.find('Residential Time of Use', 'Some Utility')['label'], 'label2')
+        self.assertIsNone(urdb_store.find('Commercial', 'Another Utility'))
+
+    @mock.patch('reo.src.urdb_rate.requests.get')
+    def test_rate_read_through(self, get):
+        """
+        Rates in the store are not downloaded, downloaded rates are saved, and nothing is downloaded when offline
+        """
+        urdb_store.import_rates(self.rates)
+        self.assertEqual(Rate(rate='label1').urdb_dict['label'], 'label1')
+        self.assertEqual(Rate(rate='Residential Time of Use', util='Some Utility').urdb_dict['label'], 'label2')
+        get.assert_not_called()
+
+        get.return_value = mock.Mock(ok=True, text=json.dumps({'items': [{'label': 'label4', 'name': 'New'}]}))
+        self.assertEqual(Rate(rate='label4').urdb_dict['name'], 'New')
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(Rate(rate='label4').urdb_dict['name'], 'New')
+        self.assertEqual(get.call_count, 1)
+
+        with mock.patch.object(urdb_store, 'URDB_OFFLINE', True):
+            self.assertIsNone(Rate(rate='label5').urdb_dict)
+        self.assertEqual(get.call_count, 1)
+
+    def test_name_lookup_age(self):
+        """
+        Rates found by name are only used for URDB_STORE_NAME_MAX_AGE_SECONDS (unless offline), rates found by label
+        are always used
+        """
+        urdb_store.import_rates(self.rates)
+        URDBRateModel.objects.update(updated=timezone.now() - timedelta(days=30))
+        with mock.patch.object(urdb_store, 'URDB_STORE_NAME_MAX_AGE_SECONDS', 7 * 24 * 3600):
+            self.assertIsNone(urdb_store.find('Residential Time of Use', 'Some Utility'))
+            self.assertEqual(urdb_store.find('Residential Time of Use', 'Some Utility', any_age=True)['label'], 'label2')
+            self.assertEqual(urdb_store.find('label2')['label'], 'label2')
@@ -31,6 +31,7 @@ import json
 import os
 import copy
 from django.test import TestCase
+from reo.nested_inputs import get_input_defs_by_version
 from reo.validators import ValidateNestedInput
 
 
@@ -179,3 +180,23 @@ class InputValidatorTests(TestCase):
         self.assertEquals(validator.isValid, True)
         self.assertEqual(validator.input_dict["Scenario"]["Site"]["ElectricTariff"]["coincident_peak_load_active_timesteps"], [[1,100,6000,7000]])
         self.assertEqual(validator.input_dict["Scenario"]["Site"]["ElectricTariff"]["coincident_peak_load_charge_us_dollars_per_kw"], [10.5])
+
+    def test_shared_input_definitions(self):
+        """
+        the input definitions are compiled once and shared by all validators, so validating must not change them
+        """
+        self.post['Scenario']['Site']['PV'] = [{'max_kw': 100, 'bogus': 1, 'tilt': None}, {'max_kw': 50}]
+        validator1 = self.get_validator(copy.deepcopy(self.post))
+        validator2 = self.get_validator(copy.deepcopy(self.post))
+        self.assertIs(validator1.nested_input_definitions, validator2.nested_input_definitions)
+        self.assertEqual(repr(validator1.nested_input_definitions), repr(get_input_defs_by_version(1)))
+        self.assertDictEqual(validator1.messages, validator2.messages)
+        self.assertDictEqual(validator1.input_dict, validator2.input_dict)
+        self.assertIn(['bogus', ['Scenario', 'Site', 'PV (number 1)']], validator1.invalid_inputs)
+
+        # list defaults are copied into the inputs
+        fuel_tariff = validator1.input_dict['Scenario']['Site']['FuelTariff']
+        definition = validator1.nested_input_definitions['Scenario']['Site']['FuelTariff']
+        name = 'chp_fuel_blended_monthly_rates_us_dollars_per_mmbtu'
+        self.assertEqual(fuel_tariff[name], definition[name]['default'])
+        self.assertIsNot(fuel_tariff[name], definition[name]['default'])
@@ -0,0 +1,91 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+import os
+import shutil
+import tempfile
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from reo.src import wind_cache
+from reo.src.wind import WindSAMSDK, combine_wind_files
+
+
+class WindCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.resource_path = os.path.join('reo', 'tests', 'wind_resource')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = mock.patch.object(wind_cache, 'WIND_CACHE_PATH', os.path.join(self.tmp_dir.name, 'cache'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def download(self, filename, year, latitude, longitude, hub_height_meters):
+        shutil.copy(os.path.join(self.resource_path, "39.91065_-105.2348_windtoolkit_2012_60min_{}m.srw".format(
+            hub_height_meters)), filename)
+        return True
+
+    def sam(self, latitude, longitude):
+        with mock.patch('reo.src.wind_resource.get_wind_resource_developer_api', side_effect=self.download) as get:
+            sam = WindSAMSDK(path_inputs=self.tmp_dir.name, hub_height_meters=50, latitude=latitude,
+                             longitude=longitude, size_class='medium')
+            return sam, get.call_count
+
+    def test_resource_and_prod_factor_cache(self):
+        sam, n_downloads = self.sam(39.91065, -105.2348)
+        self.assertEqual(n_downloads, 2)  # 40 m and 60 m
+
+        # the combined resource file has the same data as combine_wind_files
+        combined = os.path.join(self.tmp_dir.name, 'combined.srw')
+        combine_wind_files({40: os.path.join(self.resource_path, "39.91065_-105.2348_windtoolkit_2012_60min_40m.srw"),
+                            60: os.path.join(self.resource_path, "39.91065_-105.2348_windtoolkit_2012_60min_60m.srw")},
+                           combined)
+        expected, written = wind_cache.read_srw(combined), wind_cache.read_srw(sam.file_resource_full)
+        self.assertListEqual(written['header'].tolist(), expected['header'].tolist())
+        np.testing.assert_array_equal(written['data'], expected['data'])
+
+        prod_factor = sam.wind_prod_factor()
+
+        # a site in the same Wind Toolkit grid cell neither downloads resource data nor runs SAM
+        with mock.patch.object(WindSAMSDK, 'make_ssc') as make_ssc:
+            cached_sam, n_downloads = self.sam(39.91070, -105.2349)
+            make_ssc.assert_not_called()
+        self.assertEqual(n_downloads, 0)
+        self.assertListEqual(cached_sam.wind_prod_factor(), prod_factor)
+
+    def test_lru_eviction(self):
+        with mock.patch.object(wind_cache, 'WIND_CACHE_MAX_MB', 0.0007):
+            wind_cache.put('prod_factor/a', prod_factor=np.zeros(100))
+            wind_cache.put('prod_factor/b', prod_factor=np.ones(100))
+            self.assertIsNotNone(wind_cache.get('prod_factor/a'))  # now more recently used than b
+            wind_cache.put('prod_factor/c', prod_factor=np.arange(100.0))
+        self.assertIsNone(wind_cache.get('prod_factor/b'))
+        self.assertIsNotNone(wind_cache.get('prod_factor/a'))
+        self.assertIsNotNone(wind_cache.get('prod_factor/c'))
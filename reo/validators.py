@@ -37,6 +37,7 @@ import os
 import csv
 import copy
 from reo.src.urdb_rate import Rate
+from reo.src import time_series
 import re
 import uuid
 from reo.src.techs import Generator, Boiler, CHP, AbsorptionChiller, SteamTurbine
@@ -56,6 +57,61 @@ def convert_bool(value):
         return False
     raise Exception('{} is not a bool'.format(value))
 
+
+def compile_input_plan(nested_template):
+    """
+    Compile the object structure of a nested input definitions template into the plan walked by
+    ValidateNestedInput.recursively_check_input_dict, so that the template keys do not have to be classified on every
+    pass of every request.
+    :param nested_template: dict (or list of dicts, or None) of input definitions, eg. nested_input_definitions
+    :return: tuple of (object name, object template, plan of the object) for each object (singular key) in the template
+    """
+    if nested_template is None:
+        nested_template = [{}]
+    if type(nested_template) == dict:
+        nested_template = [nested_template]
+    plan = []
+    for template in nested_template:
+        for template_k, template_values in template.items():
+            if template_k[0] == template_k[0].upper() and template_k[-1] != 's':
+                plan.append((template_k, template_values, compile_input_plan(template_values)))
+    return tuple(plan)
+
+
+_compiled_input_definitions = dict()
+
+
+def compiled_input_definitions(api_version=1, off_grid_flag=False):
+    """
+    Input definitions of an api_version, with the off-grid defaults in place of the usual ones if off_grid_flag, and
+    their plan (see compile_input_plan). Built once per process for each (api_version, off_grid_flag) and shared by all
+    ValidateNestedInput instances, which must not modify them.
+    :param api_version: int
+    :param off_grid_flag: bool
+    :return: tuple of (nested input definitions, plan, list of errors in the off-grid defaults)
+    """
+    key = (api_version, bool(off_grid_flag))
+    if key not in _compiled_input_definitions:
+        definitions = get_input_defs_by_version(api_version)  # a deep copy of nested_input_definitions
+        errors = []
+        if off_grid_flag:
+            for i in off_grid_defaults.keys(): # Scenario
+                for j in off_grid_defaults[i].keys(): # Site
+                    if j[0] == j[0].lower():
+                        definitions[i][j] = off_grid_defaults[i][j]
+                    else:
+                        for k in off_grid_defaults[i][j].keys():
+                            if k[0] == k[0].lower():
+                                definitions[i][j][k] = off_grid_defaults[i][j][k]
+                            else:
+                                for l in off_grid_defaults[i][j][k].keys():
+                                    if l[0] == l[0].lower():
+                                        definitions[i][j][k][l] = off_grid_defaults[i][j][k][l]
+                                    else:
+                                        errors.append('Error with offgrid default values definition.')
+        _compiled_input_definitions[key] = (definitions, compile_input_plan(definitions), errors)
+    return _compiled_input_definitions[key]
+
 class URDB_RateValidator:
 
     error_folder = 'urdb_rate_errors'
@@ -480,10 +536,7 @@ class ValidateNestedInput:
 
     def __init__(self, input_dict, ghpghx_inputs_validation_errors=None, api_version=1):
         self.list_or_dict_objects = ['PV']
-        if api_version == 1:
-            self.nested_input_definitions = copy.deepcopy(nested_input_definitions)
-        else:
-            self.nested_input_definitions = get_input_defs_by_version(api_version)
+        self.nested_input_definitions, self.input_plan, _ = compiled_input_definitions(api_version)
         self.input_data_errors = []
         self.urdb_errors = []
         self.ghpghx_inputs_errors = ghpghx_inputs_validation_errors
@@ -507,20 +560,9 @@ class ValidateNestedInput:
 
             # Replace defaults with offgrid inputs if an offgrid run is selected
             if self.off_grid_flag:
-                for i in off_grid_defaults.keys(): # Scenario
-                    for j in off_grid_defaults[i].keys(): # Site
-                        if self.isAttribute(j):
-                            self.nested_input_definitions[i][j] = off_grid_defaults[i][j]
-                        else:
-                            for k in off_grid_defaults[i][j].keys():
-                                if self.isAttribute(k):
-                                    self.nested_input_definitions[i][j][k] = off_grid_defaults[i][j][k]
-                                else:
-                                    for l in off_grid_defaults[i][j][k].keys():
-                                        if self.isAttribute(l):
-                                            self.nested_input_definitions[i][j][k][l] = off_grid_defaults[i][j][k][l]
-                                        else:
-                                            self.input_data_errors.append('Error with offgrid default values definition.')
+                self.nested_input_definitions, self.input_plan, off_grid_errors = \
+                    compiled_input_definitions(api_version, off_grid_flag=True)
+                self.input_data_errors += off_grid_errors
 
             self.check_object_types(self.input_dict)
         if self.isValid:
@@ -707,7 +749,7 @@ class ValidateNestedInput:
                             self.check_object_types(real_input_value or {}, object_name_path=object_name_path + [name])
 
     def recursively_check_input_dict(self, nested_template, comparison_function, nested_dictionary_to_check=None,
-                                        object_name_path=[]):
+                                        object_name_path=[], plan=None):
         """
         Recursively perform comparison_function on nested_dictionary_to_check using nested_template as a guide for
         the (key: value) pairs to be checked in nested_dictionary_to_check.
@@ -724,66 +766,63 @@ class ValidateNestedInput:
         :param nested_dictionary_to_check: data to be validated; default is self.input_dict
         :param object_name_path: list of str, used to keep track of keys necessary to access a value to check in the
                 nested_template / nested_dictionary_to_check
+        :param plan: compile_input_plan(nested_template), defaults to self.input_plan for self.nested_input_definitions
         :return: None
         """
         # this is a dict of input values from the user
         if nested_dictionary_to_check is None:
             nested_dictionary_to_check = self.input_dict
 
-        # this is a corresponding dict from the input definitions used to validate structure and content
-        # template is a list to handle cases where the input is a list
-        if type(nested_template) == dict:
-            nested_template = [nested_template]
-
-        # catch case there there is no nested template
-        if nested_template is None:
-            nested_template = [{}]
+        # the objects in the corresponding dict from the input definitions used to validate structure and content
+        if plan is None:
+            if nested_template is self.nested_input_definitions:
+                plan = self.input_plan
+            else:
+                plan = compile_input_plan(nested_template)
 
         # Loop through template structure so we catch all possible keys even if the user does not provide them
-        for template in nested_template:
-            for template_k, template_values in template.items():
-                # at a key value pair, get the real value a user input (can be None)
-                real_input_values = nested_dictionary_to_check.get(template_k)
-
-                # start checking assuming that the input is fine and a list
-                # for each of coding we will populate real_values_list with a list
-                continue_checking = True
-                input_isDict = False
-                real_values_list = None
-
-                # if the value is a dict make it a list and update the dict or list indicator
-                if type(real_input_values) == dict:
-                    input_isDict = True
-                    real_values_list = [real_input_values]
-                # if the value is a list just update the real_values_list variable
-                if type(real_input_values) == list:
-                    real_values_list = real_input_values
-
-                # if the value is a None make it a list with one dict in it
-                if real_input_values is None:
-                    input_isDict = True
-                    real_values_list = [{}]
-
-                # if the key is an object name apply the comparison function to all key/value pairs in each dict in the list of values
-                if self.isSingularKey(template_k):
-
-                    # number is indexed on 1, used currently only for telling PV's apart
-                    for number, real_values in enumerate(real_values_list):
-                        number += 1
-                        # real values will always be a list per validation above
-                        comparison_function(object_name_path=object_name_path + [template_k],
-                                            template_values=template_values, real_values=real_values,
-                                            number=number, input_isDict=input_isDict)
-
-                        # recursively apply this function to the real values dict
-                        self.recursively_check_input_dict(template[template_k], comparison_function,
-                                                            real_values or {},
-                                                            object_name_path=object_name_path + [template_k])
-
-                    # if at the end of validation we are left with a list containing one dict, convert the entry fot the object back to
-                    # a dict from a list
-                    if len(real_values_list) == 1:
-                        nested_dictionary_to_check[template_k] = real_values_list[0]
+        for template_k, template_values, object_plan in plan:
+            # at a key value pair, get the real value a user input (can be None)
+            real_input_values = nested_dictionary_to_check.get(template_k)
+
+            # start checking assuming that the input is fine and a list
+            # for each of coding we will populate real_values_list with a list
+            continue_checking = True
+            input_isDict = False
+            real_values_list = None
+
+            # if the value is a dict make it a list and update the dict or list indicator
+            if type(real_input_values) == dict:
+                input_isDict = True
+                real_values_list = [real_input_values]
+            # if the value is a list just update the real_values_list variable
+            if type(real_input_values) == list:
+                real_values_list = real_input_values
+
+            # if the value is a None make it a list with one dict in it
+            if real_input_values is None:
+                input_isDict = True
+                real_values_list = [{}]
+
+            # apply the comparison function to all key/value pairs in each dict in the list of values
+            # number is indexed on 1, used currently only for telling PV's apart
+            for number, real_values in enumerate(real_values_list):
+                number += 1
+                # real values will always be a list per validation above
+                comparison_function(object_name_path=object_name_path + [template_k],
+                                    template_values=template_values, real_values=real_values,
+                                    number=number, input_isDict=input_isDict)
+
+                # recursively apply this function to the real values dict
+                self.recursively_check_input_dict(template_values, comparison_function,
+                                                    real_values or {},
+                                                    object_name_path=object_name_path + [template_k],
+                                                    plan=object_plan)
+
+            # if at the end of validation we are left with a list containing one dict, convert the entry fot the object back to
+            # a dict from a list
+            if len(real_values_list) == 1:
+                nested_dictionary_to_check[template_k] = real_values_list[0]
 
     def update_attribute_value(self, object_name_path, number, attribute, value):
         """
@@ -960,8 +999,8 @@ class ValidateNestedInput:
         :return: None
         """
         if real_values is not None:
-            rv = copy.deepcopy(real_values)
-            for name, value in rv.items():
+            rv = list(real_values.items())  # the attributes can be deleted while looping
+            for name, value in rv:
                 if self.isAttribute(name):
                     if value is None:
                         self.delete_attribute(object_name_path, number, name)
@@ -1019,8 +1058,7 @@ class ValidateNestedInput:
         :return: None
         """
         if real_values is not None:
-            rv = copy.deepcopy(real_values)
-            for name, value in rv.items():
+            for name, value in real_values.items():
                 if self.isAttribute(name):
                     if type(value) == float:
                         if np.isnan(value):
@@ -1045,8 +1083,8 @@ class ValidateNestedInput:
         :return: None
         """
         if real_values is not None:
-            rv = copy.deepcopy(real_values)
-            for name, value in rv.items():
+            rv = list(real_values.items())  # the attributes can be deleted while looping
+            for name, value in rv:
                 if self.isAttribute(name):
                     if name not in template_values.keys():
                         self.delete_attribute(object_name_path, number, name)
@@ -2006,13 +2044,20 @@ class ValidateNestedInput:
 
         def test_conversion(conversion_function, conversion_function_name, name, value, object_name_path, number, input_isDict, record_errors=True, list_of_list_inner_conversion_function=None):
             try:
-                series = pd.Series(value)
-                if series.isnull().values.any():
-                    raise NotImplementedError
-                if list_of_list_inner_conversion_function == None:
-                    new_value = conversion_function(value)
+                # time series (list_of_float) are checked and converted as arrays, anything else element-wise
+                array = time_series.to_array(value) if conversion_function is list_of_float else None
+                if array is not None:
+                    if time_series.has_non_finite(array):
+                        raise NotImplementedError
+                    new_value = array.tolist()
                 else:
-                    new_value = conversion_function(value, inner_list_conversion_function = list_of_list_inner_conversion_function)
+                    series = pd.Series(value)
+                    if series.isnull().values.any():
+                        raise NotImplementedError
+                    if list_of_list_inner_conversion_function == None:
+                        new_value = conversion_function(value)
+                    else:
+                        new_value = conversion_function(value, inner_list_conversion_function = list_of_list_inner_conversion_function)
             except ValueError:
                 if record_errors:
                     if input_isDict or input_isDict is None:
@@ -2031,12 +2076,12 @@ class ValidateNestedInput:
                 if record_errors:
                     if input_isDict or input_isDict is None:
                         self.input_data_errors.append(
-                            '%s in %s contains at least one NaN value.' % (name,
+                            '%s in %s contains at least one NaN or infinite value.' % (name,
                             self.object_name_string(object_name_path))
                         )
                     if input_isDict is False:
                         self.input_data_errors.append(
-                            '%s in %s (number %s) contains at least one NaN value.' % (name,
+                            '%s in %s (number %s) contains at least one NaN or infinite value.' % (name,
                             self.object_name_string(object_name_path), number)
                         )
             else:
@@ -2170,7 +2215,8 @@ class ValidateNestedInput:
                     if isinstance(template_value.get('type'), list) and "list_of_float" in template_value.get('type'):
                         # then input can be float or list_of_float, but for database we have to use only one type
                         default = [default]
-                    self.update_attribute_value(object_name_path, number, template_key, default)
+                    # copy list defaults, since the definitions are shared by all requests
+                    self.update_attribute_value(object_name_path, number, template_key, copy.deepcopy(default))
                     if input_isDict or input_isDict is None:
                         self.defaults_inserted.append([template_key, object_name_path])
                     if input_isDict is False:
@@ -2300,15 +2346,14 @@ class ValidateNestedInput:
 
     def validate_timestep_series(self, series, obj_name, attr_name, time_steps_per_hour, number=1, input_isDict=None):
         max_timesteps = 8760*time_steps_per_hour
-        for ts in series:
-            if ts is not None and (ts < 1 or ts > max_timesteps or ts%1>0):
-                self.input_data_errors.append((
-                    "At least one invalid timestep value ({}) for {}. Timesteps must be integer values between 1 and {} inclusive".format(
-                    ts, attr_name,max_timesteps )))
-                if input_isDict is False:
-                    self.input_data_errors[-1] = self.input_data_errors[-1].replace(
-                        '. Timesteps', ' in {} {}. Timesteps'.format(obj_name, number))
-                break
+        ts = time_series.first_invalid_timestep(series, max_timesteps)
+        if ts is not None:
+            self.input_data_errors.append((
+                "At least one invalid timestep value ({}) for {}. Timesteps must be integer values between 1 and {} inclusive".format(
+                ts, attr_name,max_timesteps )))
+            if input_isDict is False:
+                self.input_data_errors[-1] = self.input_data_errors[-1].replace(
+                    '. Timesteps', ' in {} {}. Timesteps'.format(obj_name, number))
         return 
     
     def validate_8760(self, attr, obj_name, attr_name, time_steps_per_hour, number=1, input_isDict=None):
@@ -2326,10 +2371,10 @@ class ValidateNestedInput:
         :return: None
         """
         n = len(attr)
-        length_list = [8760, 17520, 35040]
+        time_steps_per_hour_in_series = time_series.time_steps_per_hour_of(attr)
 
         if time_steps_per_hour != 1:
-            if n not in length_list:
+            if time_steps_per_hour_in_series is None:
                 self.input_data_errors.append((
                     "Invalid length for {}. Samples must be hourly (8,760 samples), 30 minute (17,520 samples), "
                     "or 15 minute (35,040 samples)").format(attr_name)
@@ -2343,10 +2388,7 @@ class ValidateNestedInput:
                         if input_isDict is False:
                             self.resampled_inputs.append(
                                 ["Downsampled {} from 15 minute resolution to 30 minute resolution to match time_steps_per_hour via average.".format(attr_name), [obj_name + ' (number %s)'.format(number)]])
-                        index = pd.date_range('1/1/2000', periods=n, freq='15T')
-                        series = pd.Series(attr, index=index)
-                        series = series.resample('30T').mean()
-                        resampled_val = series.tolist()
+                        resampled_val = time_series.resample(attr, 4, 2)
                     elif time_steps_per_hour == 4 and n/8760 == 2:
                         if input_isDict or input_isDict is None:
                             self.resampled_inputs.append(
@@ -2355,7 +2397,7 @@ class ValidateNestedInput:
                             self.resampled_inputs.append(
                                 ["Upsampled {} from 30 minute resolution to 15 minute resolution to match time_steps_per_hour via forward-fill.".format(attr_name), [obj_name + ' (number %s)'.format(number)]])
 
-                        resampled_val = [x for x in attr for _ in [1, 2]]
+                        resampled_val = time_series.resample(attr, 2, 4)
                     elif time_steps_per_hour == 4 and n/8760 == 1:
                         if input_isDict or input_isDict is None:
                             self.resampled_inputs.append(
@@ -2364,7 +2406,7 @@ class ValidateNestedInput:
                             self.resampled_inputs.append(
                                 ["Upsampled {} from hourly resolution to 15 minute resolution to match time_steps_per_hour via forward-fill.".format(attr_name), [obj_name + ' (number %s)'.format(number)]])
 
-                        resampled_val = [x for x in attr for _ in [1, 2, 3, 4]]
+                        resampled_val = time_series.resample(attr, 1, 4)
                     else:  # time_steps_per_hour == 2 and n/8760 == 1:
                         if input_isDict or input_isDict is None:
                             self.resampled_inputs.append(
@@ -2373,7 +2415,7 @@ class ValidateNestedInput:
                             self.resampled_inputs.append(
                                 ["Upsampled {} from hourly resolution to 30 minute resolution to match time_steps_per_hour via forward-fill.".format(attr_name), [obj_name + ' (number %s)'.format(number)]])
 
-                        resampled_val = [x for x in attr for _ in [1, 2]]
+                        resampled_val = time_series.resample(attr, 1, 2)
                     self.update_attribute_value(["Scenario", "Site", obj_name], number, attr_name, resampled_val)
 
         elif n == 8760:
@@ -2390,10 +2432,8 @@ class ValidateNestedInput:
                     ["Downsampled {} from {} minute resolution to hourly resolution to match time_steps_per_hour via average.".format(
                         attr_name, resolution_minutes), [obj_name + ' (number {})'.format(number)]])
 
-            index = pd.date_range('1/1/2000', periods=n, freq='{}T'.format(resolution_minutes))
-            series = pd.Series(attr, index=index)
-            series = series.resample('1H').mean()
-            self.update_attribute_value(["Scenario", "Site", obj_name], number, attr_name, series.tolist())
+            self.update_attribute_value(["Scenario", "Site", obj_name], number, attr_name,
+                                        time_series.resample(attr, time_steps_per_hour_in_series, 1))
         else:
             if input_isDict or input_isDict is None:
                 self.input_data_errors.append("Invalid length for {}. Samples must be hourly (8,760 samples), 30 minute (17,520 samples), or 15 minute (35,040 samples)".format(attr_name))
@@ -34,7 +34,9 @@ import traceback as tb
 import uuid
 import copy
 import json
+from django.conf import settings
 from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
 from reo.src.load_profile import BuiltInProfile, LoadProfile
 from reo.src.load_profile_boiler_fuel import LoadProfileBoilerFuel
 from reo.src.load_profile_chiller_thermal import LoadProfileChillerThermal
@@ -47,6 +49,7 @@ import logging
 log = logging.getLogger(__name__)
 from reo.src.techs import Generator, CHP, AbsorptionChiller, Boiler, SteamTurbine
 from reo.src.emissions_calculator import EmissionsCalculator, EASIURCalculator
+from reo.src.bill_calculator import BillCalculator, get_urdb_responses
 from django.http import HttpResponse
 from django.template import  loader
 import pandas as pd
@@ -293,6 +296,62 @@ def easiur_costs(request):
         return JsonResponse({"Error": "Unexpected Error. Please check your input parameters and contact reopt@nrel.gov if problems persist."}, status=500)
 
 
+@require_http_methods(["POST"])
+def bill_calculator(request):
+    """
+    Year one utility bills of one or more load profiles under one or more tariffs, without an optimization.
+    POST a JSON body with:
+    :param tariffs: list of dicts of ElectricTariff inputs (urdb_response, urdb_label, or urdb_utility_name and
+        urdb_rate_name; optionally tou_energy_rates_us_dollars_per_kwh, add_tou_energy_rates_to_urdb_rate,
+        coincident_peak_load_active_timesteps, and coincident_peak_load_charge_us_dollars_per_kw), or "tariff" for one.
+        At most BILL_CALCULATOR_MAX_TARIFFS tariffs are accepted, and at most BILL_CALCULATOR_MAX_URDB_DOWNLOADS
+        rates that are not in the URDB rate store are downloaded.
+    :param loads_kw: list of load profiles (8760 * time_steps_per_hour grid purchases in kW), or "load_kw" for one.
+        At most BILL_CALCULATOR_MAX_LOADS load profiles are accepted.
+    :param year: int, year of the load profiles, defaults to 2017
+    :param time_steps_per_hour: int, defaults to 1
+    :return bills: list (one per tariff) of lists (one per load) of year one costs
+    """
+    try:
+        request_dict = json.loads(request.body)
+        if not isinstance(request_dict, dict):
+            raise ValueError("The request body must be a JSON object.")
+        tariffs = request_dict['tariffs'] if 'tariffs' in request_dict else [request_dict['tariff']]
+        loads_kw = request_dict['loads_kw'] if 'loads_kw' in request_dict else [request_dict['load_kw']]
+        if not isinstance(tariffs, list) or not isinstance(loads_kw, list):
+            raise ValueError("tariffs and loads_kw must be lists.")
+        if len(tariffs) > settings.BILL_CALCULATOR_MAX_TARIFFS:
+            raise ValueError("At most {} tariffs are allowed.".format(settings.BILL_CALCULATOR_MAX_TARIFFS))
+        if len(loads_kw) > settings.BILL_CALCULATOR_MAX_LOADS:
+            raise ValueError("At most {} load profiles are allowed.".format(settings.BILL_CALCULATOR_MAX_LOADS))
+        year = int(request_dict.get('year', 2017))
+        time_steps_per_hour = int(request_dict.get('time_steps_per_hour', 1))
+        if time_steps_per_hour not in [1, 2, 4]:
+            raise ValueError("time_steps_per_hour must be 1, 2, or 4.")
+
+        loads_kw = np.array(loads_kw, dtype=float)
+        if loads_kw.ndim != 2:
+            raise ValueError("Each load profile must have {} values.".format(8760 * time_steps_per_hour))
+        urdb_responses = get_urdb_responses(tariffs, settings.BILL_CALCULATOR_MAX_URDB_DOWNLOADS)
+        bills = [BillCalculator.from_tariff(dict(tariff, urdb_response=urdb_response), year,
+                                            time_steps_per_hour).calculate(loads_kw)
+                 for tariff, urdb_response in zip(tariffs, urdb_responses)]
+        return JsonResponse({"bills": bills})
+
+    except ValueError as e:
+        return JsonResponse({"Error": str(e.args[0])}, status=400)
+
+    except KeyError as e:
+        return JsonResponse({"Error. Missing": str(e.args[0])}, status=400)
+
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        debug_msg = "exc_type: {}; exc_value: {}; exc_traceback: {}".format(exc_type, exc_value.args[0],
+                                                                            tb.format_tb(exc_traceback))
+        log.debug(debug_msg)
+        return JsonResponse({"Error": "Unexpected error in bill_calculator endpoint. Check log for more."}, status=500)
+
+
 def fuel_emissions_rates(request):
     try:
 
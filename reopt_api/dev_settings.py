@@ -185,6 +185,9 @@ CELERY_WORKER_MAX_MEMORY_PER_CHILD = 4000000 # 4 GB
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 STATIC_URL = '/static/'
 
+# caches, stores, and worker pools
+from reopt_api.performance_settings import *
+
 APPEND_SLASH = False
 TASTYPIE_ALLOW_MISSING_SLASH = True
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
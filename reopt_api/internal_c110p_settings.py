@@ -156,6 +156,9 @@ if 'test' in sys.argv:
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 STATIC_URL = '/static/'
 
+# caches, stores, and worker pools
+from reopt_api.performance_settings import *
+
 APPEND_SLASH = False
 TASTYPIE_ALLOW_MISSING_SLASH = True
 
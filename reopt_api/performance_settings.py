@@ -0,0 +1,146 @@
+# *********************************************************************************
+# REopt, Copyright (c) 2019-2020, Alliance for Sustainable Energy, LLC.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice, this list
+# of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or other
+# materials provided with the distribution.
+#
+# Neither the name of the copyright holder nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE
+# OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# *********************************************************************************
+"""
+Settings of the caches, stores, and worker pools of the REopt API, shared by all of the settings modules
+(`from reopt_api.performance_settings import *`). Each one can be set with the environment variable of the same name.
+"""
+import json
+import os
+import tempfile
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() not in ['false', '0', '']
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _cache_dir(name):
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+# Julia HTTP API (reo/src/julia_client.py)
+JULIA_HOST = os.environ.get('JULIA_HOST', "julia")  # host of a single Julia server listening on port 8081
+# "host:port" of each Julia server, eg. JULIA_HOSTS="julia:8081,julia:8082"
+JULIA_HOSTS = [h.strip() for h in os.environ.get('JULIA_HOSTS', '').split(',') if h.strip()] or [JULIA_HOST + ":8081"]
+JULIA_CONNECT_TIMEOUT = _env_float('JULIA_CONNECT_TIMEOUT', 5)  # seconds
+JULIA_HEALTH_CHECK_SECONDS = _env_float('JULIA_HEALTH_CHECK_SECONDS', 15)  # seconds between /health checks of a server
+JULIA_HEALTH_TIMEOUT = _env_float('JULIA_HEALTH_TIMEOUT', 2)  # seconds, a server that does not answer is busy
+# seconds to wait for the response of each endpoint, eg. JULIA_TIMEOUT_REOPT=900
+JULIA_TIMEOUTS = {key[len('JULIA_TIMEOUT_'):].lower(): float(value) for key, value in os.environ.items()
+                  if key.startswith('JULIA_TIMEOUT_')}
+
+# Routing of jobs to fast and slow celery queues (reo/src/job_routing.py), off if SLOW_QUEUE_NAME is not set
+SLOW_QUEUE_NAME = os.environ.get('SLOW_QUEUE_NAME')
+FAST_QUEUE_NAME = os.environ.get('FAST_QUEUE_NAME', os.environ.get('APP_QUEUE_NAME', 'localhost'))
+JOB_ROUTING_SLOW_SECONDS = _env_float('JOB_ROUTING_SLOW_SECONDS', 120)  # jobs predicted to take longer are slow
+JOB_ROUTING_HISTORY_RUNS = _env_int('JOB_ROUTING_HISTORY_RUNS', 20)  # recent runs with the same rate used for timing
+# overrides of job_routing.default_weights, eg. JOB_ROUTING_WEIGHTS='{"chp": 90, "techs": {"ghp": 120}}'
+JOB_ROUTING_WEIGHTS = json.loads(os.environ.get('JOB_ROUTING_WEIGHTS', '{}'))
+
+# Solve time regression (reo/src/solve_time.py)
+SOLVE_TIME_MODEL_PATH = os.environ.get('SOLVE_TIME_MODEL_PATH', os.path.join('reo', 'solve_time_model.json'))
+SOLVE_TIME_TIMEOUT_MARGIN_SECONDS = _env_float('SOLVE_TIME_TIMEOUT_MARGIN_SECONDS', 1200)
+
+# Results of identical jobs (reo/src/result_cache.py), users can opt out with the query parameter use_result_cache=false
+RESULT_CACHE_ENABLED = _env_bool('RESULT_CACHE_ENABLED', True)
+RESULT_CACHE_TTL_DAYS = _env_float('RESULT_CACHE_TTL_DAYS', 30)  # only runs created within this many days are reused
+RESULT_CACHE_DATA_VERSION = os.environ.get('RESULT_CACHE_DATA_VERSION', '')  # change to invalidate all results
+
+# DataManager payloads passed between celery tasks by handle (reo/src/dfm_store.py), only used when DFM_STORE_PATH is
+# set to a directory that is shared by all celery workers (the tasks of a job can run on different pods)
+DFM_STORE_PATH = os.environ.get('DFM_STORE_PATH', '')
+DFM_STORE_ENABLED = _env_bool('DFM_STORE_ENABLED', True) and DFM_STORE_PATH != ''
+DFM_STORE_MAX_AGE_SECONDS = _env_float('DFM_STORE_MAX_AGE_SECONDS', 2 * 24 * 3600)  # parts of failed runs
+
+# Packed built-in load profiles (reo/src/load_profile_library.py)
+LOAD_PROFILE_LIBRARY_PATH = os.environ.get('LOAD_PROFILE_LIBRARY_PATH',
+                                           os.path.join('input_files', 'LoadProfiles', 'load_profile_library.npy'))
+
+# Packed AVERT hourly emissions factors (reo/src/emissions_calculator.py)
+AVERT_EMISSIONS_CACHE_PATH = os.environ.get('AVERT_EMISSIONS_CACHE_PATH',
+                                            os.path.join('reo', 'src', 'data', 'AVERT_hourly_emissions.npy'))
+
+# Adjusted EASIUR grids (reo/src/pyeasiur.py)
+EASIUR_CACHE_PATH = os.environ.get('EASIUR_CACHE_PATH', _cache_dir('reopt_easiur_cache'))
+
+# Parsed URDB rates (reo/src/tariff_cache.py)
+TARIFF_CACHE_ENABLED = _env_bool('TARIFF_CACHE_ENABLED', True)
+TARIFF_CACHE_SIZE = _env_int('TARIFF_CACHE_SIZE', 64)  # parsed rates kept in memory by each process
+TARIFF_CACHE_PATH = os.environ.get('TARIFF_CACHE_PATH', '')  # directory shared by the workers, not used if empty
+
+# Local store of URDB rates (reo/src/urdb_store.py)
+URDB_STORE_ENABLED = _env_bool('URDB_STORE_ENABLED', True)
+URDB_OFFLINE = _env_bool('URDB_OFFLINE', False)  # never download rates, rates that are not in the store are not found
+# rates found by utility and rate name are downloaded again after this many seconds (labels never change)
+URDB_STORE_NAME_MAX_AGE_SECONDS = _env_float('URDB_STORE_NAME_MAX_AGE_SECONDS', 7 * 24 * 3600)
+# rates that the bill_calculator endpoint may download from URDB per request, the others must be in the store
+BILL_CALCULATOR_MAX_URDB_DOWNLOADS = _env_int('BILL_CALCULATOR_MAX_URDB_DOWNLOADS', 1)
+# load profiles and tariffs that the bill_calculator endpoint accepts per request
+BILL_CALCULATOR_MAX_LOADS = _env_int('BILL_CALCULATOR_MAX_LOADS', 100)
+BILL_CALCULATOR_MAX_TARIFFS = _env_int('BILL_CALCULATOR_MAX_TARIFFS', 20)
+
+# PVWatts API (reo/src/pvwatts.py) and its cache (reo/src/pvwatts_cache.py)
+PVWATTS_CONNECT_TIMEOUT = _env_float('PVWATTS_CONNECT_TIMEOUT', 5)  # seconds
+PVWATTS_READ_TIMEOUT = _env_float('PVWATTS_READ_TIMEOUT', 60)  # seconds
+PVWATTS_CACHE_ENABLED = _env_bool('PVWATTS_CACHE_ENABLED', True)
+PVWATTS_CACHE_PATH = os.environ.get('PVWATTS_CACHE_PATH', _cache_dir('reopt_pvwatts_cache'))
+PVWATTS_CACHE_GRID_DEGREES = _env_float('PVWATTS_CACHE_GRID_DEGREES', 0.01)  # 0 to not round latitude and longitude
+PVWATTS_CACHE_ANGLE_DEGREES = _env_float('PVWATTS_CACHE_ANGLE_DEGREES', 0.1)  # 0 to not round tilt and azimuth
+PVWATTS_CACHE_MAX_AGE_DAYS = _env_float('PVWATTS_CACHE_MAX_AGE_DAYS', 365)  # age at which responses are queried again
+PVWATTS_CACHE_MAX_MB = _env_float('PVWATTS_CACHE_MAX_MB', 2048)
+
+# Local PVWatts engine (reo/src/pvwatts_local.py)
+PV_ENGINE = os.environ.get('PV_ENGINE', 'api').lower()  # "local" to run pvwattsv5 with local weather files
+WEATHER_FILES_PATH = os.environ.get('WEATHER_FILES_PATH', os.path.join('input_files', 'Weather'))
+PV_LOCAL_FALLBACK_TO_API = _env_bool('PV_LOCAL_FALLBACK_TO_API', True)  # query PVWatts when no station is close enough
+
+# Wind Toolkit resource data and SAM production factors (reo/src/wind_cache.py)
+WIND_CACHE_ENABLED = _env_bool('WIND_CACHE_ENABLED', True)
+WIND_CACHE_PATH = os.environ.get('WIND_CACHE_PATH', _cache_dir('reopt_wind_cache'))
+WIND_CACHE_MAX_MB = _env_float('WIND_CACHE_MAX_MB', 1024)
+
+# Threads for the PVWatts and Wind fetches of setup_scenario (reo/src/prefetch.py), 0 to fetch in place
+SETUP_FETCH_WORKERS = _env_int('SETUP_FETCH_WORKERS', 8)
+
+# Process pool of the outage simulator (resilience_stats/outage_simulator_LF.py)
+OUTAGE_SIM_POOL_MIN_TIMESTEPS = _env_int('OUTAGE_SIM_POOL_MIN_TIMESTEPS', 17520)  # smaller simulations run in process
+OUTAGE_SIM_POOL_WORKERS = _env_int('OUTAGE_SIM_POOL_WORKERS', 0)  # 0 for the number of CPUs
+OUTAGE_SIM_POOL_CHUNK_SIZE = _env_int('OUTAGE_SIM_POOL_CHUNK_SIZE', 0)  # outages per task, 0 to split evenly
+OUTAGE_SIM_SWEEP_BATCH_OUTAGES = _env_int('OUTAGE_SIM_SWEEP_BATCH_OUTAGES', 876000)  # outages simulated per array batch
@@ -179,6 +179,9 @@ ROLLBAR = {
 
 rollbar.init(**ROLLBAR)
 
+# caches, stores, and worker pools
+from reopt_api.performance_settings import *
+
 APPEND_SLASH = False
 TASTYPIE_ALLOW_MISSING_SLASH = True
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
@@ -33,7 +33,6 @@ import uuid
 import numpy as np
 import requests
 import traceback
-import os
 
 from celery import shared_task
 from django.core.exceptions import ValidationError
@@ -50,10 +49,11 @@ logger = get_task_logger(__name__)
 from reo.exceptions import SaveToDatabase, UnexpectedError, REoptFailedToStartError
 
 from reo.models import ScenarioModel, FinancialModel
+from reo.src.julia_client import get_julia_client
 from job.models import APIMeta
-from resilience_stats.models import ResilienceModel, ERPMeta, ERPOutageInputs, ERPGeneratorInputs, ERPPrimeGeneratorInputs, ERPPVInputs, ERPElectricStorageInputs, ERPOutputs, get_erp_input_dict_from_run_uuid
+from resilience_stats.models import ResilienceModel, OutageSweepModel, ERPMeta, ERPOutageInputs, ERPGeneratorInputs, ERPPrimeGeneratorInputs, ERPPVInputs, ERPElectricStorageInputs, ERPOutputs, get_erp_input_dict_from_run_uuid
 from resilience_stats.validators import validate_run_uuid
-from resilience_stats.views import run_outage_sim
+from resilience_stats.views import run_outage_sim, run_outage_sim_sweep
 
 
 class ERPJob(ModelResource):
@@ -396,8 +396,7 @@ def run_erp_task(run_uuid):
 
     logger.info("Running ERP tool ...")
     try:
-        julia_host = os.environ.get('JULIA_HOST', "julia")
-        response = requests.post("http://" + julia_host + ":8081/erp/", json=data)
+        response = get_julia_client().post("erp", json=data)
         response_json = response.json()
         if response.status_code == 500:
             raise REoptFailedToStartError(task=name, message=response_json["error"], run_uuid=run_uuid, user_uuid=user_uuid)
@@ -445,3 +444,21 @@ def run_outage_sim_task(scenariomodel_id, run_uuid, bau):
         exc_type, exc_value, exc_traceback = sys.exc_info()
         err = SaveToDatabase(exc_type, exc_value.args[0], exc_traceback, task='resilience_model', run_uuid=run_uuid)
         err.save_to_db()
+
+
+@shared_task
+def run_outage_sim_sweep_task(sweep_uuid):
+    """
+    Run an outage simulation sweep and save its results (or error) to its OutageSweepModel.
+    :param sweep_uuid: OutageSweepModel.sweep_uuid
+    """
+    sweep = OutageSweepModel.objects.select_related('scenariomodel').get(sweep_uuid=sweep_uuid)
+    run_uuid = str(sweep.scenariomodel.run_uuid)
+    try:
+        results = run_outage_sim_sweep(run_uuid, sweep.sizes)
+        OutageSweepModel.objects.filter(sweep_uuid=sweep_uuid).update(results=results, status="Completed")
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        err = UnexpectedError(exc_type, exc_value.args[0], exc_traceback, task='resilience_stats', run_uuid=run_uuid)
+        err.save_to_db()
+        OutageSweepModel.objects.filter(sweep_uuid=sweep_uuid).update(status="Error", error=err.message)
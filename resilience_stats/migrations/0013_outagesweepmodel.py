@@ -0,0 +1,29 @@
+# Generated by Django 4.0.7 on 2026-10-18 14:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reo', '0158_profilemodel_setup_scenario_fetch'),
+        ('resilience_stats', '0012_alter_erpoutageinputs_max_outage_duration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutageSweepModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sweep_uuid', models.UUIDField(unique=True)),
+                ('status', models.TextField(default='Running')),
+                ('sizes', django.contrib.postgres.fields.ArrayField(base_field=django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None), size=None)),
+                ('results', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('scenariomodel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reo.scenariomodel')),
+            ],
+        ),
+    ]
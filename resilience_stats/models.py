@@ -644,6 +644,24 @@ class ResilienceModel(models.Model):
             raise err
         return rm
 
+
+class OutageSweepModel(models.Model):
+    """
+    Status and results of an outage simulation sweep over battery and generator sizes, which is run by a celery task
+    because a large grid of sizes does not fit in a web request.
+    """
+    sweep_uuid = models.UUIDField(unique=True)
+    scenariomodel = models.ForeignKey(
+        ScenarioModel,
+        to_field='id',
+        on_delete=models.CASCADE
+    )
+    status = models.TextField(default="Running")
+    sizes = ArrayField(ArrayField(models.FloatField()))
+    results = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created = models.DateTimeField(auto_now_add=True)
+
 def get_erp_input_dict_from_run_uuid(run_uuid:str):
     """
     Construct the input dict for REopt backup reliability
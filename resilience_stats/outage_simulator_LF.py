@@ -28,10 +28,30 @@
 # OF THE POSSIBILITY OF SUCH DAMAGE.
 # *********************************************************************************
 #!usr/bin/python
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from math import floor
-import pandas as pd
-from celery import group, shared_task, chord
-from time import sleep
+from multiprocessing import shared_memory
+import numpy as np
+from celery import shared_task
+from django.conf import settings
+
+"""
+Outage simulation backends:
+    "serial": simulate_outage for one start time at a time (pure Python reference implementation)
+    "vectorized": simulate_outages_vectorized for all start times at once
+    "pool": simulate_outages_vectorized on contiguous blocks of start times in a pool of processes
+Unless a backend is passed to simulate_outages, "vectorized" or "pool" is selected from the number of time steps.
+"""
+OUTAGE_SIM_BACKENDS = ["serial", "vectorized", "pool"]
+# at least this many time steps are simulated in a process pool (when more than one core is available)
+OUTAGE_SIM_POOL_MIN_TIMESTEPS = settings.OUTAGE_SIM_POOL_MIN_TIMESTEPS
+OUTAGE_SIM_POOL_WORKERS = settings.OUTAGE_SIM_POOL_WORKERS or os.cpu_count() or 1
+# number of start times in each block sent to a pool worker, 0 to split the start times evenly across the workers
+OUTAGE_SIM_POOL_CHUNK_SIZE = settings.OUTAGE_SIM_POOL_CHUNK_SIZE
+# maximum number of outages (system sizes x start times) simulated together by simulate_outages_sweep
+OUTAGE_SIM_SWEEP_BATCH_OUTAGES = settings.OUTAGE_SIM_SWEEP_BATCH_OUTAGES
 
 
 @shared_task
@@ -106,9 +126,112 @@ def simulate_outage(init_time_step, diesel_kw, fuel_available, b, m, batt_kwh, b
     return n_timesteps / n_steps_per_hour  # met the critical load for all time steps
 
 
+def simulate_outages_vectorized(diesel_kw, fuel_available, b, m, batt_kwh, batt_kw, batt_roundtrip_efficiency,
+                                n_timesteps, n_steps_per_hour, batt_soc_kwh, crit_load, chp_kw, init_time_steps=None):
+    """
+    Determine how long the critical load can be met for outages starting at many time steps at once.
+    Applies the same dispatch rules as simulate_outage, but advances the battery state of charge and the fuel remaining
+    for every outage start time together as arrays. Start times that fail to meet the load are dropped from the arrays,
+    and the simulation stops as soon as every start time has failed (or a full year has been simulated).
+    The generator and battery sizes can be given per outage (eg. to simulate several system sizes in one batch).
+    :param diesel_kw: float or list of float (one per outage), generator capacity
+    :param fuel_available: float or list of float (one per outage), gallons
+    :param b: float, diesel fuel burn rate intercept coefficient (y = m*x + b)  [gal/hr]
+    :param m: float, diesel fuel burn rate slope (y = m*x + b)  [gal/kWh]
+    :param batt_kwh: float or list of float (one per outage), battery capacity
+    :param batt_kw: float or list of float (one per outage), battery inverter capacity (AC rating)
+    :param batt_roundtrip_efficiency:
+    :param n_timesteps: int, number of time steps in a year
+    :param n_steps_per_hour: int, number of time steps per hour
+    :param batt_soc_kwh: list of float, battery state of charge in kWh at the start of each outage
+    :param crit_load: list of float, load after DER (PV, Wind, ...)
+    :param chp_kw: float, CHP capacity
+    :param init_time_steps: list of int, outage start time steps; defaults to every time step in the year
+    :return: list of float, number of hours that the critical load can be met using load following, one value per
+        start time step (in the same order as init_time_steps)
+    """
+    crit_load = np.asarray(crit_load, dtype=float)
+    if init_time_steps is None:
+        init_time_steps = np.arange(n_timesteps)
+    else:
+        init_time_steps = np.asarray(init_time_steps, dtype=int)
+    n_outages = len(init_time_steps)
+    r = np.full(n_outages, n_timesteps / n_steps_per_hour)  # met the critical load for all time steps
+
+    def per_outage(value):
+        return np.broadcast_to(np.asarray(value, dtype=float), (n_outages,)).copy()
+
+    # state and system sizes of the outages that have not failed yet
+    alive = np.arange(n_outages)
+    starts = init_time_steps.copy()
+    soc = np.array(batt_soc_kwh, dtype=float)
+    fuel = per_outage(fuel_available)
+    diesel_kw = per_outage(diesel_kw)
+    batt_kwh = per_outage(batt_kwh)
+    batt_kw = per_outage(batt_kw)
+    batt_charge_limit = batt_kw / n_steps_per_hour * batt_roundtrip_efficiency
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(n_timesteps):
+            if len(alive) == 0:
+                break
+            t = (starts + i) % n_timesteps  # for wrapping around end of year
+            load_kw = crit_load[t] - chp_kw  # Run CHP. No limit on fuel, no turndown constraint
+
+            # load is met: charge battery if there's room in the battery
+            excess = load_kw < 0
+            charge = excess & (soc < batt_kwh)
+            soc[charge] += np.minimum(np.minimum(
+                batt_kwh[charge] - soc[charge],  # room available
+                batt_charge_limit[charge]),  # inverter capacity
+                -load_kw[charge] / n_steps_per_hour * batt_roundtrip_efficiency,  # excess energy
+            )
+
+            # otherwise check if we can meet load with generator then storage
+            fuel_needed = (m * load_kw + b) / n_steps_per_hour
+            # (gal/kWh * kW + gal/hr) * hr = gal
+            gen_fits = load_kw <= diesel_kw
+            fuel_fits = fuel_needed <= fuel
+
+            diesel_meets = ~excess & gen_fits & fuel_fits  # diesel can meet load
+            fuel[diesel_meets] -= fuel_needed[diesel_meets]
+            load_kw[diesel_meets] = 0
+
+            tank_limited = ~excess & gen_fits & ~fuel_fits  # tank is limiting factor
+            load_kw[tank_limited] -= np.maximum(0, (fuel[tank_limited] * n_steps_per_hour - b) / m)
+            fuel[tank_limited] = 0
+
+            capacity_limited = ~excess & ~gen_fits & fuel_fits  # diesel capacity is limiting factor
+            load_kw[capacity_limited] -= diesel_kw[capacity_limited]
+            # run diesel gen at max output
+            fuel[capacity_limited] = np.maximum(
+                0, fuel[capacity_limited] - (diesel_kw[capacity_limited] * m + b) / n_steps_per_hour)
+
+            # check if battery can meet remaining load_kw (the only option when both diesel limits are hit)
+            battery_meets = ~excess & ~diesel_meets & (np.minimum(batt_kw, soc * n_steps_per_hour) >= load_kw)
+            # prevent battery charge from going negative
+            soc[battery_meets] = np.maximum(0, soc[battery_meets] - load_kw[battery_meets] / n_steps_per_hour)
+            load_kw[battery_meets] = 0
+
+            failed = np.round(load_kw, 5) > 0  # failed to meet load in this time step
+            if failed.any():
+                r[alive[failed]] = float(i) / float(n_steps_per_hour)
+                survived = ~failed
+                alive = alive[survived]
+                starts = starts[survived]
+                soc = soc[survived]
+                fuel = fuel[survived]
+                diesel_kw = diesel_kw[survived]
+                batt_kwh = batt_kwh[survived]
+                batt_kw = batt_kw[survived]
+                batt_charge_limit = batt_charge_limit[survived]
+
+    return r.tolist()
+
+
 def simulate_outages(batt_kwh=0, batt_kw=0, pv_kw_ac_hourly=[], init_soc=0, critical_loads_kw=[], wind_kw_ac_hourly=None,
                      batt_roundtrip_efficiency=0.829, diesel_kw=0, fuel_available=0, b=0, m=0,
-                     celery_eager=True, chp_kw=0
+                     celery_eager=True, chp_kw=0, backend=None, chunk_size=None
                      ):
     """
     :param batt_kwh: float, battery storage capacity
@@ -122,6 +245,10 @@ def simulate_outages(batt_kwh=0, batt_kw=0, pv_kw_ac_hourly=[], init_soc=0, crit
     :param fuel_available: float, gallons of diesel fuel available
     :param b: float, diesel fuel burn rate intercept coefficient (y = m*x + b*rated_capacity)  [gal/kwh/kw]
     :param m: float, diesel fuel burn rate slope (y = m*x + b*rated_capacity)  [gal/kWh]
+    :param celery_eager: bool, False to always run the simulations in a process pool (see backend)
+    :param chp_kw: float, CHP capacity
+    :param backend: str, one of OUTAGE_SIM_BACKENDS; selected from the number of time steps by default
+    :param chunk_size: int, number of outage start times per process for the "pool" backend
     :return: dict,
         {
             "resilience_by_timestep": r,
@@ -173,46 +300,224 @@ def simulate_outages(batt_kwh=0, batt_kw=0, pv_kw_ac_hourly=[], init_soc=0, crit
     Simulation starts here
     '''
     # outer loop: do simulation starting at each time step
-    if not celery_eager:  # run jobs in parallel
-        jobs = group(simulate_outage.s(
-            init_time_step=time_step,
-            diesel_kw=diesel_kw,
-            fuel_available=fuel_available,
+    if backend is None:
+        backend = select_outage_sim_backend(n_timesteps) if celery_eager else "pool"
+    sim_kwargs = dict(
+        diesel_kw=diesel_kw,
+        fuel_available=fuel_available,
+        b=b, m=m,
+        batt_kwh=batt_kwh,
+        batt_kw=batt_kw,
+        batt_roundtrip_efficiency=batt_roundtrip_efficiency,
+        n_timesteps=n_timesteps,
+        n_steps_per_hour=n_steps_per_hour,
+        chp_kw=chp_kw
+    )
+    batt_soc_kwh = [soc * batt_kwh for soc in init_soc]
+
+    if backend == "serial":
+        for time_step in range(n_timesteps):
+            r[time_step] = simulate_outage(
+                init_time_step=time_step,
+                batt_soc_kwh=batt_soc_kwh[time_step],
+                crit_load=load_minus_der,
+                **sim_kwargs
+            )
+    elif backend == "pool":
+        r = simulate_outages_pool(batt_soc_kwh=batt_soc_kwh, crit_load=load_minus_der, chunk_size=chunk_size,
+                                  **sim_kwargs)
+    elif backend == "vectorized":  # run all start times together as arrays
+        r = simulate_outages_vectorized(batt_soc_kwh=batt_soc_kwh, crit_load=load_minus_der, **sim_kwargs)
+    else:
+        raise ValueError("Invalid outage simulator backend {}. Must be one of {}.".format(
+            backend, OUTAGE_SIM_BACKENDS))
+
+    results = process_results(r, n_steps_per_hour, n_timesteps)
+    return results
+
+
+def select_outage_sim_backend(n_timesteps):
+    """
+    Choose the outage simulation backend from the problem size.
+    Managing a pool of processes only pays off for sub-hourly time series; the serial loop is always slower than the
+    vectorized one and so it is never selected.
+    :param n_timesteps: int, number of time steps (outage start times) to simulate
+    :return: str, "vectorized" or "pool"
+    """
+    # daemonic processes (eg. multiprocessing workers) are not allowed to have children
+    if n_timesteps >= OUTAGE_SIM_POOL_MIN_TIMESTEPS and OUTAGE_SIM_POOL_WORKERS > 1 \
+            and not multiprocessing.current_process().daemon:
+        return "pool"
+    return "vectorized"
+
+
+def simulate_outages_pool(diesel_kw, fuel_available, b, m, batt_kwh, batt_kw, batt_roundtrip_efficiency,
+                          n_timesteps, n_steps_per_hour, batt_soc_kwh, crit_load, chp_kw, chunk_size=None,
+                          max_workers=None):
+    """
+    Run simulate_outages_vectorized on contiguous blocks of outage start times in a pool of processes.
+    crit_load is written once to shared memory rather than being pickled for every block.
+    :param chunk_size: int, number of start times in each block; defaults to OUTAGE_SIM_POOL_CHUNK_SIZE, or to an even
+        split of the start times across the workers
+    :param max_workers: int, number of processes; defaults to OUTAGE_SIM_POOL_WORKERS
+    (see simulate_outages_vectorized for the other parameters)
+    :return: list of float, number of hours that the critical load can be met for an outage starting in each time step
+    """
+    max_workers = max_workers or OUTAGE_SIM_POOL_WORKERS
+    chunk_size = chunk_size or OUTAGE_SIM_POOL_CHUNK_SIZE or -(-n_timesteps // max_workers)
+    sim_kwargs = dict(
+        diesel_kw=diesel_kw,
+        fuel_available=fuel_available,
+        b=b, m=m,
+        batt_kwh=batt_kwh,
+        batt_kw=batt_kw,
+        batt_roundtrip_efficiency=batt_roundtrip_efficiency,
+        n_timesteps=n_timesteps,
+        n_steps_per_hour=n_steps_per_hour,
+        chp_kw=chp_kw
+    )
+    crit_load = np.asarray(crit_load, dtype=float)
+    shm = shared_memory.SharedMemory(create=True, size=crit_load.nbytes)
+    try:
+        np.ndarray(crit_load.shape, dtype=crit_load.dtype, buffer=shm.buf)[:] = crit_load
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_simulate_outages_chunk, shm.name, start, min(start + chunk_size, n_timesteps),
+                                batt_soc_kwh[start:start + chunk_size], sim_kwargs)
+                for start in range(0, n_timesteps, chunk_size)
+            ]
+            r = list()
+            for future in futures:
+                r.extend(future.result())
+    finally:
+        shm.close()
+        shm.unlink()
+    return r
+
+
+def _simulate_outages_chunk(shm_name, start, stop, batt_soc_kwh, sim_kwargs):
+    """
+    Pool worker: simulate outages starting in time steps start through stop-1 using the critical load in shared memory.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    crit_load = np.ndarray((sim_kwargs["n_timesteps"],), dtype=float, buffer=shm.buf)
+    try:
+        r = simulate_outages_vectorized(init_time_steps=range(start, stop), batt_soc_kwh=batt_soc_kwh,
+                                        crit_load=crit_load, **sim_kwargs)
+    finally:
+        del crit_load  # release the buffer before closing the shared memory
+        shm.close()
+    return r
+
+
+def simulate_outages_sweep(sizes, critical_loads_kw, pv_kw_ac_hourly=None, wind_kw_ac_hourly=None, init_soc=1.0,
+                           batt_roundtrip_efficiency=0.829, b=0, m=0, chp_kw=0):
+    """
+    Run the outage simulator for a grid of battery and generator sizes, eg. to chart resilience versus system size.
+    The load net of PV and wind is calculated once, and the outages starting at every time step for several sizes are
+    simulated together in batches of up to OUTAGE_SIM_SWEEP_BATCH_OUTAGES outages.
+    :param sizes: list of (batt_kw, batt_kwh, diesel_kw, fuel_available) tuples
+    :param critical_loads_kw: list of floats
+    :param pv_kw_ac_hourly: list of floats, AC production of PV system
+    :param wind_kw_ac_hourly: list of floats, AC production of wind turbine
+    :param init_soc: float or list of floats between 0 and 1 inclusive, initial state-of-charge as a fraction of
+        each battery size
+    :param batt_roundtrip_efficiency: roundtrip battery efficiency
+    :param b: float, diesel fuel burn rate intercept coefficient (y = m*x + b*rated_capacity)  [gal/kwh/kw]
+    :param m: float, diesel fuel burn rate slope (y = m*x + b*rated_capacity)  [gal/kWh]
+    :param chp_kw: float, CHP capacity
+    :return: dict, with one value (or list) per size in each of the results:
+        {
+            "sizes": list of dicts with keys batt_kw, batt_kwh, diesel_kw, fuel_available,
+            "resilience_hours_min": list of floats,
+            "resilience_hours_max": list of floats,
+            "resilience_hours_avg": list of floats,
+            "outage_durations": x_vals, up to the longest outage survived with any of the sizes,
+            "probs_of_surviving": list of lists of floats, each padded with zeros to the length of x_vals,
+        }
+    """
+    n_timesteps = len(critical_loads_kw)
+    n_steps_per_hour = int(n_timesteps / 8760)
+
+    load_minus_der = np.array(critical_loads_kw, dtype=float)
+    for der_kw in [pv_kw_ac_hourly, wind_kw_ac_hourly]:
+        if der_kw not in [None, []]:
+            load_minus_der -= np.array(der_kw, dtype=float)
+    init_soc = np.broadcast_to(np.asarray(init_soc, dtype=float), (n_timesteps,))
+
+    sizes = np.array(sizes, dtype=float).reshape(-1, 4)
+    sizes_per_batch = max(1, OUTAGE_SIM_SWEEP_BATCH_OUTAGES // n_timesteps)
+    r = list()
+    for first in range(0, len(sizes), sizes_per_batch):
+        batch = sizes[first:first + sizes_per_batch]
+        batt_kwh = np.repeat(batch[:, 1], n_timesteps)
+        r_batch = simulate_outages_vectorized(
+            diesel_kw=np.repeat(batch[:, 2], n_timesteps),
+            fuel_available=np.repeat(batch[:, 3], n_timesteps),
             b=b, m=m,
             batt_kwh=batt_kwh,
-            batt_kw=batt_kw,
+            batt_kw=np.repeat(batch[:, 0], n_timesteps),
             batt_roundtrip_efficiency=batt_roundtrip_efficiency,
             n_timesteps=n_timesteps,
             n_steps_per_hour=n_steps_per_hour,
-            batt_soc_kwh=init_soc[time_step]*batt_kwh,
+            batt_soc_kwh=np.tile(init_soc, len(batch)) * batt_kwh,
             crit_load=load_minus_der,
-            chp_kw=chp_kw
-        ) for time_step in range(n_timesteps)
+            chp_kw=chp_kw,
+            init_time_steps=np.tile(np.arange(n_timesteps), len(batch)),
         )
-        result = chord(jobs, process_results.s(n_steps_per_hour, n_timesteps)).delay()
-        while not result.ready():
-            sleep(2)
-        if not result.successful():
-            raise Exception("Outage simulator failed.")
-        return result.result
-    else:  # run jobs serially, faster when each job only takes a small amount of time
-        for time_step in range(n_timesteps):
-            r[time_step] = simulate_outage(
-                init_time_step=time_step,
-                diesel_kw=diesel_kw,
-                fuel_available=fuel_available,
-                b=b, m=m,
-                batt_kwh=batt_kwh,
-                batt_kw=batt_kw,
-                batt_roundtrip_efficiency=batt_roundtrip_efficiency,
-                n_timesteps=n_timesteps,
-                n_steps_per_hour=n_steps_per_hour,
-                batt_soc_kwh=init_soc[time_step] * batt_kwh,
-                crit_load=load_minus_der,
-                chp_kw=chp_kw
-            )
-        results = process_results(r, n_steps_per_hour, n_timesteps)
-        return results
+        r.extend(r_batch[k * n_timesteps:(k + 1) * n_timesteps] for k in range(len(batch)))
+
+    results = [process_results(r_size, n_steps_per_hour, n_timesteps) for r_size in r]
+    x_vals = max([res["outage_durations"] for res in results], key=len, default=[])
+    return {"sizes": [dict(zip(["batt_kw", "batt_kwh", "diesel_kw", "fuel_available"], size.tolist()))
+                      for size in sizes],
+            "resilience_hours_min": [res["resilience_hours_min"] for res in results],
+            "resilience_hours_max": [res["resilience_hours_max"] for res in results],
+            "resilience_hours_avg": [res["resilience_hours_avg"] for res in results],
+            "outage_durations": x_vals,
+            "probs_of_surviving": [res["probs_of_surviving"] + [0] * (len(x_vals) - len(res["probs_of_surviving"]))
+                                   for res in results],
+            }
+
+
+_time_step_month_and_hour = dict()
+
+
+def time_step_month_and_hour(n_steps_per_hour):
+    """
+    Month (0-11) and hour of the day (0-23) of each time step in a (non-leap) year.
+    :param n_steps_per_hour: int, number of time steps per hour
+    :return: tuple of numpy arrays of int, (month index, hour of the day index), each 8760*n_steps_per_hour long
+    """
+    if n_steps_per_hour not in _time_step_month_and_hour:
+        days_per_month = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+        month = np.repeat(np.arange(12), [d * 24 * n_steps_per_hour for d in days_per_month])
+        hour = (np.arange(8760 * n_steps_per_hour) // n_steps_per_hour) % 24
+        _time_step_month_and_hour[n_steps_per_hour] = (month, hour)
+    return _time_step_month_and_hour[n_steps_per_hour]
+
+
+def probs_of_surviving_by_group(hours_survived, group, n_groups):
+    """
+    Probability of surviving at least 0, 1, 2, ... hours for outages starting in each group of time steps.
+    :param hours_survived: numpy array of int, whole hours survived by an outage starting in each time step
+    :param group: numpy array of int, group index (eg. month) of each time step
+    :param n_groups: int, number of groups
+    :return: list of lists, one per group; PostgreSQL requires that the arrays are rectangular so shorter lists are
+        padded with zeros
+    """
+    n_hours = int(hours_survived.max()) + 1
+    counts = np.bincount(group * n_hours + hours_survived, minlength=n_groups * n_hours).reshape(n_groups, n_hours)
+    n_survived = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1]  # number of outages lasting at least column index hours
+    group_sizes = n_survived[:, 0]
+    group_widths = (n_survived > 0).sum(axis=1)  # max hours survived in each group + 1
+    width = int(group_widths.max())
+
+    probs = list()
+    for g in range(n_groups):
+        tmp = [round(float(c) / float(group_sizes[g]), 4) for c in n_survived[g, :group_widths[g]]]
+        probs.append(tmp + [0] * (width - len(tmp)))
+    return probs
 
 
 @shared_task
@@ -222,49 +527,20 @@ def process_results(r, n_steps_per_hour, n_timesteps):
     r_max = max(r)
     r_avg = round((float(sum(r)) / float(len(r))), 2)
 
-    # Create a time series of 8760*n_steps_per_hour elements starting on 1/1/2017
-    time = pd.date_range('1/1/2017', periods=8760*n_steps_per_hour, freq='{}min'.format(n_steps_per_hour*60))
-    r_series = pd.Series(r, index=time)
-
-    r_group_month = r_series.groupby(r_series.index.month)
-    r_group_hour = r_series.groupby(r_series.index.hour)
+    # whole hours survived, since the probabilities are for surviving at least 1, 2, 3, ... hours
+    hours_survived = np.floor(np.asarray(r, dtype=float)).astype(int)
+    month, hour = time_step_month_and_hour(n_steps_per_hour)
 
     x_vals = list(range(1, int(floor(r_max)+1)))
-    y_vals = list()
     y_vals_group_month = list()
     y_vals_group_hour = list()
 
-    for hrs in x_vals:
-        y_vals.append(round(float(sum([1 if h >= hrs else 0 for h in r])) / float(n_timesteps), 4))
+    n_survived = np.cumsum(np.bincount(hours_survived)[::-1])[::-1]
+    y_vals = [round(float(c) / float(n_timesteps), 4) for c in n_survived[1:len(x_vals) + 1]]
 
     if len(x_vals) > 0:
-        width = 0
-        for k, v in r_group_month:
-            tmp = list()
-            max_hr = int(v.max()) + 1
-            for hrs in range(max_hr):
-                tmp.append(round(float(sum([1 if h >= hrs else 0 for h in v])) / float(len(v)), 4))
-            y_vals_group_month.append(tmp)
-            if max_hr > width:
-                width = max_hr
-
-        # PostgreSQL requires that the arrays are rectangular
-        for i, v in enumerate(y_vals_group_month):
-            y_vals_group_month[i] = v + [0] * (width - len(v))
-
-        width = 0
-        for k, v in r_group_hour:
-            tmp = list()
-            max_hr = int(v.max()) + 1
-            for hrs in range(max_hr):
-                tmp.append(round(float(sum([1 if h >= hrs else 0 for h in v])) / float(len(v)), 4))
-            y_vals_group_hour.append(tmp)
-            if max_hr > width:
-                width = max_hr
-
-        # PostgreSQL requires that the arrays are rectangular
-        for i, v in enumerate(y_vals_group_hour):
-            y_vals_group_hour[i] = v + [0] * (width - len(v))
+        y_vals_group_month = probs_of_surviving_by_group(hours_survived, month, 12)
+        y_vals_group_hour = probs_of_surviving_by_group(hours_survived, hour, 24)
 
     return {"resilience_by_timestep": r,
             "resilience_hours_min": r_min,
@@ -29,9 +29,12 @@
 # *********************************************************************************
 import json
 import os
+import uuid
 from django.test import TestCase
 from tastypie.test import ResourceTestCaseMixin
-from resilience_stats.outage_simulator_LF import simulate_outages
+from reo.models import ScenarioModel
+from resilience_stats.outage_simulator_LF import simulate_outages, simulate_outage, simulate_outages_vectorized, \
+    simulate_outages_sweep
 
 
 class TestResilStats(ResourceTestCaseMixin, TestCase):
@@ -390,6 +393,8 @@ class TestResilStats(ResourceTestCaseMixin, TestCase):
 
         for x, y in zip(resp1['probs_of_surviving'], resp2['probs_of_surviving']):
             self.assertAlmostEquals(x, y, places=1)
+        self.assertEqual(12, len(resp2['probs_of_surviving_by_month']))
+        self.assertEqual(24, len(resp2['probs_of_surviving_by_hour_of_the_day']))
 
     def test_resil_endpoint(self):
         post = json.load(open(os.path.join('resilience_stats', 'tests', 'POST_nested.json'), 'r'))
@@ -413,6 +418,17 @@ class TestResilStats(ResourceTestCaseMixin, TestCase):
         self.assertEqual(resp_dict["resilience_hours_max"], 12)
         self.assertFalse("resilience_hours_max_bau" in resp_dict)
 
+        resp = self.api_client.post('/v2/outagesimjob/{}/sweep/'.format(run_uuid), format='json',
+                                    data={"sizes": [[0, 0, 0, 0], [100, 400, 0, 0]]})
+        self.assertEqual(resp.status_code, 201)
+        sweep_uuid = json.loads(resp.content)['sweep_uuid']
+        resp = self.api_client.get('/v2/outagesimjob/{}/sweep/{}/'.format(run_uuid, sweep_uuid))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.content)['status'], "Completed")
+        sweep_dict = json.loads(resp.content)['outage_sim_sweep_results']
+        self.assertEqual(len(sweep_dict["probs_of_surviving"]), 2)
+        self.assertEqual(len(sweep_dict["probs_of_surviving"][1]), len(sweep_dict["outage_durations"]))
+
         """
         financial_check returns true if the financial scenario system capacities are greater than or equal to the
         resilience scenario system capacities
@@ -424,6 +440,16 @@ class TestResilStats(ResourceTestCaseMixin, TestCase):
         results = json.loads(resp.content)
         self.assertTrue(results["survives_specified_outage"])
 
+    def test_sweep_without_storage(self):
+        """
+        A sweep of a scenario without Storage efficiencies is a bad request, not an unexpected error.
+        """
+        run_uuid = str(uuid.uuid4())
+        ScenarioModel.objects.create(run_uuid=run_uuid, status="optimal")
+        resp = self.api_client.post('/v2/outagesimjob/{}/sweep/'.format(run_uuid), format='json',
+                                    data={"sizes": [[0, 0, 0, 0]]})
+        self.assertEqual(resp.status_code, 400)
+
     def test_outage_sim_chp(self):
         expected = {
             'resilience_hours_min': 0,
@@ -442,3 +468,59 @@ class TestResilStats(ResourceTestCaseMixin, TestCase):
         self.assertListEqual(expected['outage_durations'], resp['outage_durations'])
         for x, y in zip(expected['probs_of_surviving'], resp['probs_of_surviving']):
             self.assertAlmostEquals(x, y, places=4)
+
+    def test_vectorized_outage_sim_matches_simulate_outage(self):
+        """
+        Simulating all outage start times together must give the same hours survived as simulate_outage.
+        """
+        inputs = self.inputs
+        load_minus_der = [ld - pv for (pv, ld) in zip(inputs['pv_kw_ac_hourly'], inputs['critical_loads_kw'])]
+        init_time_steps = list(range(0, 8760, 97))
+        kwargs = dict(
+            diesel_kw=inputs['diesel_kw'],
+            fuel_available=inputs['fuel_available'],
+            b=inputs['b'], m=inputs['m'],
+            batt_kwh=inputs['batt_kwh'],
+            batt_kw=inputs['batt_kw'],
+            batt_roundtrip_efficiency=0.829,
+            n_timesteps=8760,
+            n_steps_per_hour=1,
+            crit_load=load_minus_der,
+            chp_kw=0,
+        )
+        expected = [simulate_outage(init_time_step=ts, batt_soc_kwh=inputs['init_soc'][ts] * inputs['batt_kwh'],
+                                    **kwargs) for ts in init_time_steps]
+        resp = simulate_outages_vectorized(
+            init_time_steps=init_time_steps,
+            batt_soc_kwh=[inputs['init_soc'][ts] * inputs['batt_kwh'] for ts in init_time_steps],
+            **kwargs)
+        self.assertListEqual(expected, resp)
+
+    def test_outage_sim_backends(self):
+        """
+        Every outage simulator backend must give the same results.
+        """
+        expected = simulate_outages(backend="vectorized", **self.inputs)
+        resp = simulate_outages(backend="pool", chunk_size=1000, **self.inputs)
+        self.assertDictEqual(expected, resp)
+        resp = simulate_outages(backend="serial", **self.inputs)
+        self.assertDictEqual(expected, resp)
+
+    def test_outage_sim_sweep(self):
+        """
+        Simulating a grid of system sizes must give the same results as simulating each size separately.
+        """
+        inputs = self.inputs
+        sizes = [(0, 0, 200, 200), (inputs['batt_kw'], inputs['batt_kwh'], 0, 0),
+                 (inputs['batt_kw'], inputs['batt_kwh'], 200, 200), (50, 200, 100, 1000)]
+        resp = simulate_outages_sweep(sizes, critical_loads_kw=inputs['critical_loads_kw'],
+                                      pv_kw_ac_hourly=inputs['pv_kw_ac_hourly'], init_soc=inputs['init_soc'],
+                                      b=inputs['b'], m=inputs['m'])
+        self.assertEqual(len(sizes), len(resp['probs_of_surviving']))
+        for i, (batt_kw, batt_kwh, diesel_kw, fuel_available) in enumerate(sizes):
+            inputs.update(batt_kw=batt_kw, batt_kwh=batt_kwh, diesel_kw=diesel_kw, fuel_available=fuel_available)
+            expected = simulate_outages(**inputs)
+            self.assertEqual(expected['resilience_hours_avg'], resp['resilience_hours_avg'][i])
+            self.assertEqual(expected['resilience_hours_max'], resp['resilience_hours_max'][i])
+            self.assertListEqual(expected['probs_of_surviving'],
+                                 resp['probs_of_surviving'][i][:len(expected['probs_of_surviving'])])
@@ -35,6 +35,9 @@ urlpatterns = [
     re_path(r'^job/(?P<run_uuid>[0-9a-f-]+)/resilience_stats/?$', views.resilience_stats),
     re_path(r'^outagesimjob/(?P<run_uuid>[0-9a-f-]+)/results/?$', views.resilience_stats),
     re_path(r'^outagesimjob/(?P<run_uuid>[0-9a-f-]+)/resilience_stats/?$', views.resilience_stats),
+    re_path(r'^outagesimjob/(?P<run_uuid>[0-9a-f-]+)/sweep/?$', views.resilience_stats_sweep),
+    re_path(r'^outagesimjob/(?P<run_uuid>[0-9a-f-]+)/sweep/(?P<sweep_uuid>[0-9a-f-]+)/?$',
+            views.resilience_stats_sweep_results),
     re_path(r'^financial_check/?$', views.financial_check),
     re_path(r'^job/(?P<run_uuid>[0-9a-f-]+)/resilience_stats/financial_check/?$', views.financial_check),  # preserving old behavior
 ]
@@ -38,8 +38,9 @@ from reo.models import ModelManager
 from reo.models import ScenarioModel, PVModel, StorageModel, LoadProfileModel, GeneratorModel, FinancialModel, \
     WindModel, CHPModel
 from reo.utilities import annuity
-from resilience_stats.models import ResilienceModel, ERPMeta, ERPOutageInputs, ERPGeneratorInputs, ERPPrimeGeneratorInputs, ERPPVInputs, ERPElectricStorageInputs, ERPOutputs
-from resilience_stats.outage_simulator_LF import simulate_outages
+from resilience_stats.models import ResilienceModel, OutageSweepModel, ERPMeta, ERPOutageInputs, ERPGeneratorInputs, ERPPrimeGeneratorInputs, ERPPVInputs, ERPElectricStorageInputs, ERPOutputs
+from resilience_stats.outage_simulator_LF import simulate_outages, simulate_outages_sweep
+import json
 import numpy as np
 from reo.utilities import empty_record
 from django.views.decorators.http import require_http_methods
@@ -338,6 +339,133 @@ def financial_check(request, run_uuid=None):
         return response
 
 
+@require_http_methods(["POST"])
+def resilience_stats_sweep(request, run_uuid=None):
+    """
+    Start an outage simulation sweep over a grid of battery and generator sizes, using the critical load, PV and wind
+    production, battery state of charge, and generator fuel burn rate of the given run_uuid. The sweep runs in a
+    celery task; its results are returned by resilience_stats_sweep_results.
+    :param request: POST body with "sizes", a list of [batt_kw, batt_kwh, diesel_kw, fuel_available] lists
+    :param run_uuid:
+    :return: {"sweep_uuid", "status"} with status 201
+    """
+    max_sizes = 1000
+    try:
+        uuid.UUID(run_uuid)  # raises ValueError if not valid uuid
+    except ValueError as e:
+        return JsonResponse({"Error": str(e.args[0])}, status=400)
+
+    try:
+        sizes = json.loads(request.body)["sizes"]
+        if not isinstance(sizes, list) or len(sizes) == 0 or len(sizes) > max_sizes \
+                or any(len(size) != 4 for size in sizes):
+            raise ValueError
+        sizes = [[float(x) for x in size] for size in sizes]
+        if any(x < 0 for size in sizes for x in size):
+            raise ValueError
+    except (ValueError, TypeError, KeyError):
+        msg = ("POST body must include \"sizes\", a list of up to {} [batt_kw, batt_kwh, diesel_kw, fuel_available] "
+               "lists of non-negative numbers.").format(max_sizes)
+        return JsonResponse({"Error": msg}, status=400)
+
+    try:
+        scenario = ScenarioModel.objects.get(run_uuid=run_uuid)
+    except ScenarioModel.DoesNotExist:
+        msg = "Scenario {} does not exist.".format(run_uuid)
+        return JsonResponse({"Error": msg}, content_type='application/json', status=404)
+
+    if scenario.status == "Optimizing...":
+        return JsonResponse({"Error": "The scenario is still optimizing. Please try again later."},
+                            content_type='application/json', status=404)
+    elif "error" in scenario.status.lower():
+        return JsonResponse(
+            {"Error": "An error occurred in the scenario. Please check the messages from your results."},
+            content_type='application/json', status=500)
+
+    batt = StorageModel.objects.filter(run_uuid=run_uuid).first() or empty_record()
+    if None in (batt.internal_efficiency_pct, batt.inverter_efficiency_pct, batt.rectifier_efficiency_pct):
+        return JsonResponse({"Error": "Scenario {} has no Storage efficiencies to simulate outages with.".format(
+            run_uuid)}, content_type='application/json', status=400)
+
+    from resilience_stats.api import run_outage_sim_sweep_task  # resilience_stats.api imports this module
+    try:
+        sweep = OutageSweepModel.objects.create(sweep_uuid=uuid.uuid4(), scenariomodel=scenario, sizes=sizes)
+        run_outage_sim_sweep_task.delay(str(sweep.sweep_uuid))
+        return JsonResponse({"sweep_uuid": str(sweep.sweep_uuid), "status": sweep.status},
+                            content_type='application/json', status=201)
+
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        err = UnexpectedError(exc_type, exc_value.args[0], exc_traceback, task='resilience_stats', run_uuid=run_uuid)
+        err.save_to_db()
+        return JsonResponse({"Error": err.message}, status=500)
+
+
+@require_http_methods(["GET"])
+def resilience_stats_sweep_results(request, run_uuid=None, sweep_uuid=None):
+    """
+    Get the status of an outage simulation sweep started by resilience_stats_sweep.
+    :param request:
+    :param run_uuid:
+    :param sweep_uuid:
+    :return: {"sweep_uuid", "status", "outage_sim_sweep_results"} where the results, once the status is "Completed",
+        are {"sizes", "resilience_hours_min", "resilience_hours_max", "resilience_hours_avg", "outage_durations",
+        "probs_of_surviving"} with one value (or list) per size for each of the results.
+    """
+    try:
+        uuid.UUID(run_uuid)  # raises ValueError if not valid uuid
+        uuid.UUID(sweep_uuid)
+    except ValueError as e:
+        return JsonResponse({"Error": str(e.args[0])}, status=400)
+
+    sweep = OutageSweepModel.objects.filter(sweep_uuid=sweep_uuid, scenariomodel__run_uuid=run_uuid).first()
+    if sweep is None:
+        msg = "Outage simulation sweep {} does not exist for scenario {}.".format(sweep_uuid, run_uuid)
+        return JsonResponse({"Error": msg}, content_type='application/json', status=404)
+
+    resp = {"sweep_uuid": str(sweep.sweep_uuid), "status": sweep.status}
+    if sweep.results is not None:
+        resp["outage_sim_sweep_results"] = sweep.results
+    if sweep.error:
+        resp["Error"] = sweep.error
+    return JsonResponse(resp, content_type='application/json', status=200)
+
+
+def run_outage_sim_sweep(run_uuid, sizes):
+    """
+    Run the outage simulator for each of the given sizes with the results of the given run_uuid.
+    :param run_uuid:
+    :param sizes: list of [batt_kw, batt_kwh, diesel_kw, fuel_available] lists
+    :return: dict of simulate_outages_sweep results
+    """
+    load_profile = LoadProfileModel.objects.filter(run_uuid=run_uuid).first() or empty_record()
+    gen = GeneratorModel.objects.filter(run_uuid=run_uuid).first() or empty_record()
+    batt = StorageModel.objects.filter(run_uuid=run_uuid).first() or empty_record()
+    pvs = PVModel.objects.filter(run_uuid=run_uuid)
+    wind = WindModel.objects.filter(run_uuid=run_uuid).first() or empty_record()
+    chp = CHPModel.objects.filter(run_uuid=run_uuid).first() or empty_record()
+
+    batt_roundtrip_efficiency = batt.internal_efficiency_pct \
+                                * batt.inverter_efficiency_pct \
+                                * batt.rectifier_efficiency_pct
+    pv_kw_ac_hourly = np.zeros(len(load_profile.critical_load_series_kw))
+    for pv in pvs:
+        if pv.year_one_power_production_series_kw:
+            pv_kw_ac_hourly += np.array(pv.year_one_power_production_series_kw)
+
+    return simulate_outages_sweep(
+        sizes=sizes,
+        critical_loads_kw=load_profile.critical_load_series_kw,
+        pv_kw_ac_hourly=list(pv_kw_ac_hourly),
+        wind_kw_ac_hourly=wind.year_one_power_production_series_kw,
+        init_soc=batt.year_one_soc_series_pct or 1.0,
+        batt_roundtrip_efficiency=batt_roundtrip_efficiency,
+        b=gen.fuel_intercept_gal_per_hr or 0,
+        m=gen.fuel_slope_gal_per_kwh or 0,
+        chp_kw=chp.size_kw or 0,
+    )
+
+
 def run_outage_sim(run_uuid, with_tech=True, bau=False):
     load_profile = LoadProfileModel.objects.filter(run_uuid=run_uuid).first() or empty_record()
     gen = GeneratorModel.objects.filter(run_uuid=run_uuid).first() or empty_record()
@@ -353,18 +481,6 @@ def run_outage_sim(run_uuid, with_tech=True, bau=False):
     results = dict()
 
     if with_tech:  # NOTE: with_tech case is run after each optimization in reo/results.py
-        celery_eager = True
-        """ nlaws 200229
-        Set celery_eager = False to run each inner outage simulator loop in parallel. Timing tests with generator only
-        indicate that celery task management does not improve speed due to the overhead required to manage the 8760 tasks.
-        However, if the outage simulator does get more complicated (say with CHP) we should revisit using celery to run
-        the inner loops in parallel.
-        try:
-            if load_profile['outage_end_time_step'] - load_profile['outage_start_time_step'] > 1000:
-                celery_eager = False
-        except KeyError:
-            pass  # in case no outage has been defined
-        """
         pv_kw_ac_hourly = np.zeros(len(pvs[0].year_one_power_production_series_kw))
         for pv in pvs:
             pv_kw_ac_hourly += np.array(pv.year_one_power_production_series_kw) 
@@ -382,7 +498,6 @@ def run_outage_sim(run_uuid, with_tech=True, bau=False):
             fuel_available=gen.fuel_avail_gal,
             b=gen.fuel_intercept_gal_per_hr,
             m=gen.fuel_slope_gal_per_kwh,
-            celery_eager=celery_eager,
             chp_kw=chp.size_kw or 0,
         )
         results.update(tech_results)